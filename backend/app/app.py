@@ -1,14 +1,22 @@
 from __future__ import annotations
 
-from flask import Flask, jsonify
+import json
+import logging
+from time import perf_counter
+
+from flask import Flask, Response, g, request
 from flask_cors import CORS
 from flask_limiter.errors import RateLimitExceeded
 
 from app.config import Settings
+from app import metrics, timing
 from app.extensions import limiter
+from app.http import HttpSessionPool
+from app.responses import json_response
 from app.providers.manager import LLMManager
 from app.routes import api_bp
 from app.services.quiz_builder import QuizBuilderService
+from app.services.quiz_jobs import QuizJobService
 from app.services.session_store import SessionStore
 from app.services.topic_guardrail import TopicGuardrailService
 from app.services.wikipedia import WikipediaService
@@ -19,22 +27,37 @@ def create_app() -> Flask:
     app = Flask(__name__)
     app.config["MAX_CONTENT_LENGTH"] = settings.max_content_length_mb * 1024 * 1024
 
+    app.config["RATELIMIT_STORAGE_URI"] = settings.ratelimit_storage_uri
+    # If a shared store becomes unreachable, fall back to per-worker counters instead of
+    # failing requests.
+    app.config["RATELIMIT_IN_MEMORY_FALLBACK_ENABLED"] = (
+        settings.ratelimit_storage_uri != "memory://"
+    )
     limiter.init_app(app)
     CORS(app, resources={r"*": {"origins": settings.cors_origins}})
 
-    llm_manager = LLMManager(settings=settings)
-    wikipedia = WikipediaService(settings=settings)
+    http = HttpSessionPool.from_settings(settings)
+    llm_manager = LLMManager(settings=settings, http=http)
+    wikipedia = WikipediaService(settings=settings, http=http)
     quiz_builder = QuizBuilderService(settings=settings, llm_manager=llm_manager)
     topic_guardrail = TopicGuardrailService(settings=settings, llm_manager=llm_manager)
     session_store = SessionStore(settings=settings, quiz_builder=quiz_builder)
+    quiz_jobs = QuizJobService(
+        settings=settings,
+        wikipedia=wikipedia,
+        quiz_builder=quiz_builder,
+        session_store=session_store,
+    )
 
     app.extensions["settings"] = settings
     app.extensions["services"] = {
+        "http": http,
         "llm_manager": llm_manager,
         "wikipedia": wikipedia,
         "quiz_builder": quiz_builder,
         "topic_guardrail": topic_guardrail,
         "session_store": session_store,
+        "quiz_jobs": quiz_jobs,
     }
 
     api_prefix = f"{settings.app_base_path}/api"
@@ -42,7 +65,7 @@ def create_app() -> Flask:
 
     @app.get("/")
     def root() -> tuple:
-        return jsonify(
+        return json_response(
             {
                 "name": "quiz-me-api",
                 "status": "ok",
@@ -50,13 +73,87 @@ def create_app() -> Flask:
             }
         ), 200
 
+    metrics.configure(settings.metrics_enabled)
+    if settings.metrics_enabled:
+
+        @app.before_request
+        def start_request_metrics() -> None:
+            g.metrics_started_at = perf_counter()
+
+        # A shared backend is counted once at scrape time. Memory sessions live in each
+        # worker, so every worker publishes its own count after each request and the
+        # multiprocess collector sums the live workers.
+        per_worker_sessions = session_store.backend.name == "memory"
+
+        @app.after_request
+        def record_request_metrics(response):
+            started_at = g.pop("metrics_started_at", None)
+            if started_at is not None:
+                metrics.current().observe_request(
+                    request.method,
+                    request.endpoint or "unmatched",
+                    response.status_code,
+                    perf_counter() - started_at,
+                )
+            if per_worker_sessions:
+                metrics.current().worker_sessions(session_store.backend.count())
+            return response
+
+        scrape_gauges = {}
+        if not per_worker_sessions:
+            scrape_gauges["quiz_me_sessions_active"] = (
+                "Sessions held by the session backend.",
+                session_store.backend.count,
+            )
+
+        @app.get(f"{settings.app_base_path}/metrics")
+        def prometheus_metrics() -> Response:
+            body, content_type = metrics.PrometheusMetrics.render(scrape_gauges)
+            return Response(body, content_type=content_type)
+
+    if settings.server_timing_enabled or settings.server_timing_log:
+        timing_logger = logging.getLogger("quiz_me.timing")
+
+        @app.before_request
+        def start_timing() -> None:
+            g.timing_token = timing.start_request()
+
+        @app.after_request
+        def report_timing(response):
+            timings = timing.current()
+            if timings is None:
+                return response
+            if settings.server_timing_enabled:
+                response.headers["Server-Timing"] = timings.server_timing_header()
+            if settings.server_timing_log:
+                timing_logger.info(
+                    json.dumps(
+                        {
+                            "method": request.method,
+                            "endpoint": request.endpoint,
+                            "path": request.path,
+                            "status": response.status_code,
+                            "total_ms": timings.total_ms(),
+                            "spans": timings.spans(),
+                        }
+                    )
+                )
+            return response
+
+        @app.teardown_request
+        def finish_timing(_error) -> None:
+            token = g.pop("timing_token", None)
+            if token is not None:
+                timing.finish_request(token)
+
     @app.errorhandler(413)
     def request_too_large(_error):
-        return jsonify({"status": "error", "message": "Request payload too large."}), 413
+        return json_response({"status": "error", "message": "Request payload too large."}), 413
 
     @app.errorhandler(RateLimitExceeded)
     def rate_limit_exceeded(error):
+        metrics.current().rate_limited(request.endpoint or "unmatched")
         message = str(getattr(error, "description", "")).strip() or "Rate limit exceeded."
-        return jsonify({"status": "error", "message": message}), 429
+        return json_response({"status": "error", "message": message}), 429
 
     return app
@@ -0,0 +1,8 @@
+from asgiref.wsgi import WsgiToAsgi
+
+from app import create_app
+
+# ASGI entry point alongside app.wsgi, e.g. `uvicorn app.asgi:app`. Flask views still run
+# in asgiref's thread pool; long-running generation goes through /quiz/jobs, which uses
+# the asyncio job runner when QUIZ_JOB_ASYNC=true.
+app = WsgiToAsgi(create_app())
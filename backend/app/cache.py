@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from app import metrics
+from app.storage import SQLiteConnections
+
+
+MISSING = object()
+
+
+class SQLiteCacheTier:
+    """
+    Optional on-disk tier that survives restarts and is shared by workers on one host.
+    Values must be JSON-serializable. Expired rows are pruned every `prune_every` writes.
+    """
+
+    def __init__(self, path: str, prune_every: int = 500) -> None:
+        self._connections = SQLiteConnections(path)
+        self.prune_every = max(1, prune_every)
+        self._writes = 0
+        self._connections.connection().execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "namespace TEXT NOT NULL, "
+            "key TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, "
+            "payload TEXT NOT NULL, "
+            "PRIMARY KEY (namespace, key)"
+            ")"
+        )
+
+    def get(self, namespace: str, key: str, now: float) -> Tuple[float, Any] | None:
+        row = self._connections.connection().execute(
+            "SELECT expires_at, payload FROM cache_entries WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None or row[0] <= now:
+            return None
+        return float(row[0]), json.loads(row[1])
+
+    def set(self, namespace: str, key: str, value: Any, expires_at: float) -> None:
+        connection = self._connections.connection()
+        connection.execute(
+            "INSERT INTO cache_entries (namespace, key, expires_at, payload) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(namespace, key) DO UPDATE SET "
+            "expires_at = excluded.expires_at, payload = excluded.payload",
+            (namespace, key, expires_at, json.dumps(value, separators=(",", ":"))),
+        )
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            connection.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+
+    def increment(
+        self, namespace: str, key: str, field: str, limit: int, now: float
+    ) -> Tuple[float, Any] | None:
+        # One UPDATE ... RETURNING, so SQLite's write lock serializes concurrent workers.
+        path = f"$.{field}"
+        row = self._connections.connection().execute(
+            "UPDATE cache_entries SET payload = json_set(payload, ?, json_extract(payload, ?) + 1) "
+            "WHERE namespace = ? AND key = ? AND expires_at > ? "
+            "AND (? = 0 OR json_extract(payload, ?) < ?) "
+            "RETURNING expires_at, payload",
+            (path, path, namespace, key, now, limit, path, limit),
+        ).fetchone()
+        if row is None:
+            return None
+        return float(row[0]), json.loads(row[1])
+
+
+_LOOKUP_RESULTS = {"hits": "hit", "disk_hits": "disk_hit", "misses": "miss"}
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache with a TTL per entry and an optional disk tier behind it.
+    Entries are namespaced so one cache can serve several endpoints with different TTLs.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        disk: SQLiteCacheTier | None = None,
+        name: str = "cache",
+    ) -> None:
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.disk = disk
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Tuple[str, str], Tuple[float, Any]] = OrderedDict()
+        self._stats: Dict[str, int] = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+        if name in _LOOKUP_RESULTS:
+            metrics.current().cache_lookup(self.name, _LOOKUP_RESULTS[name])
+
+    def _store(self, entry_key: Tuple[str, str], expires_at: float, value: Any) -> None:
+        with self._lock:
+            self._entries[entry_key] = (expires_at, value)
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get(self, namespace: str, key: str) -> Any:
+        entry_key = (namespace, key)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(entry_key)
+                    self._stats["hits"] += 1
+                    metrics.current().cache_lookup(self.name, "hit")
+                    return entry[1]
+                del self._entries[entry_key]
+
+        if self.disk is not None:
+            stored = self.disk.get(namespace, key, now)
+            if stored is not None:
+                expires_at, value = stored
+                self._store(entry_key, expires_at, value)
+                self._count("disk_hits")
+                return value
+
+        self._count("misses")
+        return MISSING
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: float) -> None:
+        if ttl_seconds <= 0:
+            return
+        expires_at = time.time() + ttl_seconds
+        self._store((namespace, key), expires_at, value)
+        if self.disk is not None:
+            self.disk.set(namespace, key, value, expires_at)
+
+    def increment(self, namespace: str, key: str, field: str, limit: int = 0) -> Any:
+        """
+        Adds one to the integer `field` of a cached dict while it is below `limit` (0: no limit)
+        and returns the updated dict, or MISSING once the entry is gone, expired or used up.
+        With a disk tier the count lives in the shared row and is bumped in one statement.
+        """
+        entry_key = (namespace, key)
+        now = time.time()
+        if self.disk is not None:
+            stored = self.disk.increment(namespace, key, field, limit, now)
+            if stored is None:
+                self._count("misses")
+                return MISSING
+            expires_at, value = stored
+            self._store(entry_key, expires_at, value)
+            self._count("disk_hits")
+            return value
+
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None and entry[0] > now and (not limit or entry[1][field] < limit):
+                value = {**entry[1], field: entry[1][field] + 1}
+                self._entries[entry_key] = (entry[0], value)
+                self._entries.move_to_end(entry_key)
+            else:
+                value = MISSING
+        self._count("misses" if value is MISSING else "hits")
+        return value
+
+    def get_or_load(
+        self,
+        namespace: str,
+        key: str,
+        loader: Callable[[], Any],
+        ttl_seconds: float,
+        negative_ttl_seconds: float | None = None,
+    ) -> Any:
+        """
+        Return the cached value or call `loader` and cache its result. Falsy results (no
+        search hits, 404 summaries, empty extracts) use `negative_ttl_seconds` when given.
+        Exceptions from the loader propagate and are never cached.
+        """
+        value = self.get(namespace, key)
+        if value is not MISSING:
+            return value
+        value = loader()
+        if not value and negative_ttl_seconds is not None:
+            self.set(namespace, key, value, negative_ttl_seconds)
+        else:
+            self.set(namespace, key, value, ttl_seconds)
+        return value
+
+    async def aget_or_load(
+        self,
+        namespace: str,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_seconds: float,
+        negative_ttl_seconds: float | None = None,
+    ) -> Any:
+        """`get_or_load` for coroutine loaders."""
+        value = self.get(namespace, key)
+        if value is not MISSING:
+            return value
+        value = await loader()
+        if not value and negative_ttl_seconds is not None:
+            self.set(namespace, key, value, negative_ttl_seconds)
+        else:
+            self.set(namespace, key, value, ttl_seconds)
+        return value
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats: dict[str, Any] = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
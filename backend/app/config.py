@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
+from pathlib import Path
 from typing import List
 
 
 ALLOWED_PROVIDERS = {"openai", "perplexity", "gemini"}
+ALLOWED_SESSION_BACKENDS = {"memory", "sqlite", "redis"}
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
 
 
 def _as_bool(value: str | None, default: bool) -> bool:
@@ -38,21 +41,49 @@ def _csv(value: str | None, default: List[str]) -> List[str]:
     return [entry.strip() for entry in value.split(",") if entry.strip()]
 
 
+def backend_path(value: str) -> str:
+    """Relative runtime paths are anchored at the backend directory, not the working directory."""
+    return str(BACKEND_ROOT / value)
+
+
+def _optional_backend_path(value: str | None) -> str:
+    value = (value or "").strip()
+    return backend_path(value) if value else ""
+
+
 @dataclass
 class Settings:
     app_env: str
     app_base_path: str
     cors_origins: List[str]
     max_content_length_mb: int
+    server_timing_enabled: bool
+    server_timing_log: bool
+    metrics_enabled: bool
 
     llm_provider_order: List[str]
     llm_timeout_ms: int
     llm_max_retries_per_provider: int
     llm_failover_on: List[str]
+    llm_hedge_enabled: bool
+    llm_hedge_delay_ms: int
+    llm_hedge_percentile: float
+    llm_hedge_min_samples: int
+    llm_hedge_max_parallel: int
+    llm_hedge_daily_budget_usd: float
     llm_allow_mock: bool
     llm_force_mock_mode: bool
     llm_telemetry_enabled: bool
     llm_telemetry_dir: str
+    llm_telemetry_flush_interval_seconds: float
+    llm_telemetry_flush_max_events: int
+    llm_telemetry_sharded: bool
+    llm_telemetry_rollup_days: int
+    llm_telemetry_segment_max_mb: int
+    llm_telemetry_segment_max_hours: float
+    llm_telemetry_segment_retention_days: int
+    telemetry_api_token: str
+    llm_stream_quiz_generation: bool
 
     model_topic_guardrail: str
     model_quiz_generation: str
@@ -71,13 +102,48 @@ class Settings:
     wiki_summary_target_chars: int
     wiki_lang: str
     wiki_user_agent: str
+    wiki_cache_enabled: bool
+    wiki_cache_max_entries: int
+    wiki_cache_search_ttl_seconds: int
+    wiki_cache_summary_ttl_seconds: int
+    wiki_cache_extract_ttl_seconds: int
+    wiki_cache_negative_ttl_seconds: int
+    wiki_cache_disk_path: str
+    wiki_fanout_workers: int
+
+    http_pool_size: int
+    http_pool_retries: int
+    http_pool_backoff_seconds: float
 
     max_req_per_10min: str
     max_quiz_creations_per_10min: str
     max_quiz_creations_per_day: str
+    ratelimit_storage_uri: str
 
     short_grade_confidence_threshold: float
 
+    quiz_cache_enabled: bool
+    quiz_cache_ttl_seconds: int
+    quiz_cache_max_reuses: int
+    quiz_cache_shuffle_options: bool
+    quiz_cache_max_entries: int
+    quiz_cache_disk_path: str
+
+    session_backend: str
+    session_sqlite_path: str
+    session_redis_url: str
+    session_ttl_seconds: int
+    session_idle_ttl_seconds: int
+    session_max_count: int
+    session_sweep_interval_seconds: int
+
+    quiz_job_workers: int
+    quiz_job_ttl_seconds: int
+    quiz_job_events_max_seconds: int
+    quiz_job_async: bool
+    quiz_job_async_concurrency: int
+    async_http_max_connections: int
+
     @classmethod
     def from_env(cls) -> "Settings":
         provider_order = [
@@ -95,11 +161,33 @@ class Settings:
         if app_base_path.endswith("/"):
             app_base_path = app_base_path.rstrip("/")
 
+        session_backend = os.getenv("SESSION_BACKEND", "memory").strip().lower()
+        if session_backend not in ALLOWED_SESSION_BACKENDS:
+            session_backend = "memory"
+
+        session_redis_url = os.getenv("SESSION_REDIS_URL", "redis://127.0.0.1:6379/0")
+
+        # Rate-limit counters follow the session backend unless configured explicitly, so a
+        # deployment that shares sessions across workers also shares its quotas.
+        ratelimit_storage_uri = os.getenv("RATELIMIT_STORAGE_URI", "").strip()
+        if not ratelimit_storage_uri:
+            if session_backend == "sqlite":
+                ratelimit_storage_uri = "sqlite:///" + backend_path(
+                    "runtime/ratelimit/ratelimit.sqlite3"
+                )
+            elif session_backend == "redis":
+                ratelimit_storage_uri = session_redis_url
+            else:
+                ratelimit_storage_uri = "memory://"
+
         return cls(
             app_env=os.getenv("APP_ENV", "development"),
             app_base_path=app_base_path,
             cors_origins=_csv(os.getenv("CORS_ORIGINS"), ["*"]),
             max_content_length_mb=_as_int(os.getenv("MAX_CONTENT_LENGTH_MB"), 2),
+            server_timing_enabled=_as_bool(os.getenv("SERVER_TIMING_ENABLED"), False),
+            server_timing_log=_as_bool(os.getenv("SERVER_TIMING_LOG"), False),
+            metrics_enabled=_as_bool(os.getenv("METRICS_ENABLED"), False),
             llm_provider_order=provider_order,
             llm_timeout_ms=_as_int(os.getenv("LLM_TIMEOUT_MS"), 90000),
             llm_max_retries_per_provider=_as_int(
@@ -109,10 +197,35 @@ class Settings:
                 os.getenv("LLM_FAILOVER_ON"),
                 ["all"],
             ),
+            llm_hedge_enabled=_as_bool(os.getenv("LLM_HEDGE_ENABLED"), False),
+            llm_hedge_delay_ms=_as_int(os.getenv("LLM_HEDGE_DELAY_MS"), 20000),
+            llm_hedge_percentile=_as_float(os.getenv("LLM_HEDGE_PERCENTILE"), 0.95),
+            llm_hedge_min_samples=_as_int(os.getenv("LLM_HEDGE_MIN_SAMPLES"), 20),
+            llm_hedge_max_parallel=_as_int(os.getenv("LLM_HEDGE_MAX_PARALLEL"), 2),
+            llm_hedge_daily_budget_usd=_as_float(os.getenv("LLM_HEDGE_DAILY_BUDGET_USD"), 1.0),
             llm_allow_mock=_as_bool(os.getenv("LLM_ALLOW_MOCK"), True),
             llm_force_mock_mode=_as_bool(os.getenv("LLM_FORCE_MOCK_MODE"), False),
             llm_telemetry_enabled=_as_bool(os.getenv("LLM_TELEMETRY_ENABLED"), True),
-            llm_telemetry_dir=os.getenv("LLM_TELEMETRY_DIR", "runtime/llm_telemetry"),
+            llm_telemetry_dir=backend_path(
+                os.getenv("LLM_TELEMETRY_DIR", "runtime/llm_telemetry")
+            ),
+            llm_telemetry_flush_interval_seconds=_as_float(
+                os.getenv("LLM_TELEMETRY_FLUSH_INTERVAL_SECONDS"), 2.0
+            ),
+            llm_telemetry_flush_max_events=_as_int(
+                os.getenv("LLM_TELEMETRY_FLUSH_MAX_EVENTS"), 200
+            ),
+            llm_telemetry_sharded=_as_bool(os.getenv("LLM_TELEMETRY_SHARDED"), False),
+            llm_telemetry_rollup_days=_as_int(os.getenv("LLM_TELEMETRY_ROLLUP_DAYS"), 90),
+            llm_telemetry_segment_max_mb=_as_int(os.getenv("LLM_TELEMETRY_SEGMENT_MAX_MB"), 64),
+            llm_telemetry_segment_max_hours=_as_float(
+                os.getenv("LLM_TELEMETRY_SEGMENT_MAX_HOURS"), 24.0
+            ),
+            llm_telemetry_segment_retention_days=_as_int(
+                os.getenv("LLM_TELEMETRY_SEGMENT_RETENTION_DAYS"), 90
+            ),
+            telemetry_api_token=os.getenv("TELEMETRY_API_TOKEN", "").strip(),
+            llm_stream_quiz_generation=_as_bool(os.getenv("LLM_STREAM_QUIZ_GENERATION"), True),
             model_topic_guardrail=os.getenv("MODEL_TOPIC_GUARDRAIL", "gpt-5-nano"),
             model_quiz_generation=os.getenv("MODEL_QUIZ_GENERATION", "gpt-5-mini"),
             model_short_grading=os.getenv("MODEL_SHORT_GRADING", "gpt-5-mini"),
@@ -135,12 +248,55 @@ class Settings:
                 "WIKI_USER_AGENT",
                 "quiz-me-app/0.1 (https://apps.aniketshedge.com/quiz-me/; quiz-me-demo)",
             ),
+            wiki_cache_enabled=_as_bool(os.getenv("WIKI_CACHE_ENABLED"), True),
+            wiki_cache_max_entries=_as_int(os.getenv("WIKI_CACHE_MAX_ENTRIES"), 2048),
+            wiki_cache_search_ttl_seconds=_as_int(
+                os.getenv("WIKI_CACHE_SEARCH_TTL_SECONDS"), 3600
+            ),
+            wiki_cache_summary_ttl_seconds=_as_int(
+                os.getenv("WIKI_CACHE_SUMMARY_TTL_SECONDS"), 21600
+            ),
+            wiki_cache_extract_ttl_seconds=_as_int(
+                os.getenv("WIKI_CACHE_EXTRACT_TTL_SECONDS"), 86400
+            ),
+            wiki_cache_negative_ttl_seconds=_as_int(
+                os.getenv("WIKI_CACHE_NEGATIVE_TTL_SECONDS"), 300
+            ),
+            wiki_cache_disk_path=_optional_backend_path(os.getenv("WIKI_CACHE_DISK_PATH")),
+            wiki_fanout_workers=_as_int(os.getenv("WIKI_FANOUT_WORKERS"), 5),
+            http_pool_size=_as_int(os.getenv("HTTP_POOL_SIZE"), 10),
+            http_pool_retries=_as_int(os.getenv("HTTP_POOL_RETRIES"), 2),
+            http_pool_backoff_seconds=_as_float(os.getenv("HTTP_POOL_BACKOFF_SECONDS"), 0.3),
             max_req_per_10min=os.getenv("MAX_REQ_PER_10MIN", "60"),
             max_quiz_creations_per_10min=os.getenv("MAX_QUIZ_CREATIONS_PER_10MIN", "5"),
             max_quiz_creations_per_day=os.getenv("MAX_QUIZ_CREATIONS_PER_DAY", "1"),
+            ratelimit_storage_uri=ratelimit_storage_uri,
             short_grade_confidence_threshold=_as_float(
                 os.getenv("SHORT_GRADE_CONFIDENCE_THRESHOLD"), 0.60
             ),
+            quiz_cache_enabled=_as_bool(os.getenv("QUIZ_CACHE_ENABLED"), False),
+            quiz_cache_ttl_seconds=_as_int(os.getenv("QUIZ_CACHE_TTL_SECONDS"), 86400),
+            quiz_cache_max_reuses=_as_int(os.getenv("QUIZ_CACHE_MAX_REUSES"), 20),
+            quiz_cache_shuffle_options=_as_bool(os.getenv("QUIZ_CACHE_SHUFFLE_OPTIONS"), True),
+            quiz_cache_max_entries=_as_int(os.getenv("QUIZ_CACHE_MAX_ENTRIES"), 256),
+            quiz_cache_disk_path=_optional_backend_path(os.getenv("QUIZ_CACHE_DISK_PATH")),
+            session_backend=session_backend,
+            session_sqlite_path=backend_path(
+                os.getenv("SESSION_SQLITE_PATH", "runtime/sessions/sessions.sqlite3")
+            ),
+            session_redis_url=session_redis_url,
+            session_ttl_seconds=_as_int(os.getenv("SESSION_TTL_SECONDS"), 86400),
+            session_idle_ttl_seconds=_as_int(os.getenv("SESSION_IDLE_TTL_SECONDS"), 7200),
+            session_max_count=_as_int(os.getenv("SESSION_MAX_COUNT"), 5000),
+            session_sweep_interval_seconds=_as_int(
+                os.getenv("SESSION_SWEEP_INTERVAL_SECONDS"), 60
+            ),
+            quiz_job_workers=_as_int(os.getenv("QUIZ_JOB_WORKERS"), 4),
+            quiz_job_ttl_seconds=_as_int(os.getenv("QUIZ_JOB_TTL_SECONDS"), 3600),
+            quiz_job_events_max_seconds=_as_int(os.getenv("QUIZ_JOB_EVENTS_MAX_SECONDS"), 25),
+            quiz_job_async=_as_bool(os.getenv("QUIZ_JOB_ASYNC"), False),
+            quiz_job_async_concurrency=_as_int(os.getenv("QUIZ_JOB_ASYNC_CONCURRENCY"), 200),
+            async_http_max_connections=_as_int(os.getenv("ASYNC_HTTP_MAX_CONNECTIONS"), 100),
         )
 
     def get_task_model(self, provider: str, task: str) -> str:
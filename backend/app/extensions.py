@@ -6,6 +6,9 @@ from flask import request
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
+# Registers the sqlite:/// storage scheme with `limits`.
+from app import ratelimit  # noqa: F401
+
 
 def _client_ip_for_rate_limit() -> str:
     """
@@ -22,4 +25,5 @@ def _client_ip_for_rate_limit() -> str:
     return get_remote_address() or "unknown"
 
 
-limiter = Limiter(key_func=_client_ip_for_rate_limit, storage_uri="memory://")
+# Storage comes from RATELIMIT_STORAGE_URI, which `create_app` sets from Settings before init_app.
+limiter = Limiter(key_func=_client_ip_for_rate_limit)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class HttpSessionPool:
+    """
+    One keep-alive `requests.Session` per upstream host, created lazily and shared by all
+    threads of a worker process. Sessions hold no cookies or auth state we rely on, so
+    concurrent use is safe; urllib3's connection pools are thread-safe.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        retries: int = 2,
+        backoff_seconds: float = 0.3,
+    ) -> None:
+        self.pool_size = max(1, pool_size)
+        self.retries = max(0, retries)
+        self.backoff_seconds = max(0.0, backoff_seconds)
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._adapters: Dict[str, HTTPAdapter] = {}
+        self._request_counts: Dict[str, int] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "HttpSessionPool":
+        return cls(
+            pool_size=settings.http_pool_size,
+            retries=settings.http_pool_retries,
+            backoff_seconds=settings.http_pool_backoff_seconds,
+        )
+
+    def _retry_policy(self) -> Retry:
+        # Connection failures happen before a request is sent, so they are retried for every
+        # method. Read errors and gateway statuses are only retried for idempotent GETs, which
+        # keeps LLM POSTs from being billed twice.
+        return Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            backoff_factor=self.backoff_seconds,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+
+    def _build_session(self, host: str) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=self._retry_policy(),
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        def count_response(response: requests.Response, *args: Any, **kwargs: Any) -> None:
+            with self._lock:
+                self._request_counts[host] = self._request_counts.get(host, 0) + 1
+
+        session.hooks["response"].append(count_response)
+        self._adapters[host] = adapter
+        return session
+
+    def session_for(self, url: str) -> requests.Session:
+        host = urlsplit(url).netloc
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._build_session(host)
+                self._sessions[host] = session
+        return session
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            adapters = dict(self._adapters)
+            request_counts = dict(self._request_counts)
+
+        hosts: dict[str, Any] = {}
+        for host, adapter in adapters.items():
+            opened = 0
+            idle = 0
+            for key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is None:
+                    continue
+                opened += int(getattr(pool, "num_connections", 0))
+                # Idle slots hold either a reusable connection or None placeholders.
+                idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+            hosts[host] = {
+                "requests": request_counts.get(host, 0),
+                "connections_opened": opened,
+                "connections_idle": idle,
+            }
+        return {"pool_size": self.pool_size, "retries": self.retries, "hosts": hosts}
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._adapters.clear()
+        for session in sessions:
+            session.close()
+
+
+def build_async_client(settings: Any) -> Any:
+    """
+    Shared `httpx.AsyncClient` for the asyncio job path. It must be created and used on one
+    event loop. Connection waits are unbounded; callers bound concurrency themselves.
+    """
+    import httpx
+
+    # httpx only retries connection failures, which matches the POST-safe part of the sync policy.
+    transport = httpx.AsyncHTTPTransport(
+        retries=max(0, settings.http_pool_retries),
+        limits=httpx.Limits(
+            max_connections=max(1, settings.async_http_max_connections),
+            max_keepalive_connections=max(1, settings.http_pool_size),
+        ),
+    )
+    return httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(30.0, pool=None))
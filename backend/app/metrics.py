@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+
+REQUEST_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 180)
+
+
+class _NullMetrics:
+    """Used until `configure` enables Prometheus metrics; every hook is a no-op."""
+
+    def observe_request(self, method: str, endpoint: str, status: int, seconds: float) -> None:
+        pass
+
+    def rate_limited(self, endpoint: str) -> None:
+        pass
+
+    @contextmanager
+    def llm_in_flight(self, provider: str) -> Iterator[None]:
+        yield
+
+    def llm_failover(self, provider: str, category: str) -> None:
+        pass
+
+    def llm_repair(self, provider: str, task: str) -> None:
+        pass
+
+    def cache_lookup(self, cache: str, result: str) -> None:
+        pass
+
+    def worker_sessions(self, count: int) -> None:
+        pass
+
+
+class PrometheusMetrics(_NullMetrics):
+    """
+    prometheus_client metrics. When PROMETHEUS_MULTIPROC_DIR is set (gunicorn), each worker
+    writes its samples to that directory and `render` merges all workers, so counters and
+    in-flight gauges are totals for the whole server rather than for whichever worker answered.
+    """
+
+    def __init__(self) -> None:
+        from prometheus_client import Counter, Gauge, Histogram
+
+        self.requests = Counter(
+            "quiz_me_http_requests_total",
+            "HTTP requests by route and status.",
+            ["method", "endpoint", "status"],
+        )
+        self.request_seconds = Histogram(
+            "quiz_me_http_request_duration_seconds",
+            "HTTP request latency by route.",
+            ["method", "endpoint"],
+            buckets=REQUEST_LATENCY_BUCKETS,
+        )
+        self.rate_limits = Counter(
+            "quiz_me_rate_limited_total",
+            "Requests rejected by the rate limiter.",
+            ["endpoint"],
+        )
+        self.llm_calls = Gauge(
+            "quiz_me_llm_calls_in_flight",
+            "LLM provider calls currently waiting on a response.",
+            ["provider"],
+            multiprocess_mode="livesum",
+        )
+        self.llm_failovers = Counter(
+            "quiz_me_llm_failovers_total",
+            "Requests handed to the next configured provider, by the last LLMError category.",
+            ["provider", "category"],
+        )
+        self.llm_repairs = Counter(
+            "quiz_me_llm_repairs_total",
+            "JSON repair calls made after invalid model output.",
+            ["provider", "task"],
+        )
+        self.cache_lookups = Counter(
+            "quiz_me_cache_lookups_total",
+            "Cache lookups by cache and result (hit, disk_hit, miss).",
+            ["cache", "result"],
+        )
+        # Created on first use: only a process-local session backend reports through it.
+        self._worker_sessions: Any = None
+
+    def observe_request(self, method: str, endpoint: str, status: int, seconds: float) -> None:
+        self.requests.labels(method, endpoint, str(status)).inc()
+        self.request_seconds.labels(method, endpoint).observe(seconds)
+
+    def rate_limited(self, endpoint: str) -> None:
+        self.rate_limits.labels(endpoint).inc()
+
+    @contextmanager
+    def llm_in_flight(self, provider: str) -> Iterator[None]:
+        gauge = self.llm_calls.labels(provider)
+        gauge.inc()
+        try:
+            yield
+        finally:
+            gauge.dec()
+
+    def llm_failover(self, provider: str, category: str) -> None:
+        self.llm_failovers.labels(provider, category).inc()
+
+    def llm_repair(self, provider: str, task: str) -> None:
+        self.llm_repairs.labels(provider, task).inc()
+
+    def cache_lookup(self, cache: str, result: str) -> None:
+        self.cache_lookups.labels(cache, result).inc()
+
+    def worker_sessions(self, count: int) -> None:
+        if self._worker_sessions is None:
+            from prometheus_client import Gauge
+
+            self._worker_sessions = Gauge(
+                "quiz_me_sessions_active",
+                "Sessions held by the session backend, summed over live workers.",
+                multiprocess_mode="livesum",
+            )
+        self._worker_sessions.set(count)
+
+    @staticmethod
+    def render(gauges: dict[str, tuple[str, Callable[[], float]]]) -> tuple[bytes, str]:
+        """
+        Exposition text for all workers plus `gauges` (name -> (help, read)), which are read at
+        scrape time from state every worker shares, such as the session backend.
+        """
+        from prometheus_client import (
+            CONTENT_TYPE_LATEST,
+            REGISTRY,
+            CollectorRegistry,
+            generate_latest,
+        )
+        from prometheus_client.core import GaugeMetricFamily
+
+        if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+            from prometheus_client import multiprocess
+
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+
+        scrape_time = CollectorRegistry()
+        for name, (help_text, read) in gauges.items():
+            family = GaugeMetricFamily(name, help_text, value=read())
+            scrape_time.register(_Fixed(family))
+        return generate_latest(registry) + generate_latest(scrape_time), CONTENT_TYPE_LATEST
+
+
+class _Fixed:
+    def __init__(self, family: Any) -> None:
+        self.family = family
+
+    def collect(self) -> Iterator[Any]:
+        yield self.family
+
+
+_active: _NullMetrics = _NullMetrics()
+_prometheus: PrometheusMetrics | None = None
+
+
+def configure(enabled: bool) -> _NullMetrics:
+    """Install Prometheus metrics for this process; metric objects are created only once."""
+    global _active, _prometheus
+    if enabled:
+        if _prometheus is None:
+            _prometheus = PrometheusMetrics()
+        _active = _prometheus
+    else:
+        _active = _NullMetrics()
+    return _active
+
+
+def current() -> _NullMetrics:
+    return _active
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import httpx
+
+from .base import LLMCallInput, LLMCallOutput, LLMError
+from .clients import (
+    SSE_DONE,
+    HttpLLMProvider,
+    StreamCollector,
+    parse_sse_line,
+    raise_for_provider_status,
+)
+
+
+class AsyncHttpProvider:
+    """
+    asyncio transport for an `HttpLLMProvider`: same payloads, schema fallbacks, status
+    mapping and stream parsing, sent through a shared `httpx.AsyncClient`.
+    """
+
+    def __init__(self, provider: HttpLLMProvider, client: httpx.AsyncClient) -> None:
+        self.provider = provider
+        self.client = client
+        self.name = provider.name
+
+    def is_configured(self) -> bool:
+        return self.provider.is_configured()
+
+    async def _send(self, endpoint: str, payload: dict[str, Any], streaming: bool) -> httpx.Response:
+        provider = self.provider
+        body = provider.post_body(payload)
+        if "data" in body:
+            body = {"content": body["data"]}
+        request = self.client.build_request(
+            "POST",
+            endpoint,
+            headers=provider.headers(),
+            timeout=httpx.Timeout(provider.timeout_ms / 1000, pool=None),
+            **body,
+        )
+        response = await self.client.send(request, stream=True)
+        if response.status_code >= 400 or not streaming:
+            await response.aread()
+        return response
+
+    async def generate_text(
+        self,
+        request: LLMCallInput,
+        on_text: Callable[[str], None] | None = None,
+    ) -> LLMCallOutput:
+        provider = self.provider
+        if not provider.is_configured():
+            raise LLMError(f"Provider {self.name} is not configured", category="server_error")
+
+        streaming = on_text is not None
+        endpoint = provider.endpoint(request, streaming)
+        payload = provider.build_payload(request, streaming)
+        response: httpx.Response | None = None
+        try:
+            response = await self._send(endpoint, payload, streaming)
+            if response.status_code >= 400:
+                fallback = provider.fallback_payload(
+                    request, payload, response.status_code, response.text
+                )
+                if fallback is not None:
+                    await response.aclose()
+                    response = await self._send(endpoint, fallback, streaming)
+
+            raise_for_provider_status(
+                self.name,
+                response.status_code,
+                response.text if response.status_code >= 400 else "",
+            )
+            if on_text is None:
+                return provider.output_from_data(response.json())
+
+            collector = StreamCollector(self.name, on_text)
+            async for line in response.aiter_lines():
+                event = parse_sse_line(line, self.name)
+                if event is SSE_DONE:
+                    break
+                if event is not None:
+                    provider.collect_stream_event(event, collector)
+            return collector.output()
+        except httpx.TimeoutException as exc:
+            raise LLMError(f"Provider {self.name} timed out", category="timeout") from exc
+        except httpx.HTTPError as exc:
+            raise LLMError(
+                f"Provider {self.name} network error: {exc}", category="server_error"
+            ) from exc
+        finally:
+            if response is not None:
+                await response.aclose()
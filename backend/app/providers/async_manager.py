@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Tuple
+
+import httpx
+from pydantic import BaseModel
+
+from app import metrics
+
+from .async_clients import AsyncHttpProvider
+from .base import LLMError
+from .manager import LLMManager, ProviderSteps
+
+
+class AsyncLLMManager:
+    """
+    asyncio front end for `LLMManager`. Attempt, repair, telemetry and failover logic are the
+    manager's own step generators; only the provider calls are awaited instead of blocking.
+    Providers are tried in order (hedging applies to the threaded path only).
+    """
+
+    def __init__(self, manager: LLMManager, client: httpx.AsyncClient) -> None:
+        self.manager = manager
+        self.settings = manager.settings
+        self.providers: Dict[str, AsyncHttpProvider] = {
+            name: AsyncHttpProvider(provider, client)
+            for name, provider in manager.providers.items()
+        }
+
+    def any_provider_configured(self) -> bool:
+        return self.manager.any_provider_configured()
+
+    @staticmethod
+    async def _drive(provider: AsyncHttpProvider, steps: ProviderSteps) -> Any:
+        try:
+            request, on_text = next(steps)
+            while True:
+                try:
+                    with metrics.current().llm_in_flight(provider.name):
+                        output = await provider.generate_text(request, on_text=on_text)
+                except Exception as exc:
+                    request, on_text = steps.throw(exc)
+                else:
+                    request, on_text = steps.send(output)
+        except StopIteration as stop:
+            return stop.value
+
+    async def complete_json_model(
+        self,
+        task: str,
+        system_prompt: str,
+        user_prompt: str,
+        model_type: type[BaseModel],
+        on_progress: Callable[[str], None] | None = None,
+        on_stream_start: Callable[[], Callable[[str], None]] | None = None,
+    ) -> Tuple[BaseModel, str]:
+        errors: list[str] = []
+        notify = on_progress or (lambda _stage: None)
+
+        for provider_name in self.settings.llm_provider_order:
+            provider = self.providers[provider_name]
+            if not provider.is_configured():
+                errors.append(f"{provider_name}: not configured")
+                continue
+            result = await self._drive(
+                provider,
+                self.manager._json_attempt_steps(
+                    provider_name,
+                    task,
+                    system_prompt,
+                    user_prompt,
+                    model_type,
+                    notify,
+                    on_stream_start,
+                    errors,
+                    spend=[],
+                ),
+            )
+            if result is not None:
+                return result
+
+        raise LLMError(
+            "All providers failed for JSON completion. " + " | ".join(errors),
+            category="invalid_json",
+        )
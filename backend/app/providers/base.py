@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Protocol
+from typing import TYPE_CHECKING, Any, Callable, Mapping, Protocol
+
+if TYPE_CHECKING:
+    from .schema_registry import ProviderSchemas
 
 
 class LLMError(Exception):
@@ -16,8 +19,10 @@ class LLMCallInput:
     model: str
     system_prompt: str
     user_prompt: str
-    json_schema: dict[str, Any] | None = None
+    json_schema: Mapping[str, Any] | None = None
     max_output_tokens: int | None = None
+    # Precomputed provider variants of `json_schema`; providers convert on the fly without it.
+    schemas: ProviderSchemas | None = None
 
 
 @dataclass
@@ -33,5 +38,10 @@ class LLMProvider(Protocol):
     def is_configured(self) -> bool:
         ...
 
-    def generate_text(self, request: LLMCallInput) -> LLMCallOutput:
+    def generate_text(
+        self,
+        request: LLMCallInput,
+        on_text: Callable[[str], None] | None = None,
+    ) -> LLMCallOutput:
+        # When on_text is given the provider streams and forwards each text delta as it arrives.
         ...
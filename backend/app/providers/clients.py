@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import json
+from abc import ABC, abstractmethod
 from copy import deepcopy
-from dataclasses import dataclass
-from typing import Any, Dict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator
 
 import requests
 
+from app.http import HttpSessionPool
+
 from .base import LLMCallInput, LLMCallOutput, LLMError
 
 
@@ -56,6 +59,89 @@ def _extract_cost_usd(data: dict[str, Any]) -> float | None:
     return None
 
 
+SSE_DONE = object()
+
+
+def parse_sse_line(line: str, provider_name: str) -> Any:
+    """Return the JSON event on an SSE `data:` line, SSE_DONE at the end marker, else None."""
+    if not line or not line.startswith("data:"):
+        return None
+    data = line[len("data:") :].strip()
+    if data == "[DONE]":
+        return SSE_DONE
+    try:
+        event = json.loads(data)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(event, dict):
+        return None
+    if event.get("error"):
+        raise LLMError(
+            f"Provider {provider_name} stream error: {str(event['error'])[:200]}",
+            category="server_error",
+        )
+    return event
+
+
+def _iter_sse_data(response: requests.Response, provider_name: str) -> Iterator[dict[str, Any]]:
+    # SSE bodies are UTF-8 by spec; text/event-stream without a charset would decode as latin-1.
+    response.encoding = "utf-8"
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            event = parse_sse_line(line, provider_name)
+            if event is SSE_DONE:
+                return
+            if event is not None:
+                yield event
+    except requests.Timeout as exc:
+        raise LLMError(f"Provider {provider_name} timed out", category="timeout") from exc
+    except requests.RequestException as exc:
+        raise LLMError(
+            f"Provider {provider_name} stream interrupted: {exc}", category="server_error"
+        ) from exc
+    finally:
+        response.close()
+
+
+class StreamCollector:
+    """Accumulates streamed text deltas and the last usage/cost report of one completion."""
+
+    def __init__(self, provider_name: str, on_text: Callable[[str], None]) -> None:
+        self.provider_name = provider_name
+        self.on_text = on_text
+        self.parts: list[str] = []
+        self.usage: dict[str, Any] | None = None
+        self.cost_usd: float | None = None
+
+    def add_text(self, text: str) -> None:
+        self.parts.append(text)
+        self.on_text(text)
+
+    def add_usage(self, event: dict[str, Any], usage: dict[str, Any]) -> None:
+        self.usage = usage
+        self.cost_usd = _extract_cost_usd(event)
+
+    def output(self) -> LLMCallOutput:
+        content = "".join(self.parts).strip()
+        if not content:
+            raise LLMError(
+                f"Provider {self.provider_name} returned empty content", category="server_error"
+            )
+        return LLMCallOutput(text=content, cost_usd=self.cost_usd, usage=self.usage)
+
+
+def raise_for_provider_status(provider_name: str, status_code: int, text: str) -> None:
+    if status_code == 429:
+        raise LLMError(f"Provider {provider_name} rate limited", category="rate_limit")
+    if status_code >= 500:
+        raise LLMError(f"Provider {provider_name} server error", category="server_error")
+    if status_code >= 400:
+        raise LLMError(
+            f"Provider {provider_name} request error: {text[:200]}",
+            category="server_error",
+        )
+
+
 def _looks_like_gemini_schema_error(response_text: str) -> bool:
     lowered = response_text.lower()
     has_schema_path = (
@@ -81,6 +167,30 @@ def _looks_like_openai_response_schema_error(response_text: str) -> bool:
     )
 
 
+class RawJSON:
+    """Already-serialized JSON placed in a payload; `dumps_payload` splices it in verbatim."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+def dumps_payload(payload: dict[str, Any]) -> bytes:
+    fragments: list[str] = []
+
+    def placeholder(value: Any) -> str:
+        if not isinstance(value, RawJSON):
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+        fragments.append(value.text)
+        return f"\x00raw{len(fragments) - 1}\x00"
+
+    body = json.dumps(payload, default=placeholder)
+    for index, fragment in enumerate(fragments):
+        body = body.replace(f'"\\u0000raw{index}\\u0000"', fragment, 1)
+    return body.encode("utf-8")
+
+
 def _to_openai_strict_schema(schema: dict[str, Any]) -> dict[str, Any]:
     root = deepcopy(schema)
 
@@ -207,21 +317,116 @@ def _to_gemini_schema(schema: dict[str, Any]) -> dict[str, Any]:
 
 
 @dataclass
-class OpenAICompatibleProvider:
+class HttpLLMProvider(ABC):
+    """
+    Request/response handling shared by the HTTP providers. Subclasses describe the wire
+    format through the abstract hooks; `generate_text` here and the async client in
+    `async_clients` supply transport.
+    """
+
     name: str
     api_key: str
     base_url: str
     timeout_ms: int
-    supports_json_schema_response: bool = False
+    http: HttpSessionPool = field(default_factory=HttpSessionPool)
 
     def is_configured(self) -> bool:
         return bool(self.api_key)
 
-    def generate_text(self, request: LLMCallInput) -> LLMCallOutput:
+    @abstractmethod
+    def endpoint(self, request: LLMCallInput, streaming: bool) -> str:
+        ...
+
+    @abstractmethod
+    def headers(self) -> dict[str, str]:
+        ...
+
+    @abstractmethod
+    def build_payload(self, request: LLMCallInput, streaming: bool) -> dict[str, Any]:
+        ...
+
+    def fallback_payload(
+        self,
+        request: LLMCallInput,
+        payload: dict[str, Any],
+        status_code: int,
+        text: str,
+    ) -> dict[str, Any] | None:
+        return None
+
+    @abstractmethod
+    def output_from_data(self, data: dict[str, Any]) -> LLMCallOutput:
+        ...
+
+    @abstractmethod
+    def collect_stream_event(self, event: dict[str, Any], collector: StreamCollector) -> None:
+        ...
+
+    def post_body(self, payload: dict[str, Any]) -> dict[str, Any]:
+        return {"data": dumps_payload(payload)}
+
+    def generate_text(
+        self,
+        request: LLMCallInput,
+        on_text: Callable[[str], None] | None = None,
+    ) -> LLMCallOutput:
         if not self.is_configured():
             raise LLMError(f"Provider {self.name} is not configured", category="server_error")
 
-        endpoint = f"{self.base_url.rstrip('/')}/chat/completions"
+        streaming = on_text is not None
+        endpoint = self.endpoint(request, streaming)
+        payload = self.build_payload(request, streaming)
+
+        def post_payload(active_payload: dict[str, Any]) -> requests.Response:
+            try:
+                return self.http.session_for(endpoint).post(
+                    endpoint,
+                    headers=self.headers(),
+                    timeout=self.timeout_ms / 1000,
+                    stream=streaming,
+                    **self.post_body(active_payload),
+                )
+            except requests.Timeout as exc:
+                raise LLMError(f"Provider {self.name} timed out", category="timeout") from exc
+            except requests.RequestException as exc:
+                raise LLMError(
+                    f"Provider {self.name} network error: {exc}", category="server_error"
+                ) from exc
+
+        response = post_payload(payload)
+        if response.status_code >= 400:
+            fallback = self.fallback_payload(request, payload, response.status_code, response.text)
+            if fallback is not None:
+                response = post_payload(fallback)
+
+        # Reading `.text` drains the body, so only error responses are read before streaming.
+        raise_for_provider_status(
+            self.name,
+            response.status_code,
+            response.text if response.status_code >= 400 else "",
+        )
+        if on_text is not None:
+            collector = StreamCollector(self.name, on_text)
+            for event in _iter_sse_data(response, self.name):
+                self.collect_stream_event(event, collector)
+            return collector.output()
+        return self.output_from_data(response.json())
+
+
+@dataclass
+class OpenAICompatibleProvider(HttpLLMProvider):
+    supports_json_schema_response: bool = False
+
+    def endpoint(self, request: LLMCallInput, streaming: bool) -> str:
+        return f"{self.base_url.rstrip('/')}/chat/completions"
+
+    def headers(self) -> dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+    def build_payload(self, request: LLMCallInput, streaming: bool) -> dict[str, Any]:
         payload: Dict[str, Any] = {
             "model": request.model,
             "messages": [
@@ -230,7 +435,11 @@ class OpenAICompatibleProvider:
             ],
         }
         if request.json_schema and self.supports_json_schema_response:
-            strict_schema = _to_openai_strict_schema(request.json_schema)
+            strict_schema: Any = (
+                RawJSON(request.schemas.openai_strict_json)
+                if request.schemas
+                else _to_openai_strict_schema(request.json_schema)
+            )
             payload["response_format"] = {
                 "type": "json_schema",
                 "json_schema": {
@@ -241,50 +450,35 @@ class OpenAICompatibleProvider:
             }
         if request.max_output_tokens and self.name == "perplexity":
             payload["max_tokens"] = request.max_output_tokens
-
-        def post_payload(active_payload: dict[str, Any]) -> requests.Response:
-            try:
-                return requests.post(
-                    endpoint,
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json=active_payload,
-                    timeout=self.timeout_ms / 1000,
-                )
-            except requests.Timeout as exc:
-                raise LLMError(f"Provider {self.name} timed out", category="timeout") from exc
-            except requests.RequestException as exc:
-                raise LLMError(
-                    f"Provider {self.name} network error: {exc}", category="server_error"
-                ) from exc
-
-        response = post_payload(payload)
+        if streaming:
+            payload["stream"] = True
+            if self.name == "openai":
+                # Usage (and therefore cost) only arrives in a final chunk when requested.
+                payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    def fallback_payload(
+        self,
+        request: LLMCallInput,
+        payload: dict[str, Any],
+        status_code: int,
+        text: str,
+    ) -> dict[str, Any] | None:
         if (
             self.name == "openai"
             and request.json_schema
             and self.supports_json_schema_response
-            and response.status_code == 400
-            and _looks_like_openai_response_schema_error(response.text)
+            and status_code == 400
+            and _looks_like_openai_response_schema_error(text)
         ):
             # OpenAI can reject strict response schema for complex payloads.
             # Retry once without response_format and rely on prompt+validation+repair.
             payload_without_schema = dict(payload)
             payload_without_schema.pop("response_format", None)
-            response = post_payload(payload_without_schema)
-
-        if response.status_code == 429:
-            raise LLMError(f"Provider {self.name} rate limited", category="rate_limit")
-        if response.status_code >= 500:
-            raise LLMError(f"Provider {self.name} server error", category="server_error")
-        if response.status_code >= 400:
-            raise LLMError(
-                f"Provider {self.name} request error: {response.text[:200]}",
-                category="server_error",
-            )
+            return payload_without_schema
+        return None
 
-        data = response.json()
+    def output_from_data(self, data: dict[str, Any]) -> LLMCallOutput:
         choices = data.get("choices", [])
         if not choices:
             raise LLMError(f"Provider {self.name} returned no choices", category="server_error")
@@ -300,79 +494,60 @@ class OpenAICompatibleProvider:
             usage=data.get("usage") if isinstance(data.get("usage"), dict) else None,
         )
 
+    def collect_stream_event(self, event: dict[str, Any], collector: StreamCollector) -> None:
+        if isinstance(event.get("usage"), dict):
+            collector.add_usage(event, event["usage"])
+        for choice in event.get("choices") or []:
+            delta = (choice.get("delta") or {}).get("content")
+            if isinstance(delta, str) and delta:
+                collector.add_text(delta)
 
-@dataclass
-class GeminiProvider:
-    name: str
-    api_key: str
-    base_url: str
-    timeout_ms: int
-
-    def is_configured(self) -> bool:
-        return bool(self.api_key)
-
-    def generate_text(self, request: LLMCallInput) -> LLMCallOutput:
-        if not self.is_configured():
-            raise LLMError(f"Provider {self.name} is not configured", category="server_error")
 
-        model = request.model
-        endpoint = f"{self.base_url.rstrip('/')}/models/{model}:generateContent"
+@dataclass
+class GeminiProvider(HttpLLMProvider):
+    def endpoint(self, request: LLMCallInput, streaming: bool) -> str:
+        method = "streamGenerateContent?alt=sse" if streaming else "generateContent"
+        return f"{self.base_url.rstrip('/')}/models/{request.model}:{method}"
+
+    def headers(self) -> dict[str, str]:
+        return {
+            "x-goog-api-key": self.api_key,
+            "Content-Type": "application/json",
+        }
 
+    def build_payload(self, request: LLMCallInput, streaming: bool) -> dict[str, Any]:
         payload: dict[str, Any] = {
             "systemInstruction": {"parts": [{"text": request.system_prompt}]},
             "contents": [{"parts": [{"text": request.user_prompt}]}],
             "generationConfig": {"temperature": 0.2},
         }
-        schema_requested = False
         if request.json_schema:
-            schema_requested = True
             payload["generationConfig"]["responseMimeType"] = "application/json"
-            payload["generationConfig"]["responseSchema"] = _to_gemini_schema(request.json_schema)
-
-        def post_payload(active_payload: dict[str, Any]) -> requests.Response:
-            try:
-                return requests.post(
-                    endpoint,
-                    headers={
-                        "x-goog-api-key": self.api_key,
-                        "Content-Type": "application/json",
-                    },
-                    data=json.dumps(active_payload),
-                    timeout=self.timeout_ms / 1000,
-                )
-            except requests.Timeout as exc:
-                raise LLMError(f"Provider {self.name} timed out", category="timeout") from exc
-            except requests.RequestException as exc:
-                raise LLMError(
-                    f"Provider {self.name} network error: {exc}", category="server_error"
-                ) from exc
-
-        response = post_payload(payload)
-
+            payload["generationConfig"]["responseSchema"] = (
+                RawJSON(request.schemas.gemini_json)
+                if request.schemas
+                else _to_gemini_schema(request.json_schema)
+            )
+        return payload
+
+    def fallback_payload(
+        self,
+        request: LLMCallInput,
+        payload: dict[str, Any],
+        status_code: int,
+        text: str,
+    ) -> dict[str, Any] | None:
         # Gemini may reject responseSchema for some JSON-Schema constructs even after conversion.
         # Retry once without responseSchema so provider fallback can still succeed with JSON-only prompting.
-        if (
-            schema_requested
-            and response.status_code == 400
-            and _looks_like_gemini_schema_error(response.text)
-        ):
+        if request.json_schema and status_code == 400 and _looks_like_gemini_schema_error(text):
             generation_config = dict(payload.get("generationConfig", {}))
             generation_config.pop("responseSchema", None)
             payload_without_schema = dict(payload)
             payload_without_schema["generationConfig"] = generation_config
-            response = post_payload(payload_without_schema)
-
-        if response.status_code == 429:
-            raise LLMError(f"Provider {self.name} rate limited", category="rate_limit")
-        if response.status_code >= 500:
-            raise LLMError(f"Provider {self.name} server error", category="server_error")
-        if response.status_code >= 400:
-            raise LLMError(
-                f"Provider {self.name} request error: {response.text[:200]}",
-                category="server_error",
-            )
+            return payload_without_schema
+        return None
 
-        data = response.json()
+    def output_from_data(self, data: dict[str, Any]) -> LLMCallOutput:
         candidates = data.get("candidates", [])
         if not candidates:
             raise LLMError(f"Provider {self.name} returned no candidates", category="server_error")
@@ -387,3 +562,12 @@ class GeminiProvider:
         usage_metadata = data.get("usageMetadata")
         usage = usage_metadata if isinstance(usage_metadata, dict) else None
         return LLMCallOutput(text=content, cost_usd=_extract_cost_usd(data), usage=usage)
+
+    def collect_stream_event(self, event: dict[str, Any], collector: StreamCollector) -> None:
+        if isinstance(event.get("usageMetadata"), dict):
+            collector.add_usage(event, event["usageMetadata"])
+        for candidate in (event.get("candidates") or [])[:1]:
+            for part in candidate.get("content", {}).get("parts", []):
+                text = part.get("text")
+                if text:
+                    collector.add_text(text)
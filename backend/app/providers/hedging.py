@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, Tuple
+
+
+class LatencyWindow:
+    """Recent successful call durations per (provider, task), used to pick hedge delays."""
+
+    def __init__(self, max_samples: int = 200) -> None:
+        self.max_samples = max(1, max_samples)
+        self._lock = threading.Lock()
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+
+    def observe(self, provider: str, task: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get((provider, task))
+            if samples is None:
+                samples = deque(maxlen=self.max_samples)
+                self._samples[(provider, task)] = samples
+            samples.append(seconds)
+
+    def percentile(self, provider: str, task: str, quantile: float, min_samples: int) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples.get((provider, task), ()))
+        if not samples or len(samples) < max(1, min_samples):
+            return None
+        rank = min(len(samples) - 1, max(0, int(round(quantile * (len(samples) - 1)))))
+        return samples[rank]
+
+
+class HedgeBudget:
+    """
+    Per-worker, per-UTC-day cap on spend by hedged calls that did not produce the result.
+    Providers that do not report cost are bounded by LLM_HEDGE_MAX_PARALLEL only.
+    """
+
+    def __init__(self, daily_usd: float) -> None:
+        self.daily_usd = max(0.0, daily_usd)
+        self._lock = threading.Lock()
+        self._day = ""
+        self._wasted_usd = 0.0
+        self._counts = {"hedges_launched": 0, "hedges_won": 0}
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def _roll(self) -> None:
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._wasted_usd = 0.0
+
+    def allows_hedge(self) -> bool:
+        if not self.daily_usd:
+            return True
+        with self._lock:
+            self._roll()
+            return self._wasted_usd < self.daily_usd
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def add_waste(self, cost_usd: float) -> None:
+        if cost_usd <= 0:
+            return
+        with self._lock:
+            self._roll()
+            self._wasted_usd += cost_usd
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._roll()
+            return {
+                **self._counts,
+                "wasted_usd_today": round(self._wasted_usd, 6),
+                "daily_budget_usd": self.daily_usd,
+            }
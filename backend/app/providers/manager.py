@@ -1,21 +1,32 @@
 from __future__ import annotations
 
+import contextvars
 import json
 import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from time import perf_counter
-from typing import Any, Callable, Dict, Tuple, TypeVar
+from typing import Any, Callable, Dict, Generator, Tuple, TypeVar
 
 from pydantic import BaseModel, ValidationError
 
+from app import metrics
 from app.config import Settings
+from app.http import HttpSessionPool
 from app.telemetry import LLMTelemetryStore
+from app.timing import span
 
 from .base import LLMCallInput, LLMError
 from .clients import GeminiProvider, OpenAICompatibleProvider
+from .hedging import HedgeBudget, LatencyWindow
+from .schema_registry import schema_registry
 
 T = TypeVar("T")
 
+# Generators that yield (call input, stream callback) and are sent each provider output.
+ProviderSteps = Generator[Tuple[LLMCallInput, Callable[[str], None] | None], Any, Any]
+
 
 @dataclass
 class LLMExecutionResult:
@@ -24,12 +35,23 @@ class LLMExecutionResult:
 
 
 class LLMManager:
-    def __init__(self, settings: Settings) -> None:
+    def __init__(self, settings: Settings, http: HttpSessionPool | None = None) -> None:
         self.settings = settings
+        # Shared per-worker pool: back-to-back calls to one host (e.g. repair) reuse connections.
+        self.http = http or HttpSessionPool.from_settings(settings)
         self.telemetry = LLMTelemetryStore(
             enabled=settings.llm_telemetry_enabled,
             base_dir=settings.llm_telemetry_dir,
+            flush_interval_seconds=settings.llm_telemetry_flush_interval_seconds,
+            flush_max_events=settings.llm_telemetry_flush_max_events,
+            sharded=settings.llm_telemetry_sharded,
+            rollup_days=settings.llm_telemetry_rollup_days,
+            segment_max_bytes=settings.llm_telemetry_segment_max_mb * 1024 * 1024,
+            segment_max_age_seconds=settings.llm_telemetry_segment_max_hours * 3600,
+            segment_retention_days=settings.llm_telemetry_segment_retention_days,
         )
+        self.latency = LatencyWindow()
+        self.hedging = HedgeBudget(daily_usd=settings.llm_hedge_daily_budget_usd)
         timeout_ms = settings.llm_timeout_ms
         self.providers: Dict[str, Any] = {
             "openai": OpenAICompatibleProvider(
@@ -38,6 +60,7 @@ class LLMManager:
                 base_url=settings.openai_base_url,
                 timeout_ms=timeout_ms,
                 supports_json_schema_response=True,
+                http=self.http,
             ),
             "perplexity": OpenAICompatibleProvider(
                 name="perplexity",
@@ -45,12 +68,14 @@ class LLMManager:
                 base_url=settings.perplexity_base_url,
                 timeout_ms=timeout_ms,
                 supports_json_schema_response=False,
+                http=self.http,
             ),
             "gemini": GeminiProvider(
                 name="gemini",
                 api_key=settings.gemini_api_key,
                 base_url=settings.gemini_base_url,
                 timeout_ms=timeout_ms,
+                http=self.http,
             ),
         }
 
@@ -58,6 +83,14 @@ class LLMManager:
         failover_categories = set(self.settings.llm_failover_on)
         return "all" in failover_categories or category in failover_categories
 
+    def _hand_over(self, provider_name: str, category: str) -> None:
+        # Called once a provider's attempts are exhausted; only counts as a failover when a
+        # later configured provider actually takes the request.
+        order = self.settings.llm_provider_order
+        later = order[order.index(provider_name) + 1 :]
+        if any(self.providers[name].is_configured() for name in later):
+            metrics.current().llm_failover(provider_name, category)
+
     def any_provider_configured(self) -> bool:
         for provider_name in self.settings.llm_provider_order:
             provider = self.providers.get(provider_name)
@@ -101,16 +134,53 @@ class LLMManager:
             return 8000
         return None
 
+    @staticmethod
+    def _drive(provider: Any, steps: ProviderSteps) -> Any:
+        """Run a step generator by sending each requested call to the blocking provider."""
+        try:
+            request, on_text = next(steps)
+            while True:
+                try:
+                    with span("llm_repair" if request.task.endswith("_repair") else "llm"):
+                        with metrics.current().llm_in_flight(provider.name):
+                            output = provider.generate_text(request, on_text=on_text)
+                except Exception as exc:
+                    request, on_text = steps.throw(exc)
+                else:
+                    request, on_text = steps.send(output)
+        except StopIteration as stop:
+            return stop.value
+
     def _repair_json(
         self,
         provider_name: str,
         task: str,
         model: str,
         broken_payload: str,
-        json_schema: dict[str, Any] | None = None,
+        schema_json: str | None = None,
         validation_error: str | None = None,
     ) -> str:
-        provider = self.providers[provider_name]
+        return self._drive(
+            self.providers[provider_name],
+            self._repair_steps(
+                provider_name,
+                task,
+                model,
+                broken_payload,
+                schema_json=schema_json,
+                validation_error=validation_error,
+            ),
+        )
+
+    def _repair_steps(
+        self,
+        provider_name: str,
+        task: str,
+        model: str,
+        broken_payload: str,
+        schema_json: str | None = None,
+        validation_error: str | None = None,
+    ) -> ProviderSteps:
         repair_system = (
             "You are a deterministic JSON repair engine. "
             "Return exactly one valid JSON object. "
@@ -127,24 +197,26 @@ class LLMManager:
                 "Validation error details:\n"
                 f"{validation_error[:4000]}"
             )
-        if json_schema:
+        if schema_json:
             repair_sections.append(
                 "Target JSON schema:\n"
-                f"{json.dumps(json_schema)[:12000]}"
+                f"{schema_json[:12000]}"
             )
         repair_sections.append("Broken payload:\n" + broken_payload[:24000])
         repair_user = "\n\n".join(repair_sections)
+        metrics.current().llm_repair(provider_name, task)
         started_at = perf_counter()
         attempt = 1
         try:
-            repaired = provider.generate_text(
+            repaired = yield (
                 LLMCallInput(
                     task=f"{task}_repair",
                     model=model,
                     system_prompt=repair_system,
                     user_prompt=repair_user,
                     max_output_tokens=self._max_output_tokens(provider_name, f"{task}_repair"),
-                )
+                ),
+                None,
             )
             self.telemetry.measure_and_record(
                 operation="repair_json",
@@ -196,18 +268,20 @@ class LLMManager:
 
             model = self.settings.get_task_model(provider_name, task)
             attempts = max(0, self.settings.llm_max_retries_per_provider)
+            category = "server_error"
             for attempt_index in range(attempts + 1):
                 attempt_number = attempt_index + 1
                 started_at = perf_counter()
                 try:
-                    output = provider.generate_text(
-                        LLMCallInput(
-                            task=task,
-                            model=model,
-                            system_prompt=system_prompt,
-                            user_prompt=user_prompt,
+                    with span("llm"):
+                        output = provider.generate_text(
+                            LLMCallInput(
+                                task=task,
+                                model=model,
+                                system_prompt=system_prompt,
+                                user_prompt=user_prompt,
+                            )
                         )
-                    )
                     self.telemetry.measure_and_record(
                         operation="complete_text",
                         task=task,
@@ -233,7 +307,8 @@ class LLMManager:
                         error_message=str(exc),
                     )
                     errors.append(f"{provider_name}: {exc}")
-                    if not self._should_failover(exc.category):
+                    category = exc.category
+                    if not self._should_failover(category):
                         raise
                 except Exception as exc:
                     self.telemetry.measure_and_record(
@@ -248,11 +323,13 @@ class LLMManager:
                         error_message=str(exc),
                     )
                     errors.append(f"{provider_name}: unexpected error {exc}")
-                    if not self._should_failover("server_error"):
+                    category = "server_error"
+                    if not self._should_failover(category):
                         raise LLMError(
                             f"Unexpected provider error: {exc}",
                             category="server_error",
                         ) from exc
+            self._hand_over(provider_name, category)
 
         raise LLMError(
             "All providers failed for text completion. " + " | ".join(errors),
@@ -265,101 +342,246 @@ class LLMManager:
         system_prompt: str,
         user_prompt: str,
         model_type: type[BaseModel],
+        on_progress: Callable[[str], None] | None = None,
+        on_stream_start: Callable[[], Callable[[str], None]] | None = None,
     ) -> Tuple[BaseModel, str]:
+        """
+        `on_stream_start`, when given, switches generation to streaming: it is called at the
+        start of every attempt and returns the callback that receives that attempt's text deltas.
+        """
         errors: list[str] = []
+        notify = on_progress or (lambda _stage: None)
 
+        configured: list[str] = []
         for provider_name in self.settings.llm_provider_order:
-            provider = self.providers[provider_name]
-            if not provider.is_configured():
+            if self.providers[provider_name].is_configured():
+                configured.append(provider_name)
+            else:
                 errors.append(f"{provider_name}: not configured")
-                continue
 
-            model = self.settings.get_task_model(provider_name, task)
-            json_schema = model_type.model_json_schema()
-            attempts = max(0, self.settings.llm_max_retries_per_provider)
-            extra_invalid_json_retries = self._extra_invalid_json_retry_limit(provider_name, task)
-            total_attempts = attempts + 1 + extra_invalid_json_retries
-            for attempt_index in range(total_attempts):
-                attempt_number = attempt_index + 1
-                started_at = perf_counter()
-                prompt_for_attempt = user_prompt
-                if attempt_index >= (attempts + 1):
-                    prompt_for_attempt = self._prompt_with_truncation_guard(user_prompt)
-                try:
-                    raw = provider.generate_text(
-                        LLMCallInput(
-                            task=task,
-                            model=model,
-                            system_prompt=system_prompt,
-                            user_prompt=prompt_for_attempt,
-                            json_schema=json_schema,
-                            max_output_tokens=self._max_output_tokens(provider_name, task),
-                        )
+        if self.settings.llm_hedge_enabled and len(configured) > 1:
+            result = self._complete_json_hedged(
+                configured,
+                task,
+                system_prompt,
+                user_prompt,
+                model_type,
+                notify,
+                on_stream_start,
+                errors,
+            )
+            if result is not None:
+                return result
+        else:
+            for provider_name in configured:
+                result = self._complete_json_with_provider(
+                    provider_name,
+                    task,
+                    system_prompt,
+                    user_prompt,
+                    model_type,
+                    notify,
+                    on_stream_start,
+                    errors,
+                    spend=[],
+                )
+                if result is not None:
+                    return result
+
+        raise LLMError(
+            "All providers failed for JSON completion. " + " | ".join(errors),
+            category="invalid_json",
+        )
+
+    def _hedge_delay_seconds(self, provider_name: str, task: str) -> float:
+        delay = self.settings.llm_hedge_delay_ms / 1000
+        quantile = self.settings.llm_hedge_percentile
+        if quantile > 0:
+            observed = self.latency.percentile(
+                provider_name,
+                task,
+                quantile,
+                min_samples=self.settings.llm_hedge_min_samples,
+            )
+            if observed is not None:
+                delay = min(delay, observed)
+        return max(0.0, delay)
+
+    def _complete_json_hedged(
+        self,
+        providers: list[str],
+        task: str,
+        system_prompt: str,
+        user_prompt: str,
+        model_type: type[BaseModel],
+        notify: Callable[[str], None],
+        on_stream_start: Callable[[], Callable[[str], None]] | None,
+        errors: list[str],
+    ) -> Tuple[BaseModel, str] | None:
+        """
+        Starts providers in order; when the newest one has not finished within its hedge delay,
+        the next provider runs in parallel. The first valid result wins and the rest are
+        ignored. A provider that fails outright hands over immediately, as in sequential mode.
+        """
+        max_parallel = max(2, self.settings.llm_hedge_max_parallel)
+        finished = threading.Event()
+
+        def guarded_notify(stage: str) -> None:
+            if not finished.is_set():
+                notify(stage)
+
+        guarded_stream_start = None
+        if on_stream_start is not None:
+
+            def guarded_stream_start() -> Callable[[str], None]:
+                sink = on_stream_start()
+                return lambda chunk: None if finished.is_set() else sink(chunk)
+
+        executor = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="llm-hedge")
+        queue = list(providers)
+        pending: dict[Future, tuple[str, list[float]]] = {}
+        last_launch = (perf_counter(), queue[0])
+
+        def launch(hedge: bool) -> None:
+            nonlocal last_launch
+            provider_name = queue.pop(0)
+            spend: list[float] = []
+            # Copy the request context so spans from hedge threads land in Server-Timing.
+            future = executor.submit(
+                contextvars.copy_context().run,
+                self._complete_json_with_provider,
+                provider_name,
+                task,
+                system_prompt,
+                user_prompt,
+                model_type,
+                guarded_notify,
+                guarded_stream_start,
+                errors,
+                spend,
+            )
+            pending[future] = (provider_name, spend)
+            last_launch = (perf_counter(), provider_name)
+            if hedge:
+                self.hedging.count("hedges_launched")
+
+        def settle_losers() -> None:
+            # Losing calls cannot be aborted mid-request; their spend is charged when they end.
+            for future, (_provider_name, spend) in pending.items():
+                future.add_done_callback(
+                    lambda _future, spend=spend: self.hedging.add_waste(sum(spend))
+                )
+
+        try:
+            launch(hedge=False)
+            while pending:
+                timeout = None
+                if queue and len(pending) < max_parallel and self.hedging.allows_hedge():
+                    started_at, provider_name = last_launch
+                    timeout = max(
+                        0.0,
+                        started_at + self._hedge_delay_seconds(provider_name, task) - perf_counter(),
                     )
-                    raw_text = raw.text
+                done, _not_done = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    launch(hedge=True)
+                    continue
+                for future in done:
+                    provider_name, spend = pending.pop(future)
+                    result = future.result()
+                    if result is not None:
+                        finished.set()
+                        if provider_name != providers[0]:
+                            self.hedging.count("hedges_won")
+                        settle_losers()
+                        return result
+                if not pending and queue:
+                    launch(hedge=False)
+            return None
+        except BaseException:
+            finished.set()
+            settle_losers()
+            raise
+        finally:
+            executor.shutdown(wait=False)
 
-                    try:
-                        extracted = self._extract_json_text(raw_text)
-                        parsed = model_type.model_validate_json(extracted)
-                        self.telemetry.measure_and_record(
-                            operation="complete_json_model",
-                            task=task,
-                            provider=provider_name,
-                            model=model,
-                            attempt=attempt_number,
-                            started_at=started_at,
-                            outcome="success",
-                            category="success",
-                            cost_usd=raw.cost_usd,
-                        )
-                        return parsed, provider_name
-                    except ValidationError as validation_exc:
-                        repaired = self._repair_json(
-                            provider_name,
-                            task,
-                            model,
-                            raw_text,
-                            json_schema=json_schema,
-                            validation_error=str(validation_exc),
-                        )
-                        extracted = self._extract_json_text(repaired)
-                        parsed = model_type.model_validate_json(extracted)
-                        self.telemetry.measure_and_record(
-                            operation="complete_json_model",
-                            task=task,
-                            provider=provider_name,
-                            model=model,
-                            attempt=attempt_number,
-                            started_at=started_at,
-                            outcome="success",
-                            category="success",
-                            cost_usd=raw.cost_usd,
-                        )
-                        return parsed, provider_name
-                    except (json.JSONDecodeError, LLMError) as parse_exc:
-                        repaired = self._repair_json(
-                            provider_name,
-                            task,
-                            model,
-                            raw_text,
-                            json_schema=json_schema,
-                            validation_error=str(parse_exc),
-                        )
-                        extracted = self._extract_json_text(repaired)
+    def _complete_json_with_provider(
+        self,
+        provider_name: str,
+        task: str,
+        system_prompt: str,
+        user_prompt: str,
+        model_type: type[BaseModel],
+        notify: Callable[[str], None],
+        on_stream_start: Callable[[], Callable[[str], None]] | None,
+        errors: list[str],
+        spend: list[float],
+    ) -> Tuple[BaseModel, str] | None:
+        return self._drive(
+            self.providers[provider_name],
+            self._json_attempt_steps(
+                provider_name,
+                task,
+                system_prompt,
+                user_prompt,
+                model_type,
+                notify,
+                on_stream_start,
+                errors,
+                spend,
+            ),
+        )
+
+    def _json_attempt_steps(
+        self,
+        provider_name: str,
+        task: str,
+        system_prompt: str,
+        user_prompt: str,
+        model_type: type[BaseModel],
+        notify: Callable[[str], None],
+        on_stream_start: Callable[[], Callable[[str], None]] | None,
+        errors: list[str],
+        spend: list[float],
+    ) -> ProviderSteps:
+        """
+        All attempts (and repairs) against one provider, written as a generator that yields
+        each provider call and receives its output, so blocking and asyncio drivers share it.
+        Returns the parsed result, or None once this provider's attempts are exhausted.
+        """
+        model = self.settings.get_task_model(provider_name, task)
+        schemas = schema_registry.get(model_type)
+        attempts = max(0, self.settings.llm_max_retries_per_provider)
+        extra_invalid_json_retries = self._extra_invalid_json_retry_limit(provider_name, task)
+        total_attempts = attempts + 1 + extra_invalid_json_retries
+        category = "server_error"
+        for attempt_index in range(total_attempts):
+            attempt_number = attempt_index + 1
+            started_at = perf_counter()
+            prompt_for_attempt = user_prompt
+            if attempt_index >= (attempts + 1):
+                prompt_for_attempt = self._prompt_with_truncation_guard(user_prompt)
+            try:
+                raw = yield (
+                    LLMCallInput(
+                        task=task,
+                        model=model,
+                        system_prompt=system_prompt,
+                        user_prompt=prompt_for_attempt,
+                        json_schema=schemas.pydantic,
+                        max_output_tokens=self._max_output_tokens(provider_name, task),
+                        schemas=schemas,
+                    ),
+                    on_stream_start() if on_stream_start else None,
+                )
+                raw_text = raw.text
+                if raw.cost_usd is not None:
+                    spend.append(raw.cost_usd)
+
+                try:
+                    extracted = self._extract_json_text(raw_text)
+                    with span("validate"):
                         parsed = model_type.model_validate_json(extracted)
-                        self.telemetry.measure_and_record(
-                            operation="complete_json_model",
-                            task=task,
-                            provider=provider_name,
-                            model=model,
-                            attempt=attempt_number,
-                            started_at=started_at,
-                            outcome="success",
-                            category="success",
-                            cost_usd=raw.cost_usd,
-                        )
-                        return parsed, provider_name
-                except LLMError as exc:
                     self.telemetry.measure_and_record(
                         operation="complete_json_model",
                         task=task,
@@ -367,19 +589,26 @@ class LLMManager:
                         model=model,
                         attempt=attempt_number,
                         started_at=started_at,
-                        outcome="error",
-                        category=exc.category,
-                        error_message=str(exc),
+                        outcome="success",
+                        category="success",
+                        cost_usd=raw.cost_usd,
                     )
-                    is_retryable_invalid_json = (
-                        exc.category == "invalid_json" and attempt_index < (total_attempts - 1)
+                    self.latency.observe(provider_name, task, perf_counter() - started_at)
+                    notify("validated")
+                    return parsed, provider_name
+                except ValidationError as validation_exc:
+                    notify("repairing")
+                    repaired = yield from self._repair_steps(
+                        provider_name,
+                        task,
+                        model,
+                        raw_text,
+                        schema_json=schemas.pydantic_json,
+                        validation_error=str(validation_exc),
                     )
-                    if is_retryable_invalid_json:
-                        continue
-                    errors.append(f"{provider_name}: {exc}")
-                    if not self._should_failover(exc.category):
-                        raise
-                except ValidationError as exc:
+                    extracted = self._extract_json_text(repaired)
+                    with span("validate"):
+                        parsed = model_type.model_validate_json(extracted)
                     self.telemetry.measure_and_record(
                         operation="complete_json_model",
                         task=task,
@@ -387,16 +616,26 @@ class LLMManager:
                         model=model,
                         attempt=attempt_number,
                         started_at=started_at,
-                        outcome="error",
-                        category="invalid_json",
-                        error_message=str(exc),
+                        outcome="success",
+                        category="success",
+                        cost_usd=raw.cost_usd,
                     )
-                    if attempt_index < (total_attempts - 1):
-                        continue
-                    errors.append(f"{provider_name}: invalid_json {exc}")
-                    if not self._should_failover("invalid_json"):
-                        raise LLMError(str(exc), category="invalid_json") from exc
-                except Exception as exc:
+                    self.latency.observe(provider_name, task, perf_counter() - started_at)
+                    notify("validated")
+                    return parsed, provider_name
+                except (json.JSONDecodeError, LLMError) as parse_exc:
+                    notify("repairing")
+                    repaired = yield from self._repair_steps(
+                        provider_name,
+                        task,
+                        model,
+                        raw_text,
+                        schema_json=schemas.pydantic_json,
+                        validation_error=str(parse_exc),
+                    )
+                    extracted = self._extract_json_text(repaired)
+                    with span("validate"):
+                        parsed = model_type.model_validate_json(extracted)
                     self.telemetry.measure_and_record(
                         operation="complete_json_model",
                         task=task,
@@ -404,21 +643,74 @@ class LLMManager:
                         model=model,
                         attempt=attempt_number,
                         started_at=started_at,
-                        outcome="error",
-                        category="server_error",
-                        error_message=str(exc),
+                        outcome="success",
+                        category="success",
+                        cost_usd=raw.cost_usd,
                     )
-                    errors.append(f"{provider_name}: unexpected error {exc}")
-                    if not self._should_failover("server_error"):
-                        raise LLMError(
-                            f"Unexpected provider error: {exc}",
-                            category="server_error",
-                        ) from exc
+                    self.latency.observe(provider_name, task, perf_counter() - started_at)
+                    notify("validated")
+                    return parsed, provider_name
+            except LLMError as exc:
+                self.telemetry.measure_and_record(
+                    operation="complete_json_model",
+                    task=task,
+                    provider=provider_name,
+                    model=model,
+                    attempt=attempt_number,
+                    started_at=started_at,
+                    outcome="error",
+                    category=exc.category,
+                    error_message=str(exc),
+                )
+                is_retryable_invalid_json = (
+                    exc.category == "invalid_json" and attempt_index < (total_attempts - 1)
+                )
+                if is_retryable_invalid_json:
+                    continue
+                errors.append(f"{provider_name}: {exc}")
+                category = exc.category
+                if not self._should_failover(category):
+                    raise
+            except ValidationError as exc:
+                self.telemetry.measure_and_record(
+                    operation="complete_json_model",
+                    task=task,
+                    provider=provider_name,
+                    model=model,
+                    attempt=attempt_number,
+                    started_at=started_at,
+                    outcome="error",
+                    category="invalid_json",
+                    error_message=str(exc),
+                )
+                if attempt_index < (total_attempts - 1):
+                    continue
+                errors.append(f"{provider_name}: invalid_json {exc}")
+                category = "invalid_json"
+                if not self._should_failover(category):
+                    raise LLMError(str(exc), category="invalid_json") from exc
+            except Exception as exc:
+                self.telemetry.measure_and_record(
+                    operation="complete_json_model",
+                    task=task,
+                    provider=provider_name,
+                    model=model,
+                    attempt=attempt_number,
+                    started_at=started_at,
+                    outcome="error",
+                    category="server_error",
+                    error_message=str(exc),
+                )
+                errors.append(f"{provider_name}: unexpected error {exc}")
+                category = "server_error"
+                if not self._should_failover(category):
+                    raise LLMError(
+                        f"Unexpected provider error: {exc}",
+                        category="server_error",
+                    ) from exc
 
-        raise LLMError(
-            "All providers failed for JSON completion. " + " | ".join(errors),
-            category="invalid_json",
-        )
+        self._hand_over(provider_name, category)
+        return None
 
     def complete_json_dict(
         self,
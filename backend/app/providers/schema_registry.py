@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Mapping
+
+from pydantic import BaseModel
+
+from .clients import _to_gemini_schema, _to_openai_strict_schema
+
+
+def _freeze(node: Any) -> Any:
+    if isinstance(node, dict):
+        return MappingProxyType({key: _freeze(value) for key, value in node.items()})
+    if isinstance(node, list):
+        return tuple(_freeze(item) for item in node)
+    return node
+
+
+@dataclass(frozen=True)
+class ProviderSchemas:
+    """
+    Every schema variant of one response model, built once. The `*_json` strings are spliced
+    verbatim into request bodies; the mappings are read-only views for inspection.
+    """
+
+    name: str
+    pydantic: Mapping[str, Any]
+    pydantic_json: str
+    openai_strict_json: str
+    gemini_json: str
+
+    @classmethod
+    def build(cls, model_type: type[BaseModel]) -> "ProviderSchemas":
+        schema = model_type.model_json_schema()
+        return cls(
+            name=model_type.__name__,
+            pydantic=_freeze(schema),
+            pydantic_json=json.dumps(schema),
+            openai_strict_json=json.dumps(_to_openai_strict_schema(schema)),
+            gemini_json=json.dumps(_to_gemini_schema(schema)),
+        )
+
+
+class SchemaRegistry:
+    """Per-process cache of `ProviderSchemas` keyed by pydantic model class."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._schemas: Dict[type[BaseModel], ProviderSchemas] = {}
+
+    def get(self, model_type: type[BaseModel]) -> ProviderSchemas:
+        schemas = self._schemas.get(model_type)
+        if schemas is None:
+            with self._lock:
+                schemas = self._schemas.get(model_type)
+                if schemas is None:
+                    schemas = ProviderSchemas.build(model_type)
+                    self._schemas[model_type] = schemas
+        return schemas
+
+    def warm(self, *model_types: type[BaseModel]) -> None:
+        for model_type in model_types:
+            self.get(model_type)
+
+
+schema_registry = SchemaRegistry()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+
+from limits.storage import Storage
+
+from app.storage import SQLiteConnections
+
+
+class SQLiteLimiterStorage(Storage):
+    """
+    Fixed-window rate-limit counters in a WAL-mode SQLite file, shared by every worker on one host.
+    Registered with `limits` as the `sqlite:///<path>` scheme (four slashes for an absolute path).
+    Each hit is a single UPSERT ... RETURNING statement, so SQLite's own write lock makes the
+    increment atomic without any process-wide lock.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+    SWEEP_INTERVAL_SECONDS = 60.0
+
+    def __init__(
+        self,
+        uri: str,
+        wrap_exceptions: bool = False,
+        busy_timeout_ms: int = 5000,
+        **options: float | str | bool,
+    ) -> None:
+        path = uri.removeprefix("sqlite:///")
+        self._connections = SQLiteConnections(path, busy_timeout_ms=int(busy_timeout_ms))
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "key TEXT PRIMARY KEY, "
+            "count INTEGER NOT NULL, "
+            "expires_at REAL NOT NULL"
+            ")"
+        )
+        self._sweep_lock = threading.Lock()
+        self._last_sweep_at = time.monotonic()
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._connections.connection()
+
+    @property
+    def base_exceptions(self) -> type[Exception] | tuple[type[Exception], ...]:
+        return sqlite3.Error
+
+    def _maybe_sweep(self, now: float) -> None:
+        # Expired windows are reset in place by `incr`; this only drops keys nobody hits anymore.
+        if time.monotonic() - self._last_sweep_at < self.SWEEP_INTERVAL_SECONDS:
+            return
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep_at = time.monotonic()
+            self._connection().execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+        finally:
+            self._sweep_lock.release()
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        now = time.time()
+        row = self._connection().execute(
+            "INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "count = CASE WHEN rate_limits.expires_at <= ? "
+            "THEN excluded.count ELSE rate_limits.count + excluded.count END, "
+            "expires_at = CASE WHEN rate_limits.expires_at <= ? "
+            "THEN excluded.expires_at ELSE rate_limits.expires_at END "
+            "RETURNING count",
+            (key, amount, now + expiry, now, now),
+        ).fetchone()
+        self._maybe_sweep(now)
+        return int(row[0])
+
+    def get(self, key: str) -> int:
+        row = self._connection().execute(
+            "SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT expires_at FROM rate_limits WHERE key = ? AND expires_at > ?",
+            (key, now),
+        ).fetchone()
+        return float(row[0]) if row else now
+
+    def check(self) -> bool:
+        try:
+            self._connection().execute("SELECT 1").fetchone()
+        except sqlite3.Error:
+            return False
+        return True
+
+    def reset(self) -> int | None:
+        return self._connection().execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key: str) -> None:
+        self._connection().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from flask import Response
+from pydantic import BaseModel
+
+try:  # Optional: faster encoding for plain dict payloads when installed.
+    import orjson
+except ImportError:  # pragma: no cover - depends on deployment extras
+    orjson = None
+
+
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(payload: BaseModel | dict[str, Any]) -> Response:
+    """
+    JSON response without the `model_dump()` + `jsonify` round trip: pydantic models are
+    serialized straight to bytes by pydantic-core, dicts by orjson or the stdlib encoder.
+    """
+    if isinstance(payload, BaseModel):
+        body = payload.__pydantic_serializer__.to_json(payload)
+    else:
+        body = dumps(payload)
+    return Response(body, mimetype="application/json")
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
-from flask import Blueprint, current_app, jsonify, request
+import hmac
+import time
+
+from flask import Blueprint, Response, current_app, request, stream_with_context
 from pydantic import ValidationError
 
 from app.extensions import limiter
+from app.responses import json_response
+from app.services.quiz_jobs import TERMINAL_JOB_STATUSES
+from app.services.session_store import SessionConflictError
+from app.telemetry import summarize_counters
+from app.timing import span
 from app.schemas import (
     AnswerSubmissionRequest,
     CreateQuizRequest,
     CreateQuizResponse,
+    QuizJobResponse,
     TopicCandidate,
     TopicResolveRequest,
     TopicResolveResponse,
@@ -27,25 +36,60 @@ def _settings():
 @api_bp.get("/health")
 def health() -> tuple:
     settings = _settings()
+    services = _services()
+    quiz_cache = services["quiz_builder"].quiz_cache
     return (
-        jsonify(
+        json_response(
             {
                 "status": "ok",
                 "mock_mode": bool(settings.llm_force_mock_mode),
                 "quiz_creations_per_day_limit": settings.max_quiz_creations_per_day,
+                "sessions": services["session_store"].stats(),
+                "wikipedia_cache": services["wikipedia"].cache_stats(),
+                "quiz_cache": quiz_cache.stats() if quiz_cache else None,
+                "http_pools": services["http"].stats(),
+                "llm_hedging": (
+                    services["llm_manager"].hedging.stats()
+                    if settings.llm_hedge_enabled
+                    else None
+                ),
             }
         ),
         200,
     )
 
 
+@api_bp.get("/telemetry")
+@limiter.limit(lambda: _settings().max_req_per_10min + " per 10 minutes")
+def telemetry_summary() -> tuple:
+    settings = _settings()
+    if not settings.telemetry_api_token:
+        return json_response({"status": "error", "message": "Not found."}), 404
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(supplied.encode(), settings.telemetry_api_token.encode()):
+        return json_response({"status": "error", "message": "Unauthorized."}), 401
+
+    telemetry = _services()["llm_manager"].telemetry
+    try:
+        summary = summarize_counters(
+            telemetry.read_counters(),
+            request.args.get("window", "24h"),
+            provider=request.args.get("provider") or None,
+            model=request.args.get("model") or None,
+            task=request.args.get("task") or None,
+        )
+    except ValueError as exc:
+        return json_response({"status": "error", "message": str(exc)}), 400
+    return json_response({"status": "ok", **summary}), 200
+
+
 @api_bp.post("/topic/resolve")
 @limiter.limit(lambda: _settings().max_req_per_10min + " per 10 minutes")
 def resolve_topic() -> tuple:
     try:
         payload = TopicResolveRequest.model_validate(request.get_json(force=True, silent=False))
     except ValidationError as exc:
-        return jsonify({"status": "error", "message": str(exc)}), 400
+        return json_response({"status": "error", "message": str(exc)}), 400
 
     services = _services()
     guardrail = services["topic_guardrail"]
@@ -57,7 +101,7 @@ def resolve_topic() -> tuple:
             status="blocked",
             message="Please try another topic.",
         )
-        return jsonify(response.model_dump()), 200
+        return json_response(response), 200
 
     try:
         candidates = wiki.resolve_topic(payload.topic)
@@ -66,14 +110,14 @@ def resolve_topic() -> tuple:
             status="error",
             message="Could not resolve topic at the moment.",
         )
-        return jsonify(response.model_dump()), 500
+        return json_response(response), 500
 
     if not candidates:
         response = TopicResolveResponse(
             status="no_match",
             message="No matching Wikipedia article found. Try another topic.",
         )
-        return jsonify(response.model_dump()), 200
+        return json_response(response), 200
 
     # Prefer a non-disambiguation page as the recommended primary candidate.
     ranked = [item for item in candidates if not item.is_disambiguation] + [
@@ -111,7 +155,7 @@ def resolve_topic() -> tuple:
         ]
         or None,
     )
-    return jsonify(response.model_dump()), 200
+    return json_response(response), 200
 
 
 @api_bp.post("/quiz/create")
@@ -121,7 +165,7 @@ def create_quiz() -> tuple:
     try:
         payload = CreateQuizRequest.model_validate(request.get_json(force=True, silent=False))
     except ValidationError as exc:
-        return jsonify({"status": "error", "message": str(exc)}), 400
+        return json_response({"status": "error", "message": str(exc)}), 400
 
     services = _services()
     wiki = services["wikipedia"]
@@ -133,7 +177,7 @@ def create_quiz() -> tuple:
         quiz, provider = quiz_builder.build_quiz(topic=payload.topic, article=article)
         session_id = session_store.create_session(topic=payload.topic, quiz=quiz)
     except ValidationError as exc:
-        return jsonify(
+        return json_response(
             {
                 "status": "error",
                 "message": "Quiz generation returned invalid schema.",
@@ -141,7 +185,7 @@ def create_quiz() -> tuple:
             }
         ), 502
     except Exception as exc:
-        return jsonify(
+        return json_response(
             {
                 "status": "error",
                 "message": "Failed to create quiz. Try another topic.",
@@ -149,10 +193,79 @@ def create_quiz() -> tuple:
             }
         ), 500
 
-    response = CreateQuizResponse(session_id=session_id, quiz=quiz, source=quiz.source)
-    payload = response.model_dump()
-    payload["provider"] = provider
-    return jsonify(payload), 200
+    with span("serialize"):
+        body = json_response(
+            CreateQuizResponse(
+                session_id=session_id,
+                quiz=quiz,
+                source=quiz.source,
+                provider=provider,
+            )
+        )
+    return body, 200
+
+
+@api_bp.post("/quiz/jobs")
+@limiter.limit(lambda: _settings().max_quiz_creations_per_10min + " per 10 minutes")
+@limiter.limit(lambda: _settings().max_quiz_creations_per_day + " per day")
+def create_quiz_job() -> tuple:
+    try:
+        payload = CreateQuizRequest.model_validate(request.get_json(force=True, silent=False))
+    except ValidationError as exc:
+        return json_response({"status": "error", "message": str(exc)}), 400
+
+    job = _services()["quiz_jobs"].submit(
+        topic=payload.topic,
+        page_id=payload.selected_page_id,
+    )
+    return json_response(QuizJobResponse.model_validate(job)), 202
+
+
+@api_bp.get("/quiz/jobs/<job_id>")
+@limiter.limit(lambda: _settings().max_req_per_10min + " per 10 minutes")
+def quiz_job_status(job_id: str) -> tuple:
+    try:
+        job = _services()["quiz_jobs"].get(job_id)
+    except KeyError:
+        return json_response({"status": "error", "message": "Job not found."}), 404
+    return json_response(QuizJobResponse.model_validate(job)), 200
+
+
+@api_bp.get("/quiz/jobs/<job_id>/events")
+@limiter.limit(lambda: _settings().max_req_per_10min + " per 10 minutes")
+def quiz_job_events(job_id: str):
+    quiz_jobs = _services()["quiz_jobs"]
+    try:
+        job = quiz_jobs.get(job_id)
+    except KeyError:
+        return json_response({"status": "error", "message": "Job not found."}), 404
+
+    # The stream holds a (sync) worker while open, so it closes well before gunicorn's worker
+    # timeout; EventSource clients reconnect after `retry` ms and get the current status again.
+    deadline = time.monotonic() + max(1, _settings().quiz_job_events_max_seconds)
+
+    def events():
+        current = job
+        last_status = None
+        yield "retry: 1000\n\n"
+        while True:
+            if current["status"] != last_status:
+                last_status = current["status"]
+                body = QuizJobResponse.model_validate(current).model_dump_json()
+                yield f"event: status\ndata: {body}\n\n"
+            if last_status in TERMINAL_JOB_STATUSES or time.monotonic() >= deadline:
+                return
+            time.sleep(0.5)
+            try:
+                current = quiz_jobs.get(job_id)
+            except KeyError:
+                return
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @api_bp.post("/quiz/<session_id>/answer")
@@ -166,12 +279,12 @@ def submit_answer(session_id: str) -> tuple:
             request.get_json(force=True, silent=False)
         )
     except ValidationError as exc:
-        return jsonify({"status": "invalid", "message": str(exc)}), 400
+        return json_response({"status": "invalid", "message": str(exc)}), 400
 
     try:
         result = session_store.submit_answer(session_id=session_id, payload=payload)
     except KeyError:
-        return jsonify(
+        return json_response(
             {
                 "status": "error",
                 "attempts_used": 0,
@@ -181,20 +294,58 @@ def submit_answer(session_id: str) -> tuple:
                 "feedback": "Session not found.",
             }
         ), 404
+    except SessionConflictError:
+        return json_response(
+            {
+                "status": "error",
+                "attempts_used": 0,
+                "attempts_remaining": 0,
+                "is_correct": False,
+                "locked": False,
+                "feedback": "The session changed while this answer was saved. Try again.",
+            }
+        ), 409
 
-    return jsonify(result.model_dump()), 200
+    return json_response(result), 200
 
 
 @api_bp.get("/quiz/<session_id>/state")
 @limiter.limit(lambda: _settings().max_req_per_10min + " per 10 minutes")
-def quiz_state(session_id: str) -> tuple:
+def quiz_state(session_id: str):
     services = _services()
     session_store = services["session_store"]
-    try:
-        state = session_store.get_state(session_id=session_id)
-    except KeyError:
-        return jsonify({"status": "error", "message": "Session not found."}), 404
-    return jsonify(state.model_dump()), 200
+    since = request.args.get("since")
+    if since is not None:
+        if not (since.isascii() and since.isdigit()):
+            return json_response(
+                {"status": "error", "message": "since must be a version number."}
+            ), 400
+        since = int(since)
+
+    # Revalidate against the stored version first: a 304 never decodes the record, and only
+    # refreshes its access time so a polling client is not evicted as idle.
+    version = session_store.current_version(session_id)
+    etag = None if version is None else session_store.state_etag(session_id, version)
+    if etag is not None and request.if_none_match.contains(etag):
+        session_store.touch_session(session_id)
+        response = Response(status=304)
+    else:
+        try:
+            record = session_store.get_session(session_id)
+        except KeyError:
+            return json_response({"status": "error", "message": "Session not found."}), 404
+        etag = session_store.state_etag(session_id, record.version)
+        with span("serialize"):
+            body = None
+            if since is not None:
+                body = session_store.render_state_delta(record, since)
+            if body is None:
+                body = session_store.render_state(record)
+            response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    # Clients may keep the body but must revalidate it on every poll.
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 
 @api_bp.post("/quiz/<session_id>/reset")
@@ -203,4 +354,4 @@ def reset_session(session_id: str) -> tuple:
     services = _services()
     session_store = services["session_store"]
     session_store.reset_session(session_id=session_id)
-    return jsonify({"status": "ok", "message": "Session reset."}), 200
+    return json_response({"status": "ok", "message": "Session reset."}), 200
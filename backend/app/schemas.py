@@ -135,6 +135,30 @@ class CreateQuizResponse(BaseModel):
     session_id: str
     quiz: QuizModel
     source: QuizSource
+    provider: Optional[str] = None
+
+
+QuizJobStatus = Literal[
+    "queued",
+    "fetching_article",
+    "generating",
+    "repairing",
+    "validated",
+    "ready",
+    "failed",
+]
+
+
+class QuizJobResponse(BaseModel):
+    job_id: str
+    status: QuizJobStatus
+    topic: str
+    message: Optional[str] = None
+    session_id: Optional[str] = None
+    provider: Optional[str] = None
+    questions_ready: int = 0
+    created_at: float
+    updated_at: float
 
 
 class AnswerSubmissionRequest(BaseModel):
@@ -170,6 +194,21 @@ class SessionStateResponse(BaseModel):
     current_index: int
     answers: Dict[str, AnswerState]
     quiz: QuizModel
+    complete: bool = True
+    version: int = 0
+
+
+class SessionStateDeltaResponse(BaseModel):
+    """Answers changed after version `since`; everything else is as in `SessionStateResponse`."""
+
+    session_id: str
+    since: int
+    version: int
+    score: int
+    total_questions: int
+    current_index: int
+    answers: Dict[str, AnswerState]
+    complete: bool = True
 
 
 class ShortGradingResult(BaseModel):
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, List
+
+import httpx
+
+from app.services.wikipedia import WikiArticle, WikiCandidate, WikipediaService, _TransientWikiError
+
+
+class AsyncWikipediaService:
+    """
+    asyncio front end for a `WikipediaService`, sharing its request building, parsing and
+    cache. Summary fan-out uses `asyncio.gather` instead of the thread pool.
+    """
+
+    def __init__(self, wikipedia: WikipediaService, client: httpx.AsyncClient) -> None:
+        self.wikipedia = wikipedia
+        self.settings = wikipedia.settings
+        self.cache = wikipedia.cache
+        self.client = client
+
+    async def _acached(
+        self,
+        namespace: str,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_seconds: int,
+    ) -> Any:
+        if self.cache is None:
+            return await loader()
+        return await self.cache.aget_or_load(
+            f"{self.wikipedia.lang}:{namespace}",
+            key,
+            loader,
+            ttl_seconds=ttl_seconds,
+            negative_ttl_seconds=self.settings.wiki_cache_negative_ttl_seconds,
+        )
+
+    async def _aget(self, endpoint: str, params: dict | None = None) -> httpx.Response:
+        return await self.client.get(endpoint, params=params, headers=self.wikipedia.headers, timeout=8)
+
+    async def _asearch(self, topic: str, limit: int = 5) -> list[dict]:
+        async def load() -> list[dict]:
+            endpoint, params = self.wikipedia._search_request(topic, limit)
+            response = await self._aget(endpoint, params)
+            response.raise_for_status()
+            return self.wikipedia._parse_search(response.json())
+
+        return await self._acached(
+            "search",
+            f"{limit}:{' '.join(topic.lower().split())}",
+            load,
+            self.settings.wiki_cache_search_ttl_seconds,
+        )
+
+    async def _asummary_for_title(self, title: str) -> dict:
+        async def load() -> dict:
+            response = await self._aget(self.wikipedia._summary_endpoint(title))
+            if not self.wikipedia._check_summary_status(response.status_code):
+                return {}
+            return response.json()
+
+        try:
+            return await self._acached(
+                "summary",
+                title,
+                load,
+                self.settings.wiki_cache_summary_ttl_seconds,
+            )
+        except _TransientWikiError:
+            return {}
+
+    async def _apage_bundle(self, page_id: int) -> dict:
+        async def load() -> dict:
+            endpoint, params = self.wikipedia._page_bundle_request(page_id)
+            response = await self._aget(endpoint, params)
+            response.raise_for_status()
+            return self.wikipedia._parse_page_bundle(page_id, response.json())
+
+        return await self._acached(
+            "page",
+            str(page_id),
+            load,
+            self.settings.wiki_cache_extract_ttl_seconds,
+        )
+
+    async def aresolve_topic(self, topic: str) -> List[WikiCandidate]:
+        hits = await self._asearch(topic=topic, limit=5)
+        titles = [hit.get("title", "") for hit in hits]
+        summaries = await asyncio.gather(*(self._asummary_for_title(title) for title in titles))
+        return self.wikipedia._candidates(hits, titles, list(summaries))
+
+    async def aget_article(self, page_id: int) -> WikiArticle:
+        page = await self._apage_bundle(page_id)
+        if not page:
+            raise ValueError("Could not locate Wikipedia page for selected page_id")
+        summary_data = None
+        if not self.wikipedia._lead_summary(page.get("extract") or ""):
+            summary_data = await self._asummary_for_title(page["title"])
+        return self.wikipedia._article_from_page(page_id, page, summary_data)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Sequence, Tuple
+
+
+REVEAL_PHRASES = (
+    r"\bcorrect answer\b",
+    r"\bexpected answer\b",
+    r"\bthe answer is\b",
+    r"\boption\s+[a-z0-9]+\s+is correct\b",
+    r"\bshould be\b",
+    r"\bmust be\b",
+    r"\bresponse does not match\b",
+    r"\bmatches the expected\b",
+)
+
+REVEAL_PATTERN = re.compile("|".join(REVEAL_PHRASES))
+
+
+@lru_cache(maxsize=4096)
+def _pattern_for(tokens: Tuple[str, ...]) -> re.Pattern[str]:
+    if not tokens:
+        return REVEAL_PATTERN
+    # One alternation for phrases and tokens, so a check is a single `search` call in C instead
+    # of one call per pattern. `re` is a backtracking engine that tries each branch at every
+    # start position, so the cost still grows with the number of branches (not linear in the
+    # text alone like an Aho-Corasick automaton); with a handful of short tokens that is cheap.
+    return re.compile("|".join([*REVEAL_PHRASES, *(re.escape(token) for token in tokens)]))
+
+
+class LeakDetector:
+    """
+    Detects feedback that would reveal the answer to a question.
+    Tokens must already be stripped and lowercased (see QuestionKey). The combined pattern
+    is compiled on first use and shared by every detector with the same tokens.
+    """
+
+    __slots__ = ("tokens",)
+
+    def __init__(self, tokens: Sequence[str] = ()) -> None:
+        self.tokens = tuple(tokens)
+
+    def revealed(self, feedback: str) -> bool:
+        text = feedback.strip().lower()
+        if not text:
+            return True
+        return _pattern_for(self.tokens).search(text) is not None
@@ -2,13 +2,14 @@ from __future__ import annotations
 
 import re
 import uuid
-from typing import List, Tuple
+from typing import Any, Callable, List, Tuple
 
 from pydantic import ValidationError
 
 from app.config import Settings
 from app.providers.base import LLMError
 from app.providers.manager import LLMManager
+from app.providers.schema_registry import schema_registry
 from app.schemas import (
     MCQMultiQuestion,
     MCQSingleQuestion,
@@ -17,7 +18,14 @@ from app.schemas import (
     ShortGradingResult,
     ShortTextQuestion,
 )
+from app.services.quiz_cache import QuizCache
+from app.services.quiz_stream import QuestionStream, partial_quiz
 from app.services.wikipedia import WikiArticle
+from app.timing import span
+
+
+# Bump whenever the quiz-generation prompt changes so cached quizzes stop matching.
+QUIZ_PROMPT_VERSION = "quiz-prompt-v1"
 
 
 def _normalize_answer(value: str) -> str:
@@ -25,9 +33,19 @@ def _normalize_answer(value: str) -> str:
 
 
 class QuizBuilderService:
-    def __init__(self, settings: Settings, llm_manager: LLMManager) -> None:
+    def __init__(
+        self,
+        settings: Settings,
+        llm_manager: LLMManager,
+        quiz_cache: QuizCache | None = None,
+    ) -> None:
         self.settings = settings
         self.llm_manager = llm_manager
+        self.quiz_cache = quiz_cache
+        if self.quiz_cache is None and settings.quiz_cache_enabled:
+            self.quiz_cache = QuizCache(settings)
+        # Build provider schemas at startup rather than on the first quiz request.
+        schema_registry.warm(QuizModel, ShortGradingResult)
 
     def _bounded_extract_for_quiz(self, article: WikiArticle) -> str:
         # Keep quiz generation context compact and deterministic for reliability/cost.
@@ -157,17 +175,28 @@ Extract:
             return snippets
         return [text[:140].rstrip(" .")]
 
-    def _mock_quiz(self, topic: str, article: WikiArticle, reveal_answers: bool) -> QuizModel:
-        bounded_extract = self._bounded_extract_for_quiz(article)
-        source = QuizSource(
+    def source_for(self, article: WikiArticle) -> QuizSource:
+        return QuizSource(
             wikipedia_title=article.title,
             wikipedia_url=article.url,
             page_id=article.page_id,
-            extract_used=bounded_extract,
+            extract_used=self._bounded_extract_for_quiz(article),
             image_url=article.image_url,
             image_caption=article.image_caption,
         )
 
+    def partial_quiz(self, topic: str, article: WikiArticle, questions: List[Any]) -> QuizModel:
+        return partial_quiz(
+            quiz_id=f"quiz-{uuid.uuid4().hex[:10]}",
+            topic=topic,
+            source=self.source_for(article),
+            questions=questions,
+        )
+
+    def _mock_quiz(self, topic: str, article: WikiArticle, reveal_answers: bool) -> QuizModel:
+        bounded_extract = self._bounded_extract_for_quiz(article)
+        source = self.source_for(article)
+
         snippets = self._summary_snippets(article)
         wrong_option_templates = [
             f"The article is mostly unrelated to {article.title}.",
@@ -308,34 +337,126 @@ Extract:
         )
         return quiz
 
-    def build_quiz(self, topic: str, article: WikiArticle) -> Tuple[QuizModel, str]:
+    def _quiz_cache_key(self, article: WikiArticle) -> str:
+        models = ",".join(
+            f"{provider}:{self.settings.get_task_model(provider, 'quiz_generation')}"
+            for provider in self.settings.llm_provider_order
+            if self.llm_manager.providers[provider].is_configured()
+        )
+        return QuizCache.cache_key(
+            page_id=article.page_id,
+            revision_id=article.revision_id,
+            bounded_extract=self._bounded_extract_for_quiz(article),
+            models=models,
+            prompt_version=QUIZ_PROMPT_VERSION,
+        )
+
+    def _quiz_without_llm(
+        self, topic: str, article: WikiArticle
+    ) -> Tuple[Tuple[QuizModel, str] | None, str | None]:
+        """Return (quiz, provider) from mock mode or the quiz cache, plus the cache key."""
         if self.settings.llm_force_mock_mode:
-            return self._mock_quiz(topic, article, reveal_answers=True), "mock-forced"
+            return (self._mock_quiz(topic, article, reveal_answers=True), "mock-forced"), None
 
         has_provider = self.llm_manager.any_provider_configured()
         if not has_provider:
             if self.settings.llm_allow_mock:
-                return self._mock_quiz(topic, article, reveal_answers=False), "mock"
+                return (self._mock_quiz(topic, article, reveal_answers=False), "mock"), None
             raise LLMError("No LLM providers are configured", category="server_error")
 
+        cache_key = self._quiz_cache_key(article) if self.quiz_cache else None
+        if self.quiz_cache and cache_key:
+            cached = self.quiz_cache.get(cache_key, topic=topic)
+            if cached is not None:
+                return cached, cache_key
+        return None, cache_key
+
+    @staticmethod
+    def _stream_starter(
+        on_question: Callable[[Any], None] | None,
+    ) -> Callable[[], Callable[[str], None]] | None:
+        if on_question is None:
+            return None
+        streams: list[QuestionStream] = []
+
+        def on_stream_start() -> Callable[[str], None]:
+            # Only the first attempt feeds on_question: a retry or failover writes a different
+            # quiz, which replaces the streamed questions once it validates.
+            if streams:
+                return lambda _chunk: None
+            streams.append(QuestionStream(on_question))
+            return streams[0].feed
+
+        return on_stream_start
+
+    def _finish_generated_quiz(
+        self,
+        quiz: QuizModel,
+        provider: str,
+        article: WikiArticle,
+        cache_key: str | None,
+    ) -> Tuple[QuizModel, str]:
+        # Source metadata should be grounded in the selected article, not model-generated values.
+        quiz.source.wikipedia_title = article.title
+        quiz.source.wikipedia_url = article.url
+        quiz.source.page_id = article.page_id
+        quiz.source.image_url = article.image_url
+        quiz.source.image_caption = article.image_caption
+        quiz.source.extract_used = self._bounded_extract_for_quiz(article)
+        if self.quiz_cache and cache_key:
+            self.quiz_cache.put(cache_key, quiz, provider)
+        return quiz, provider
+
+    def build_quiz(
+        self,
+        topic: str,
+        article: WikiArticle,
+        on_progress: Callable[[str], None] | None = None,
+        on_question: Callable[[Any], None] | None = None,
+    ) -> Tuple[QuizModel, str]:
+        """
+        `on_question` streams the completion and receives each question as soon as it is
+        generated and individually valid. The returned quiz is always fully validated.
+        """
+        shortcut, cache_key = self._quiz_without_llm(topic, article)
+        if shortcut is not None:
+            return shortcut
+
+        with span("prompt"):
+            system_prompt, user_prompt = self._quiz_generation_prompt(topic=topic, article=article)
+        quiz, provider = self.llm_manager.complete_json_model(
+            task="quiz_generation",
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            model_type=QuizModel,
+            on_progress=on_progress,
+            on_stream_start=self._stream_starter(on_question),
+        )
+        return self._finish_generated_quiz(quiz, provider, article, cache_key)
+
+    async def abuild_quiz(
+        self,
+        topic: str,
+        article: WikiArticle,
+        async_llm_manager: Any,
+        on_progress: Callable[[str], None] | None = None,
+        on_question: Callable[[Any], None] | None = None,
+    ) -> Tuple[QuizModel, str]:
+        """`build_quiz` with generation awaited on an `AsyncLLMManager`."""
+        shortcut, cache_key = self._quiz_without_llm(topic, article)
+        if shortcut is not None:
+            return shortcut
+
         system_prompt, user_prompt = self._quiz_generation_prompt(topic=topic, article=article)
-        try:
-            quiz, provider = self.llm_manager.complete_json_model(
-                task="quiz_generation",
-                system_prompt=system_prompt,
-                user_prompt=user_prompt,
-                model_type=QuizModel,
-            )
-            # Source metadata should be grounded in the selected article, not model-generated values.
-            quiz.source.wikipedia_title = article.title
-            quiz.source.wikipedia_url = article.url
-            quiz.source.page_id = article.page_id
-            quiz.source.image_url = article.image_url
-            quiz.source.image_caption = article.image_caption
-            quiz.source.extract_used = self._bounded_extract_for_quiz(article)
-            return quiz, provider
-        except (LLMError, ValidationError):
-            raise
+        quiz, provider = await async_llm_manager.complete_json_model(
+            task="quiz_generation",
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            model_type=QuizModel,
+            on_progress=on_progress,
+            on_stream_start=self._stream_starter(on_question),
+        )
+        return self._finish_generated_quiz(quiz, provider, article, cache_key)
 
     def grade_short_answer(
         self,
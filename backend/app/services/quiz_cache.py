@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import uuid
+from typing import Tuple
+
+from app.cache import MISSING, SQLiteCacheTier, TTLCache
+from app.config import Settings
+from app.schemas import MCQMultiQuestion, MCQSingleQuestion, QuizModel
+
+
+class QuizCache:
+    """
+    Opt-in cache of validated LLM quizzes, keyed by the exact inputs that produced them:
+    page id, page revision, bounded extract, provider models and prompt version.
+    A cached quiz is served at most `max_reuses` times within `ttl_seconds`.
+    """
+
+    NAMESPACE = "quiz"
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        disk = (
+            SQLiteCacheTier(settings.quiz_cache_disk_path)
+            if settings.quiz_cache_disk_path
+            else None
+        )
+        self.cache = TTLCache(
+            max_entries=settings.quiz_cache_max_entries, disk=disk, name="quiz"
+        )
+
+    @staticmethod
+    def cache_key(
+        page_id: int,
+        revision_id: int | None,
+        bounded_extract: str,
+        models: str,
+        prompt_version: str,
+    ) -> str:
+        material = json.dumps(
+            [page_id, revision_id, bounded_extract, models, prompt_version],
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, topic: str) -> Tuple[QuizModel, str] | None:
+        # Claims one reuse atomically, so concurrent requests cannot exceed the limit.
+        entry = self.cache.increment(
+            self.NAMESPACE, key, "reuses", limit=self.settings.quiz_cache_max_reuses
+        )
+        if entry is MISSING:
+            return None
+
+        quiz = QuizModel.model_validate(entry["quiz"])
+        quiz.quiz_id = f"quiz-{uuid.uuid4().hex[:10]}"
+        quiz.topic = topic
+        if self.settings.quiz_cache_shuffle_options:
+            self._shuffle_options(quiz)
+        return quiz, f"cache:{entry['provider']}"
+
+    def put(self, key: str, quiz: QuizModel, provider: str) -> None:
+        ttl_seconds = self.settings.quiz_cache_ttl_seconds
+        entry = {
+            "quiz": quiz.model_dump(mode="json"),
+            "provider": provider,
+            "reuses": 0,
+        }
+        self.cache.set(self.NAMESPACE, key, entry, ttl_seconds)
+
+    @staticmethod
+    def _shuffle_options(quiz: QuizModel) -> None:
+        # Option ids stay attached to their text, so answer keys and feedback remain valid;
+        # the UI labels options by position, so learners see a different A-D order.
+        for question in quiz.questions:
+            if isinstance(question, (MCQSingleQuestion, MCQMultiQuestion)):
+                random.shuffle(question.options)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
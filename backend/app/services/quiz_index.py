@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Tuple
+
+from app.schemas import MCQMultiQuestion, MCQSingleQuestion, QuizModel, ShortTextQuestion
+from app.services.leak_detector import LeakDetector
+
+
+def _normalized_tokens(values: list[str]) -> Tuple[str, ...]:
+    # Tokens shorter than two characters (e.g. bare option ids) match too much prose to be useful.
+    tokens = []
+    for value in values:
+        cleaned = value.strip().lower()
+        if len(cleaned) >= 2 and cleaned not in tokens:
+            tokens.append(cleaned)
+    return tuple(tokens)
+
+
+@dataclass(frozen=True, slots=True)
+class QuestionKey:
+    """Grading data derived once per question instead of on every submission."""
+
+    question: MCQSingleQuestion | MCQMultiQuestion | ShortTextQuestion
+    correct_ids: frozenset[str]
+    correct_option_texts: Tuple[str, ...]
+    sensitive_tokens: Tuple[str, ...]
+    leak_detector: LeakDetector
+
+    @classmethod
+    def build(
+        cls, question: MCQSingleQuestion | MCQMultiQuestion | ShortTextQuestion
+    ) -> "QuestionKey":
+        if isinstance(question, ShortTextQuestion):
+            sensitive_tokens = _normalized_tokens(question.expected_answers)
+            return cls(
+                question=question,
+                correct_ids=frozenset(),
+                correct_option_texts=(),
+                sensitive_tokens=sensitive_tokens,
+                leak_detector=LeakDetector(sensitive_tokens),
+            )
+
+        correct_ids = frozenset(question.correct_option_ids)
+        correct_option_texts = tuple(
+            option.text for option in question.options if option.id in correct_ids
+        )
+        sensitive_tokens = _normalized_tokens(sorted(correct_ids) + list(correct_option_texts))
+        return cls(
+            question=question,
+            correct_ids=correct_ids,
+            correct_option_texts=correct_option_texts,
+            sensitive_tokens=sensitive_tokens,
+            leak_detector=LeakDetector(sensitive_tokens),
+        )
+
+
+@lru_cache(maxsize=256)
+def question_positions(question_ids: Tuple[str, ...]) -> Mapping[str, int]:
+    # Quizzes nearly always use q01..q15, so sessions share one read-only map.
+    return MappingProxyType({question_id: index for index, question_id in enumerate(question_ids)})
+
+
+@dataclass(frozen=True, slots=True)
+class QuizIndex:
+    positions: Mapping[str, int]
+    keys: Tuple[QuestionKey, ...]
+
+    @classmethod
+    def build(cls, quiz: QuizModel) -> "QuizIndex":
+        return cls(
+            positions=question_positions(tuple(question.id for question in quiz.questions)),
+            keys=tuple(QuestionKey.build(question) for question in quiz.questions),
+        )
+
+    def lookup(self, question_id: str) -> Tuple[int, QuestionKey] | None:
+        position = self.positions.get(question_id)
+        if position is None:
+            return None
+        return position, self.keys[position]
@@ -0,0 +1,354 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Protocol
+
+from pydantic import ValidationError
+
+from app.aio import BackgroundEventLoop
+from app.config import Settings
+from app.schemas import QuizModel
+from app.services.quiz_builder import QuizBuilderService
+from app.services.session_store import SessionStore
+from app.services.wikipedia import WikiArticle, WikipediaService
+from app.storage import SQLiteConnections
+
+
+TERMINAL_JOB_STATUSES = {"ready", "failed"}
+
+
+class JobStore(Protocol):
+    def save(self, job: dict[str, Any]) -> None:
+        ...
+
+    def load(self, job_id: str) -> dict[str, Any] | None:
+        ...
+
+
+class MemoryJobStore:
+    def __init__(self, ttl_seconds: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, dict[str, Any]] = {}
+
+    def save(self, job: dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._jobs[job["job_id"]] = dict(job)
+            expired = [
+                job_id
+                for job_id, item in self._jobs.items()
+                if now - item["updated_at"] >= self.ttl_seconds
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def load(self, job_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+
+class SQLiteJobStore:
+    def __init__(self, path: str, ttl_seconds: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._connections = SQLiteConnections(path)
+        self._connections.connection().execute(
+            "CREATE TABLE IF NOT EXISTS quiz_jobs ("
+            "job_id TEXT PRIMARY KEY, "
+            "payload TEXT NOT NULL, "
+            "updated_at REAL NOT NULL"
+            ")"
+        )
+
+    def save(self, job: dict[str, Any]) -> None:
+        connection = self._connections.connection()
+        connection.execute(
+            "INSERT INTO quiz_jobs (job_id, payload, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(job_id) DO UPDATE SET "
+            "payload = excluded.payload, updated_at = excluded.updated_at",
+            (job["job_id"], json.dumps(job), job["updated_at"]),
+        )
+        if job["status"] == "queued":
+            # New jobs are rare compared to updates; prune old rows when one is created.
+            connection.execute(
+                "DELETE FROM quiz_jobs WHERE updated_at <= ?",
+                (time.time() - self.ttl_seconds,),
+            )
+
+    def load(self, job_id: str) -> dict[str, Any] | None:
+        row = self._connections.connection().execute(
+            "SELECT payload FROM quiz_jobs WHERE job_id = ?",
+            (job_id,),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+class RedisJobStore:
+    def __init__(self, url: str, ttl_seconds: int, key_prefix: str = "quiz-me:job:") -> None:
+        import redis
+
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self._client: Any = redis.Redis.from_url(url)
+
+    def save(self, job: dict[str, Any]) -> None:
+        self._client.set(
+            f"{self.key_prefix}{job['job_id']}",
+            json.dumps(job),
+            ex=max(1, self.ttl_seconds),
+        )
+
+    def load(self, job_id: str) -> dict[str, Any] | None:
+        blob = self._client.get(f"{self.key_prefix}{job_id}")
+        return json.loads(blob) if blob else None
+
+
+def build_job_store(settings: Settings) -> JobStore:
+    # Jobs live next to sessions so any worker can answer a status poll.
+    ttl_seconds = max(60, settings.quiz_job_ttl_seconds)
+    if settings.session_backend == "sqlite":
+        return SQLiteJobStore(settings.session_sqlite_path, ttl_seconds=ttl_seconds)
+    if settings.session_backend == "redis":
+        return RedisJobStore(settings.session_redis_url, ttl_seconds=ttl_seconds)
+    return MemoryJobStore(ttl_seconds=ttl_seconds)
+
+
+def _call(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+    fn(*args, **kwargs)
+
+
+class _SerialWrites:
+    """
+    Job-store and session writes of one asyncio job, run on worker threads one at a time and
+    in submission order, so a slow SQLite or Redis call never blocks the job loop.
+    """
+
+    def __init__(self) -> None:
+        self._last: asyncio.Future | None = None
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        previous = self._last
+
+        async def run() -> None:
+            if previous is not None:
+                await previous
+            await asyncio.to_thread(fn, *args, **kwargs)
+
+        self._last = asyncio.ensure_future(run())
+
+    async def drain(self) -> None:
+        """Waits for every submitted write; re-raises the first one that failed."""
+        if self._last is not None:
+            await self._last
+
+
+class _JobProgress:
+    """
+    Progress, streamed-question and completion handling for one running job. Every job and
+    session write goes through `write`, which runs it inline or, on the asyncio path, queues it
+    on the job's `_SerialWrites`.
+    """
+
+    def __init__(
+        self,
+        service: "QuizJobService",
+        job: dict[str, Any],
+        article: WikiArticle,
+        write: Callable[..., None] = _call,
+    ) -> None:
+        self.service = service
+        self.job = job
+        self.article = article
+        self.write = write
+        self.streamed: list[Any] = []
+
+    def on_progress(self, stage: str) -> None:
+        self.write(self._advance, stage)
+
+    def _advance(self, stage: str) -> None:
+        job = self.job
+        if stage != job["status"] and job["status"] not in TERMINAL_JOB_STATUSES:
+            self.service._update(job, status=stage)
+
+    def on_question(self, question: Any) -> None:
+        self.streamed.append(question)
+        partial = self.service.quiz_builder.partial_quiz(
+            self.job["topic"], self.article, self.streamed
+        )
+        self.write(self._publish, partial, len(self.streamed))
+
+    def _publish(self, partial: QuizModel, questions_ready: int) -> None:
+        # Open the session on the first valid question so the learner can start early.
+        service, job = self.service, self.job
+        if job["session_id"] is None:
+            session_id = service.session_store.create_session(
+                topic=job["topic"], quiz=partial, complete=False
+            )
+            service._update(job, session_id=session_id, questions_ready=questions_ready)
+        else:
+            service.session_store.update_quiz(job["session_id"], partial, complete=False)
+            service._update(job, questions_ready=questions_ready)
+
+    def question_callback(self) -> Callable[[Any], None] | None:
+        return self.on_question if self.service.settings.llm_stream_quiz_generation else None
+
+    def finish(self, quiz: QuizModel, provider: str) -> None:
+        self.write(self._finish, quiz, provider)
+
+    def _finish(self, quiz: QuizModel, provider: str) -> None:
+        service, job = self.service, self.job
+        if job["session_id"] is None:
+            session_id = service.session_store.create_session(topic=job["topic"], quiz=quiz)
+        else:
+            session_id = job["session_id"]
+            service.session_store.update_quiz(session_id, quiz, complete=True)
+        service._update(
+            job,
+            status="ready",
+            session_id=session_id,
+            provider=provider,
+            questions_ready=len(quiz.questions),
+        )
+
+
+class QuizJobService:
+    """
+    Runs Wikipedia fetch + quiz generation + session creation on a bounded background
+    executor so `/quiz/jobs` can return immediately and request workers stay free.
+    With `QUIZ_JOB_ASYNC`, jobs instead run as coroutines on one event loop thread, so a
+    worker can keep hundreds of Wikipedia/LLM calls in flight.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        wikipedia: WikipediaService,
+        quiz_builder: QuizBuilderService,
+        session_store: SessionStore,
+        store: JobStore | None = None,
+    ) -> None:
+        self.settings = settings
+        self.wikipedia = wikipedia
+        self.quiz_builder = quiz_builder
+        self.session_store = session_store
+        self.store = store or build_job_store(settings)
+        self._executor: ThreadPoolExecutor | None = None
+        self._loop: BackgroundEventLoop | None = None
+        self._async_services: tuple[Any, Any, asyncio.Semaphore] | None = None
+        if settings.quiz_job_async:
+            self._loop = BackgroundEventLoop("quiz-job-loop")
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.quiz_job_workers),
+                thread_name_prefix="quiz-job",
+            )
+
+    def _update(self, job: dict[str, Any], **changes: Any) -> None:
+        job.update(changes)
+        job["updated_at"] = time.time()
+        self.store.save(job)
+
+    def submit(self, topic: str, page_id: int) -> dict[str, Any]:
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "topic": topic,
+            "page_id": page_id,
+            "message": None,
+            "session_id": None,
+            "provider": None,
+            "questions_ready": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.store.save(job)
+        if self._loop is not None:
+            self._loop.submit(self._arun(dict(job)))
+        else:
+            assert self._executor is not None
+            self._executor.submit(self._run, dict(job))
+        return job
+
+    def get(self, job_id: str) -> dict[str, Any]:
+        job = self.store.load(job_id)
+        if job is None:
+            raise KeyError("Job not found")
+        return job
+
+    def _run(self, job: dict[str, Any]) -> None:
+        try:
+            self._update(job, status="fetching_article")
+            article = self.wikipedia.get_article(job["page_id"])
+
+            self._update(job, status="generating")
+            progress = _JobProgress(self, job, article)
+            quiz, provider = self.quiz_builder.build_quiz(
+                topic=job["topic"],
+                article=article,
+                on_progress=progress.on_progress,
+                on_question=progress.question_callback(),
+            )
+            progress.finish(quiz, provider)
+        except ValidationError:
+            self._fail(job, "Quiz generation returned invalid schema.")
+        except Exception:
+            self._fail(job, "Failed to create quiz. Try another topic.")
+
+    def _get_async_services(self) -> tuple[Any, Any, asyncio.Semaphore]:
+        # Only called on the job loop thread; the HTTP client is bound to that loop.
+        if self._async_services is None:
+            from app.http import build_async_client
+            from app.providers.async_manager import AsyncLLMManager
+            from app.services.async_wikipedia import AsyncWikipediaService
+
+            client = build_async_client(self.settings)
+            self._async_services = (
+                AsyncWikipediaService(self.wikipedia, client),
+                AsyncLLMManager(self.quiz_builder.llm_manager, client),
+                asyncio.Semaphore(max(1, self.settings.quiz_job_async_concurrency)),
+            )
+        return self._async_services
+
+    async def _arun(self, job: dict[str, Any]) -> None:
+        wikipedia, llm_manager, slots = self._get_async_services()
+        writes = _SerialWrites()
+        async with slots:
+            try:
+                writes.submit(self._update, job, status="fetching_article")
+                article = await wikipedia.aget_article(job["page_id"])
+
+                writes.submit(self._update, job, status="generating")
+                progress = _JobProgress(self, job, article, write=writes.submit)
+                quiz, provider = await self.quiz_builder.abuild_quiz(
+                    topic=job["topic"],
+                    article=article,
+                    async_llm_manager=llm_manager,
+                    on_progress=progress.on_progress,
+                    on_question=progress.question_callback(),
+                )
+                progress.finish(quiz, provider)
+                await writes.drain()
+            except ValidationError:
+                await self._afail(writes, job, "Quiz generation returned invalid schema.")
+            except Exception:
+                await self._afail(writes, job, "Failed to create quiz. Try another topic.")
+
+    async def _afail(self, writes: _SerialWrites, job: dict[str, Any], message: str) -> None:
+        # Let queued writes settle first so a late session write cannot outlive the reset.
+        with contextlib.suppress(Exception):
+            await writes.drain()
+        await asyncio.to_thread(self._fail, job, message)
+
+    def _fail(self, job: dict[str, Any], message: str) -> None:
+        if job["session_id"] is not None:
+            # Drop the partially streamed session; it will never be completed.
+            self.session_store.reset_session(job["session_id"])
+        self._update(job, status="failed", message=message, session_id=None, questions_ready=0)
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from typing import Any, Callable, List
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.schemas import QuestionModel, QuizModel, QuizSource
+
+
+QUESTION_ADAPTER: TypeAdapter[Any] = TypeAdapter(QuestionModel)
+
+
+def partial_quiz(quiz_id: str, topic: str, source: QuizSource, questions: List[Any]) -> QuizModel:
+    # Skips the 15-question distribution check; each question was validated on arrival.
+    return QuizModel.model_construct(
+        quiz_id=quiz_id,
+        topic=topic,
+        source=source,
+        questions=list(questions),
+    )
+
+
+def partial_quiz_from_payload(payload: dict[str, Any]) -> QuizModel:
+    return partial_quiz(
+        quiz_id=payload["quiz_id"],
+        topic=payload["topic"],
+        source=QuizSource.model_validate(payload["source"]),
+        questions=[QUESTION_ADAPTER.validate_python(item) for item in payload["questions"]],
+    )
+
+
+class JsonArrayItemStream:
+    """
+    Incremental scanner over raw model output. `feed` returns the complete JSON text of each
+    object in the top-level `field` array as soon as its closing brace arrives. Text before the
+    first `{` (prose, code fences) is ignored.
+    """
+
+    def __init__(self, field: str) -> None:
+        self.field = field
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string: List[str] = []
+        self._last_key = ""
+        self._array_depth: int | None = None
+        self._item: List[str] | None = None
+
+    def feed(self, chunk: str) -> List[str]:
+        completed: List[str] = []
+        for char in chunk:
+            if self._item is not None:
+                self._item.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = "".join(self._string)
+                elif self._depth == 1:
+                    self._string.append(char)
+                continue
+
+            if self._depth == 0 and char != "{":
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string = []
+            elif char == "{" or char == "[":
+                self._depth += 1
+                if char == "[" and self._depth == 2 and self._last_key == self.field:
+                    self._array_depth = 2
+                elif (
+                    char == "{"
+                    and self._array_depth is not None
+                    and self._depth == self._array_depth + 1
+                ):
+                    self._item = ["{"]
+            elif char == "}" or char == "]":
+                if (
+                    char == "}"
+                    and self._item is not None
+                    and self._depth == (self._array_depth or 0) + 1
+                ):
+                    completed.append("".join(self._item))
+                    self._item = None
+                elif char == "]" and self._depth == self._array_depth:
+                    self._array_depth = None
+                self._depth -= 1
+        return completed
+
+
+class QuestionStream:
+    """
+    Validates each streamed question against its own model and hands valid ones to
+    `on_question`. Invalid or duplicate questions are skipped; the full quiz is still
+    validated (and repaired if needed) once the completion ends.
+    """
+
+    def __init__(self, on_question: Callable[[Any], None], max_questions: int = 15) -> None:
+        self.on_question = on_question
+        self.max_questions = max_questions
+        self._items = JsonArrayItemStream("questions")
+        self._seen_ids: set[str] = set()
+
+    def feed(self, chunk: str) -> None:
+        for item in self._items.feed(chunk):
+            if len(self._seen_ids) >= self.max_questions:
+                return
+            try:
+                question = QUESTION_ADAPTER.validate_json(item)
+            except ValidationError:
+                continue
+            if question.id in self._seen_ids:
+                continue
+            self._seen_ids.add(question.id)
+            self.on_question(question)
@@ -0,0 +1,744 @@
+from __future__ import annotations
+
+import copy
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Protocol
+
+from app.config import Settings
+from app.schemas import QuizModel
+from app.storage import SQLiteConnections
+from app.services.quiz_index import QuizIndex
+from app.services.quiz_stream import partial_quiz_from_payload
+
+
+# Recent answer changes kept per session for `?since=` delta sync on the state endpoint.
+ANSWER_CHANGE_RING_SIZE = 32
+
+
+class AnswerTable:
+    """
+    Per-session answer state as parallel arrays indexed by question position.
+    Attempts and flags fit in one byte each; the optional fields stay None until answered.
+    """
+
+    __slots__ = ("attempts", "flags", "selected_option_ids", "short_answers", "feedback")
+
+    CORRECT = 0x01
+    LOCKED = 0x02
+
+    def __init__(self, size: int) -> None:
+        self.attempts = bytearray(size)
+        self.flags = bytearray(size)
+        self.selected_option_ids: List[Optional[List[str]]] = [None] * size
+        self.short_answers: List[Optional[str]] = [None] * size
+        self.feedback: List[Optional[str]] = [None] * size
+
+    def __len__(self) -> int:
+        return len(self.attempts)
+
+    def is_correct(self, position: int) -> bool:
+        return bool(self.flags[position] & self.CORRECT)
+
+    def is_locked(self, position: int) -> bool:
+        return bool(self.flags[position] & self.LOCKED)
+
+    def record_attempt(
+        self,
+        position: int,
+        is_correct: bool,
+        locked: bool,
+        feedback: str,
+    ) -> None:
+        self.attempts[position] = min(255, self.attempts[position] + 1)
+        self.flags[position] = (self.CORRECT if is_correct else 0) | (self.LOCKED if locked else 0)
+        self.feedback[position] = feedback
+
+    def copy_row(self, source: "AnswerTable", source_position: int, position: int) -> None:
+        self.attempts[position] = source.attempts[source_position]
+        self.flags[position] = source.flags[source_position]
+        self.selected_option_ids[position] = source.selected_option_ids[source_position]
+        self.short_answers[position] = source.short_answers[source_position]
+        self.feedback[position] = source.feedback[source_position]
+
+    def copy(self) -> "AnswerTable":
+        table = AnswerTable(0)
+        table.attempts = bytearray(self.attempts)
+        table.flags = bytearray(self.flags)
+        table.selected_option_ids = list(self.selected_option_ids)
+        table.short_answers = list(self.short_answers)
+        table.feedback = list(self.feedback)
+        return table
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "attempts": list(self.attempts),
+            "flags": list(self.flags),
+            "selected_option_ids": self.selected_option_ids,
+            "short_answers": self.short_answers,
+            "feedback": self.feedback,
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> "AnswerTable":
+        table = cls(len(payload["attempts"]))
+        table.attempts[:] = bytes(payload["attempts"])
+        table.flags[:] = bytes(payload["flags"])
+        table.selected_option_ids = list(payload["selected_option_ids"])
+        table.short_answers = list(payload["short_answers"])
+        table.feedback = list(payload["feedback"])
+        return table
+
+    @classmethod
+    def from_legacy_rows(cls, rows: List[dict[str, Any]], index: QuizIndex) -> "AnswerTable":
+        """Answers saved before this table existed: one dict per answered question id."""
+        table = cls(len(index.keys))
+        for row in rows:
+            located = index.lookup(row["question_id"])
+            if located is None:
+                continue
+            position = located[0]
+            table.attempts[position] = min(255, int(row.get("attempts_used", 0)))
+            table.flags[position] = (cls.CORRECT if row.get("is_correct") else 0) | (
+                cls.LOCKED if row.get("locked") else 0
+            )
+            table.selected_option_ids[position] = row.get("selected_option_ids")
+            table.short_answers[position] = row.get("short_answer")
+            table.feedback[position] = row.get("feedback")
+        return table
+
+
+@dataclass(slots=True)
+class SessionRecord:
+    session_id: str
+    topic: str
+    quiz: QuizModel
+    answers: AnswerTable = field(init=False)
+    index: QuizIndex = field(init=False)
+    created_at: float = field(default_factory=time.time)
+    last_access_at: float = field(default_factory=time.time)
+    # False while questions are still streaming in from generation.
+    complete: bool = True
+    # Bumped on every persisted mutation; the state endpoint's ETag is derived from it.
+    version: int = 0
+    # (version, question id) of the most recent answer changes, cleared when the quiz changes.
+    changes: deque = field(default_factory=lambda: deque(maxlen=ANSWER_CHANGE_RING_SIZE))
+    quiz_json: bytes | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.index = QuizIndex.build(self.quiz)
+        self.answers = AnswerTable(len(self.index.keys))
+
+    def quiz_bytes(self) -> bytes:
+        """The quiz serialized once; it only changes through `replace_quiz`."""
+        if self.quiz_json is None:
+            self.quiz_json = self.quiz.model_dump_json().encode("utf-8")
+        return self.quiz_json
+
+    def copy(self) -> "SessionRecord":
+        """
+        Copy to mutate before a conditional save. The quiz, its index and the serialized quiz
+        are immutable and shared; answers and the change ring are copied.
+        """
+        clone = copy.copy(self)
+        clone.answers = self.answers.copy()
+        clone.changes = deque(self.changes, maxlen=ANSWER_CHANGE_RING_SIZE)
+        return clone
+
+    def note_answer_change(self, question_id: str) -> None:
+        self.version += 1
+        self.changes.append((self.version, question_id))
+
+    def changed_since(self, since: int) -> set[str] | None:
+        """
+        Question ids whose answers changed after version `since`, or None when the ring no longer
+        covers that version (too old, from before the last quiz update, or unknown).
+        """
+        if since == self.version:
+            return set()
+        if since > self.version or not self.changes or self.changes[0][0] > since + 1:
+            return None
+        return {question_id for version, question_id in self.changes if version > since}
+
+    def replace_quiz(self, quiz: QuizModel, complete: bool) -> None:
+        previous_quiz, previous_answers = self.quiz, self.answers
+        self.quiz = quiz
+        self.quiz_json = None
+        self.complete = complete
+        self.version += 1
+        self.changes.clear()
+        self.index = QuizIndex.build(quiz)
+        self.answers = AnswerTable(len(self.index.keys))
+        # Answers survive only for questions that are unchanged in the new quiz.
+        for previous_position, question in enumerate(previous_quiz.questions):
+            located = self.index.lookup(question.id)
+            if located is not None and located[1].question == question:
+                self.answers.copy_row(previous_answers, previous_position, located[0])
+
+
+@dataclass
+class SessionLimits:
+    """Zero disables the corresponding limit."""
+
+    ttl_seconds: int = 0
+    idle_ttl_seconds: int = 0
+    max_sessions: int = 0
+
+    def expired(self, record: SessionRecord, now: float) -> str | None:
+        if self.ttl_seconds and now - record.created_at >= self.ttl_seconds:
+            return "expired"
+        if self.idle_ttl_seconds and now - record.last_access_at >= self.idle_ttl_seconds:
+            return "idle"
+        return None
+
+
+class EvictionCounters:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts = {"expired": 0, "idle": 0, "lru": 0}
+
+    def add(self, reason: str, amount: int = 1) -> None:
+        if amount <= 0:
+            return
+        with self._lock:
+            self._counts[reason] = self._counts.get(reason, 0) + amount
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+def encode_record(record: SessionRecord) -> bytes:
+    payload = {
+        "session_id": record.session_id,
+        "topic": record.topic,
+        "created_at": record.created_at,
+        "last_access_at": record.last_access_at,
+        # Stored pre-serialized so a loaded record can serve it without re-dumping the model.
+        "quiz_json": record.quiz_bytes().decode("utf-8"),
+        "answers": record.answers.to_payload(),
+        "complete": record.complete,
+        "version": record.version,
+        "changes": list(record.changes),
+    }
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def decode_record(blob: bytes | str) -> SessionRecord:
+    payload = json.loads(blob)
+    now = time.time()
+    complete = bool(payload.get("complete", True))
+    quiz_json = payload.get("quiz_json")
+    if quiz_json is None:
+        # Records written before the quiz was stored pre-serialized.
+        quiz_json = json.dumps(payload["quiz"])
+    record = SessionRecord(
+        session_id=payload["session_id"],
+        topic=payload["topic"],
+        quiz=(
+            QuizModel.model_validate_json(quiz_json)
+            if complete
+            else partial_quiz_from_payload(json.loads(quiz_json))
+        ),
+        created_at=float(payload.get("created_at", now)),
+        last_access_at=float(payload.get("last_access_at", now)),
+        complete=complete,
+        version=int(payload.get("version", 0)),
+    )
+    record.changes.extend(
+        (int(version), question_id) for version, question_id in payload.get("changes", [])
+    )
+    if "quiz_json" in payload:
+        record.quiz_json = quiz_json.encode("utf-8")
+    answers = payload.get("answers", [])
+    if isinstance(answers, list):
+        record.answers = AnswerTable.from_legacy_rows(answers, record.index)
+    else:
+        record.answers = AnswerTable.from_payload(answers)
+    return record
+
+
+class SessionBackend(Protocol):
+    name: str
+    limits: SessionLimits
+    evictions: EvictionCounters
+
+    def load(self, session_id: str) -> SessionRecord | None:
+        ...
+
+    def save(self, record: SessionRecord, expected_version: int | None = None) -> bool:
+        """
+        Stores `record`. With `expected_version`, only if the stored record is still at that
+        version; returns False (and stores nothing) when another writer got there first.
+        """
+        ...
+
+    def version(self, session_id: str) -> int | None:
+        """
+        The stored record's version, or None if it is missing or expired. Never decodes the
+        record, so revalidating an unchanged state stays cheap.
+        """
+        ...
+
+    def touch(self, session_id: str) -> None:
+        """Records an access (for idle expiry and LRU) without decoding or rewriting the record."""
+        ...
+
+    def delete(self, session_id: str) -> None:
+        ...
+
+    def count(self) -> int:
+        ...
+
+    def sweep(self) -> None:
+        ...
+
+
+class MemorySessionBackend:
+    """
+    Process-local storage. Sessions are not shared across gunicorn workers.
+    Records are kept in access order so LRU eviction pops from the front.
+    """
+
+    name = "memory"
+
+    def __init__(self, limits: SessionLimits | None = None) -> None:
+        self.limits = limits or SessionLimits()
+        self.evictions = EvictionCounters()
+        self._lock = threading.Lock()
+        self._records: OrderedDict[str, SessionRecord] = OrderedDict()
+
+    def load(self, session_id: str) -> SessionRecord | None:
+        now = time.time()
+        with self._lock:
+            record = self._records.get(session_id)
+            if record is None:
+                return None
+            reason = self.limits.expired(record, now)
+            if reason:
+                del self._records[session_id]
+                self.evictions.add(reason)
+                return None
+            record.last_access_at = now
+            self._records.move_to_end(session_id)
+            return record
+
+    def save(self, record: SessionRecord, expected_version: int | None = None) -> bool:
+        with self._lock:
+            if expected_version is not None:
+                current = self._records.get(record.session_id)
+                if current is None or current.version != expected_version:
+                    return False
+            self._records[record.session_id] = record
+            self._records.move_to_end(record.session_id)
+            overflow = 0
+            if self.limits.max_sessions:
+                while len(self._records) > self.limits.max_sessions:
+                    self._records.popitem(last=False)
+                    overflow += 1
+        self.evictions.add("lru", overflow)
+        return True
+
+    def version(self, session_id: str) -> int | None:
+        with self._lock:
+            record = self._records.get(session_id)
+            if record is None or self.limits.expired(record, time.time()):
+                return None
+            return record.version
+
+    def touch(self, session_id: str) -> None:
+        with self._lock:
+            record = self._records.get(session_id)
+            if record is not None:
+                record.last_access_at = time.time()
+                self._records.move_to_end(session_id)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._records.pop(session_id, None)
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    def sweep(self) -> None:
+        now = time.time()
+        with self._lock:
+            stale = [
+                (session_id, reason)
+                for session_id, record in self._records.items()
+                if (reason := self.limits.expired(record, now))
+            ]
+            for session_id, _reason in stale:
+                del self._records[session_id]
+        for _session_id, reason in stale:
+            self.evictions.add(reason)
+
+
+class SQLiteSessionBackend:
+    """
+    Shared on-disk storage for multiple worker processes on one host.
+    WAL mode lets readers proceed while another worker commits an update.
+    The session cap is enforced by the periodic sweep, not on every insert.
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path: str,
+        limits: SessionLimits | None = None,
+        busy_timeout_ms: int = 5000,
+    ) -> None:
+        self.limits = limits or SessionLimits()
+        self.evictions = EvictionCounters()
+        self._connections = SQLiteConnections(path, busy_timeout_ms=busy_timeout_ms)
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, "
+            "payload BLOB NOT NULL, "
+            "created_at REAL NOT NULL DEFAULT 0, "
+            "accessed_at REAL NOT NULL DEFAULT 0, "
+            "version INTEGER NOT NULL DEFAULT 0"
+            ")"
+        )
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(sessions)")}
+        for column in ("created_at", "accessed_at"):
+            if column not in columns:
+                connection.execute(
+                    f"ALTER TABLE sessions ADD COLUMN {column} REAL NOT NULL DEFAULT 0"
+                )
+        if "version" not in columns:
+            connection.execute(
+                "ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+            )
+            # Conditional saves compare against this column, so seed it from the payloads.
+            connection.execute(
+                "UPDATE sessions SET version = "
+                "COALESCE(json_extract(CAST(payload AS TEXT), '$.version'), 0)"
+            )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_accessed_at ON sessions (accessed_at)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._connections.connection()
+
+    def load(self, session_id: str) -> SessionRecord | None:
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT payload, accessed_at FROM sessions WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        record = decode_record(row[0])
+        # Reads refresh only the column; the payload's copy is as of the last save.
+        record.last_access_at = max(record.last_access_at, float(row[1]))
+        now = time.time()
+        reason = self.limits.expired(record, now)
+        if reason:
+            self.delete(session_id)
+            self.evictions.add(reason)
+            return None
+        record.last_access_at = now
+        connection.execute(
+            "UPDATE sessions SET accessed_at = ? WHERE session_id = ?",
+            (now, session_id),
+        )
+        return record
+
+    def save(self, record: SessionRecord, expected_version: int | None = None) -> bool:
+        if expected_version is not None:
+            cursor = self._connection().execute(
+                "UPDATE sessions SET payload = ?, accessed_at = ?, version = ? "
+                "WHERE session_id = ? AND version = ?",
+                (
+                    encode_record(record),
+                    record.last_access_at,
+                    record.version,
+                    record.session_id,
+                    expected_version,
+                ),
+            )
+            return cursor.rowcount == 1
+        self._connection().execute(
+            "INSERT INTO sessions (session_id, payload, created_at, accessed_at, version) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET "
+            "payload = excluded.payload, accessed_at = excluded.accessed_at, "
+            "version = excluded.version",
+            (
+                record.session_id,
+                encode_record(record),
+                record.created_at,
+                record.last_access_at,
+                record.version,
+            ),
+        )
+        return True
+
+    def version(self, session_id: str) -> int | None:
+        row = self._connection().execute(
+            "SELECT version, created_at, accessed_at FROM sessions WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if self.limits.ttl_seconds and now - row[1] >= self.limits.ttl_seconds:
+            return None
+        if self.limits.idle_ttl_seconds and now - row[2] >= self.limits.idle_ttl_seconds:
+            return None
+        return int(row[0])
+
+    def touch(self, session_id: str) -> None:
+        self._connection().execute(
+            "UPDATE sessions SET accessed_at = ? WHERE session_id = ?",
+            (time.time(), session_id),
+        )
+
+    def delete(self, session_id: str) -> None:
+        self._connection().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def count(self) -> int:
+        row = self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()
+        return int(row[0]) if row else 0
+
+    def sweep(self) -> None:
+        connection = self._connection()
+        now = time.time()
+        if self.limits.ttl_seconds:
+            cursor = connection.execute(
+                "DELETE FROM sessions WHERE created_at <= ?",
+                (now - self.limits.ttl_seconds,),
+            )
+            self.evictions.add("expired", cursor.rowcount)
+        if self.limits.idle_ttl_seconds:
+            cursor = connection.execute(
+                "DELETE FROM sessions WHERE accessed_at <= ?",
+                (now - self.limits.idle_ttl_seconds,),
+            )
+            self.evictions.add("idle", cursor.rowcount)
+        if self.limits.max_sessions:
+            overflow = self.count() - self.limits.max_sessions
+            if overflow > 0:
+                cursor = connection.execute(
+                    "DELETE FROM sessions WHERE session_id IN ("
+                    "SELECT session_id FROM sessions ORDER BY accessed_at LIMIT ?"
+                    ")",
+                    (overflow,),
+                )
+                self.evictions.add("lru", cursor.rowcount)
+
+
+class RedisSessionBackend:
+    """
+    Storage on any Redis-protocol server (Redis, Valkey, KeyDB, ...) reachable from all workers.
+    Key TTLs bound memory even if no sweep runs; two sorted sets (by creation and by last
+    access) let the sweep account for evictions and enforce the session cap. Each record's
+    version also lives in its own key, so conditional saves can WATCH it without decoding.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        url: str,
+        limits: SessionLimits | None = None,
+        key_prefix: str = "quiz-me:session:",
+    ) -> None:
+        try:
+            import redis
+        except ImportError as exc:  # pragma: no cover - depends on deployment extras
+            raise RuntimeError(
+                "SESSION_BACKEND=redis requires the 'redis' package to be installed"
+            ) from exc
+
+        self.limits = limits or SessionLimits()
+        self.evictions = EvictionCounters()
+        self.key_prefix = key_prefix
+        self.accessed_key = f"{key_prefix}index:accessed"
+        self.created_key = f"{key_prefix}index:created"
+        self._client: Any = redis.Redis.from_url(url)
+        self._watch_error = redis.WatchError
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}"
+
+    def _version_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}:version"
+
+    def _stored_version(self, client: Any, session_id: str) -> int | None:
+        raw = client.get(self._version_key(session_id))
+        if raw is not None:
+            return int(raw)
+        blob = client.get(self._key(session_id))
+        if blob is None:
+            return None
+        # Written before the version had its own key.
+        return int(json.loads(blob).get("version", 0))
+
+    def _expiry_seconds(self, created_at: float, now: float) -> int | None:
+        candidates = []
+        if self.limits.ttl_seconds:
+            candidates.append(created_at + self.limits.ttl_seconds - now)
+        if self.limits.idle_ttl_seconds:
+            candidates.append(float(self.limits.idle_ttl_seconds))
+        if not candidates:
+            return None
+        return max(1, int(min(candidates)))
+
+    def load(self, session_id: str) -> SessionRecord | None:
+        pipeline = self._client.pipeline(transaction=False)
+        pipeline.get(self._key(session_id))
+        pipeline.zscore(self.accessed_key, session_id)
+        blob, accessed_at = pipeline.execute()
+        if blob is None:
+            return None
+        record = decode_record(blob)
+        # Reads refresh only the index score; the payload's copy is as of the last save.
+        if accessed_at is not None:
+            record.last_access_at = max(record.last_access_at, float(accessed_at))
+        now = time.time()
+        reason = self.limits.expired(record, now)
+        if reason:
+            self.delete(session_id)
+            self.evictions.add(reason)
+            return None
+        record.last_access_at = now
+        pipeline = self._client.pipeline(transaction=False)
+        expiry = self._expiry_seconds(record.created_at, now)
+        if expiry is not None:
+            pipeline.expire(self._key(session_id), expiry)
+            pipeline.expire(self._version_key(session_id), expiry)
+        pipeline.zadd(self.accessed_key, {session_id: now})
+        pipeline.execute()
+        return record
+
+    def _queue_save(self, pipeline: Any, record: SessionRecord) -> None:
+        expiry = self._expiry_seconds(record.created_at, time.time())
+        pipeline.set(self._key(record.session_id), encode_record(record), ex=expiry)
+        pipeline.set(self._version_key(record.session_id), record.version, ex=expiry)
+        pipeline.zadd(self.accessed_key, {record.session_id: record.last_access_at})
+        pipeline.zadd(self.created_key, {record.session_id: record.created_at})
+
+    def save(self, record: SessionRecord, expected_version: int | None = None) -> bool:
+        if expected_version is None:
+            pipeline = self._client.pipeline(transaction=True)
+            self._queue_save(pipeline, record)
+            pipeline.execute()
+            return True
+        watched = (self._key(record.session_id), self._version_key(record.session_id))
+        with self._client.pipeline(transaction=True) as pipeline:
+            try:
+                pipeline.watch(*watched)
+                if self._stored_version(pipeline, record.session_id) != expected_version:
+                    pipeline.unwatch()
+                    return False
+                pipeline.multi()
+                self._queue_save(pipeline, record)
+                pipeline.execute()
+            except self._watch_error:
+                return False
+        return True
+
+    def version(self, session_id: str) -> int | None:
+        # The version key carries the record's expiry, so a live key means a live session.
+        return self._stored_version(self._client, session_id)
+
+    def touch(self, session_id: str) -> None:
+        now = time.time()
+        created_at = self._client.zscore(self.created_key, session_id)
+        if created_at is None:
+            return
+        pipeline = self._client.pipeline(transaction=False)
+        expiry = self._expiry_seconds(float(created_at), now)
+        if expiry is not None:
+            pipeline.expire(self._key(session_id), expiry)
+            pipeline.expire(self._version_key(session_id), expiry)
+        pipeline.zadd(self.accessed_key, {session_id: now}, xx=True)
+        pipeline.execute()
+
+    def delete(self, session_id: str) -> None:
+        pipeline = self._client.pipeline(transaction=True)
+        pipeline.delete(self._key(session_id), self._version_key(session_id))
+        pipeline.zrem(self.accessed_key, session_id)
+        pipeline.zrem(self.created_key, session_id)
+        pipeline.execute()
+
+    def count(self) -> int:
+        # Read-only (health checks and scrapes call it): keys expire on their own but stay in
+        # the indexes until the sweep, so only members still inside both limits are counted.
+        now = time.time()
+        idle_cutoff = now - self.limits.idle_ttl_seconds if self.limits.idle_ttl_seconds else None
+        live = int(
+            self._client.zcount(
+                self.accessed_key, "-inf" if idle_cutoff is None else f"({idle_cutoff}", "+inf"
+            )
+        )
+        if self.limits.ttl_seconds:
+            expired = self._client.zrangebyscore(
+                self.created_key, "-inf", now - self.limits.ttl_seconds
+            )
+            if expired:
+                for score in self._client.zmscore(self.accessed_key, expired):
+                    if score is not None and (idle_cutoff is None or score > idle_cutoff):
+                        live -= 1
+        return live
+
+    def _evict(self, session_ids: list[Any], reason: str) -> None:
+        if not session_ids:
+            return
+        decoded = [
+            item.decode("utf-8") if isinstance(item, bytes) else str(item) for item in session_ids
+        ]
+        pipeline = self._client.pipeline(transaction=False)
+        pipeline.delete(
+            *[self._key(session_id) for session_id in decoded],
+            *[self._version_key(session_id) for session_id in decoded],
+        )
+        pipeline.zrem(self.accessed_key, *decoded)
+        pipeline.zrem(self.created_key, *decoded)
+        pipeline.execute()
+        self.evictions.add(reason, len(decoded))
+
+    def _evict_expired(self, now: float) -> None:
+        if self.limits.ttl_seconds:
+            self._evict(
+                self._client.zrangebyscore(self.created_key, "-inf", now - self.limits.ttl_seconds),
+                "expired",
+            )
+        if self.limits.idle_ttl_seconds:
+            self._evict(
+                self._client.zrangebyscore(
+                    self.accessed_key, "-inf", now - self.limits.idle_ttl_seconds
+                ),
+                "idle",
+            )
+
+    def sweep(self) -> None:
+        self._evict_expired(time.time())
+        if self.limits.max_sessions:
+            overflow = int(self._client.zcard(self.accessed_key)) - self.limits.max_sessions
+            if overflow > 0:
+                self._evict(self._client.zrange(self.accessed_key, 0, overflow - 1), "lru")
+
+
+def build_session_backend(settings: Settings) -> SessionBackend:
+    limits = SessionLimits(
+        ttl_seconds=max(0, settings.session_ttl_seconds),
+        idle_ttl_seconds=max(0, settings.session_idle_ttl_seconds),
+        max_sessions=max(0, settings.session_max_count),
+    )
+    backend = settings.session_backend
+    if backend == "sqlite":
+        return SQLiteSessionBackend(path=settings.session_sqlite_path, limits=limits)
+    if backend == "redis":
+        return RedisSessionBackend(url=settings.session_redis_url, limits=limits)
+    return MemorySessionBackend(limits=limits)
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import re
+import json
 import threading
+import time
 import uuid
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Any, Dict
 
 from app.config import Settings
 from app.schemas import (
@@ -14,150 +14,278 @@ from app.schemas import (
     MCQMultiQuestion,
     MCQSingleQuestion,
     QuizModel,
+    SessionStateDeltaResponse,
     SessionStateResponse,
     ShortTextQuestion,
 )
+from app.services.leak_detector import LeakDetector
 from app.services.quiz_builder import QuizBuilderService
+from app.services.session_backends import (
+    SessionBackend,
+    SessionRecord,
+    build_session_backend,
+)
+from app.timing import span
 
 
 MAX_ATTEMPTS_PER_QUESTION = 3
+# Conditional saves retried against a fresh copy before giving up with a conflict.
+SAVE_ATTEMPTS = 5
 GENERIC_INCORRECT_FEEDBACK = (
     "That's not correct. Re-read the question and source context, then try again."
 )
 
 
-@dataclass
-class SessionAnswer:
-    question_id: str
-    attempts_used: int = 0
-    is_correct: bool = False
-    locked: bool = False
-    selected_option_ids: Optional[List[str]] = None
-    short_answer: Optional[str] = None
-    feedback: Optional[str] = None
-
-
-@dataclass
-class SessionRecord:
-    session_id: str
-    topic: str
-    quiz: QuizModel
-    answers: Dict[str, SessionAnswer] = field(default_factory=dict)
+class SessionConflictError(RuntimeError):
+    """Concurrent writers kept updating a session faster than this update could be applied."""
 
 
 class SessionStore:
-    def __init__(self, settings: Settings, quiz_builder: QuizBuilderService) -> None:
+    def __init__(
+        self,
+        settings: Settings,
+        quiz_builder: QuizBuilderService,
+        backend: SessionBackend | None = None,
+    ) -> None:
         self.settings = settings
         self.quiz_builder = quiz_builder
-        self._lock = threading.Lock()
-        self._sessions: Dict[str, SessionRecord] = {}
-
-    def create_session(self, topic: str, quiz: QuizModel) -> str:
+        self.backend = backend or build_session_backend(settings)
+        self._sweep_lock = threading.Lock()
+        self._last_sweep_at = time.monotonic()
+
+    def _maybe_sweep(self) -> None:
+        # Amortized sweeper: at most one request per interval pays for the scan.
+        interval = self.settings.session_sweep_interval_seconds
+        if interval <= 0 or time.monotonic() - self._last_sweep_at < interval:
+            return
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep_at = time.monotonic()
+            self.backend.sweep()
+        finally:
+            self._sweep_lock.release()
+
+    def stats(self) -> dict:
+        evictions = self.backend.evictions.snapshot()
+        return {
+            "backend": self.backend.name,
+            "active_sessions": self.backend.count(),
+            "evicted_expired": evictions.get("expired", 0),
+            "evicted_idle": evictions.get("idle", 0),
+            "evicted_lru": evictions.get("lru", 0),
+        }
+
+    def create_session(self, topic: str, quiz: QuizModel, complete: bool = True) -> str:
+        self._maybe_sweep()
         session_id = uuid.uuid4().hex
-        record = SessionRecord(session_id=session_id, topic=topic, quiz=quiz)
-        for question in quiz.questions:
-            record.answers[question.id] = SessionAnswer(question_id=question.id)
+        record = SessionRecord(session_id=session_id, topic=topic, quiz=quiz, complete=complete)
 
-        with self._lock:
-            self._sessions[session_id] = record
+        with span("session_store"):
+            self.backend.save(record)
         return session_id
 
+    def update_quiz(self, session_id: str, quiz: QuizModel, complete: bool = True) -> None:
+        for _attempt in range(SAVE_ATTEMPTS):
+            record = self.get_session(session_id)
+            updated = record.copy()
+            updated.replace_quiz(quiz, complete=complete)
+            with span("session_store"):
+                if self.backend.save(updated, expected_version=record.version):
+                    return
+        raise SessionConflictError(session_id)
+
     def get_session(self, session_id: str) -> SessionRecord:
-        with self._lock:
-            record = self._sessions.get(session_id)
+        self._maybe_sweep()
+        with span("session_store"):
+            record = self.backend.load(session_id)
         if not record:
             raise KeyError("Session not found")
         return record
 
-    def reset_session(self, session_id: str) -> None:
-        with self._lock:
-            if session_id in self._sessions:
-                del self._sessions[session_id]
+    def current_version(self, session_id: str) -> int | None:
+        """Version of a live session without loading it; None if it does not exist."""
+        with span("session_store"):
+            return self.backend.version(session_id)
 
-    def _question_by_id(self, quiz: QuizModel, question_id: str):
-        for question in quiz.questions:
-            if question.id == question_id:
-                return question
-        return None
+    def touch_session(self, session_id: str) -> None:
+        """Counts a revalidated (304) read as an access without loading the session."""
+        with span("session_store"):
+            self.backend.touch(session_id)
 
-    def _answer_revealed(
-        self,
-        feedback: str,
-        sensitive_tokens: list[str] | None = None,
-    ) -> bool:
-        text = feedback.strip().lower()
-        if not text:
-            return True
-
-        reveal_patterns = [
-            r"\bcorrect answer\b",
-            r"\bexpected answer\b",
-            r"\bthe answer is\b",
-            r"\boption\s+[a-z0-9]+\s+is correct\b",
-            r"\bshould be\b",
-            r"\bmust be\b",
-            r"\bresponse does not match\b",
-            r"\bmatches the expected\b",
-        ]
-        for pattern in reveal_patterns:
-            if re.search(pattern, text):
-                return True
-
-        for token in sensitive_tokens or []:
-            cleaned = token.strip().lower()
-            if len(cleaned) < 2:
-                continue
-            if cleaned in text:
-                return True
-        return False
+    def reset_session(self, session_id: str) -> None:
+        self.backend.delete(session_id)
 
     def _safe_incorrect_feedback(
         self,
         raw_feedback: str,
-        sensitive_tokens: list[str] | None = None,
+        leak_detector: LeakDetector,
     ) -> str:
         candidate = (raw_feedback or "").strip()
         if not candidate:
             return GENERIC_INCORRECT_FEEDBACK
-        if self._answer_revealed(candidate, sensitive_tokens=sensitive_tokens):
+        if leak_detector.revealed(candidate):
             return GENERIC_INCORRECT_FEEDBACK
         return candidate
 
-    def _build_state(self, record: SessionRecord) -> SessionStateResponse:
+    def _summarize(self, record: SessionRecord) -> tuple[int, int, Dict[str, Dict[str, Any]]]:
+        """Score, current index and the per-question answer fields of a session."""
         score = 0
-        answers_payload: Dict[str, AnswerState] = {}
+        answers_payload: Dict[str, Dict[str, Any]] = {}
         current_index = 0
         first_unlocked_found = False
 
+        answers = record.answers
         for index, question in enumerate(record.quiz.questions):
-            answer = record.answers[question.id]
-            if answer.is_correct:
+            attempts_used = answers.attempts[index]
+            is_correct = answers.is_correct(index)
+            locked = answers.is_locked(index)
+            if is_correct:
                 score += 1
-            attempts_remaining = max(0, MAX_ATTEMPTS_PER_QUESTION - answer.attempts_used)
-            answers_payload[question.id] = AnswerState(
-                question_id=question.id,
-                attempts_used=answer.attempts_used,
-                attempts_remaining=attempts_remaining,
-                is_correct=answer.is_correct,
-                locked=answer.locked,
-                selected_option_ids=answer.selected_option_ids,
-                short_answer=answer.short_answer,
-                feedback=answer.feedback,
-            )
-            if not first_unlocked_found and not answer.locked:
+            answers_payload[question.id] = {
+                "question_id": question.id,
+                "attempts_used": attempts_used,
+                "attempts_remaining": max(0, MAX_ATTEMPTS_PER_QUESTION - attempts_used),
+                "is_correct": is_correct,
+                "locked": locked,
+                "selected_option_ids": answers.selected_option_ids[index],
+                "short_answer": answers.short_answers[index],
+                "feedback": answers.feedback[index],
+            }
+            if not first_unlocked_found and not locked:
                 first_unlocked_found = True
                 current_index = index
 
         if not first_unlocked_found:
             current_index = len(record.quiz.questions) - 1
+        return score, current_index, answers_payload
 
-        return SessionStateResponse(
+    def _build_state(self, record: SessionRecord) -> SessionStateResponse:
+        score, current_index, answers_payload = self._summarize(record)
+        # Values come from our own table, so skip pydantic validation when building the response.
+        return SessionStateResponse.model_construct(
             session_id=record.session_id,
             score=score,
             total_questions=len(record.quiz.questions),
             current_index=current_index,
-            answers=answers_payload,
+            answers={
+                question_id: AnswerState.model_construct(**fields)
+                for question_id, fields in answers_payload.items()
+            },
             quiz=record.quiz,
+            complete=record.complete,
+            version=record.version,
+        )
+
+    @staticmethod
+    def state_etag(session_id: str, version: int) -> str:
+        return f"{session_id}-{version}"
+
+    def render_state(self, record: SessionRecord) -> bytes:
+        """
+        `SessionStateResponse` as JSON bytes. Only the answers and score are serialized per call;
+        the quiz is spliced in from the record's cached bytes.
+        """
+        score, current_index, answers_payload = self._summarize(record)
+        head = json.dumps(
+            {
+                "session_id": record.session_id,
+                "score": score,
+                "total_questions": len(record.quiz.questions),
+                "current_index": current_index,
+                "answers": answers_payload,
+                "complete": record.complete,
+                "version": record.version,
+            },
+            separators=(",", ":"),
+        )
+        return head[:-1].encode("utf-8") + b',"quiz":' + record.quiz_bytes() + b"}"
+
+    def render_state_delta(self, record: SessionRecord, since: int) -> bytes | None:
+        """
+        `SessionStateDeltaResponse` with only the answers changed after `since`, or None when the
+        session's change ring cannot answer that and the caller must send the full state.
+        """
+        changed = record.changed_since(since)
+        if changed is None:
+            return None
+        score, current_index, answers_payload = self._summarize(record)
+        delta = SessionStateDeltaResponse.model_construct(
+            session_id=record.session_id,
+            since=since,
+            version=record.version,
+            score=score,
+            total_questions=len(record.quiz.questions),
+            current_index=current_index,
+            answers={
+                question_id: AnswerState.model_construct(**fields)
+                for question_id, fields in answers_payload.items()
+                if question_id in changed
+            },
+            complete=record.complete,
+        )
+        return delta.__pydantic_serializer__.to_json(delta)
+
+    def _record_attempt(
+        self,
+        record: SessionRecord,
+        question_id: str,
+        is_correct: bool,
+        feedback: str,
+        selected_option_ids: list[str] | None,
+        short_answer: str | None,
+    ) -> tuple[SessionRecord, int, bool] | None:
+        """
+        Applies one graded attempt with a conditional save, re-reading the session whenever
+        another request saved it first. Returns the latest record, the question's position and
+        whether the attempt was applied (False if a concurrent attempt locked the question), or
+        None if a quiz update removed the question.
+        """
+        for _attempt in range(SAVE_ATTEMPTS):
+            located = record.index.lookup(question_id)
+            if located is None:
+                return None
+            position = located[0]
+            if record.answers.is_locked(position):
+                return record, position, False
+
+            updated = record.copy()
+            answers = updated.answers
+            if selected_option_ids is not None:
+                answers.selected_option_ids[position] = selected_option_ids
+            if short_answer is not None:
+                answers.short_answers[position] = short_answer
+            locked = is_correct or answers.attempts[position] + 1 >= MAX_ATTEMPTS_PER_QUESTION
+            answers.record_attempt(position, is_correct=is_correct, locked=locked, feedback=feedback)
+            updated.note_answer_change(question_id)
+            with span("session_store"):
+                if self.backend.save(updated, expected_version=record.version):
+                    return updated, position, True
+            record = self.get_session(record.session_id)
+        raise SessionConflictError(record.session_id)
+
+    @staticmethod
+    def _question_not_found() -> AnswerSubmissionResponse:
+        return AnswerSubmissionResponse(
+            status="invalid",
+            attempts_used=0,
+            attempts_remaining=0,
+            is_correct=False,
+            locked=False,
+            feedback="Question not found.",
+        )
+
+    @staticmethod
+    def _locked_response(record: SessionRecord, position: int) -> AnswerSubmissionResponse:
+        answers = record.answers
+        attempts_used = answers.attempts[position]
+        return AnswerSubmissionResponse(
+            status="locked",
+            attempts_used=attempts_used,
+            attempts_remaining=max(0, MAX_ATTEMPTS_PER_QUESTION - attempts_used),
+            is_correct=answers.is_correct(position),
+            locked=True,
+            feedback=answers.feedback[position] or "Question is locked.",
         )
 
     def get_state(self, session_id: str) -> SessionStateResponse:
@@ -168,49 +296,33 @@ class SessionStore:
         self, session_id: str, payload: AnswerSubmissionRequest
     ) -> AnswerSubmissionResponse:
         record = self.get_session(session_id)
-        question = self._question_by_id(record.quiz, payload.question_id)
-        if question is None:
-            return AnswerSubmissionResponse(
-                status="invalid",
-                attempts_used=0,
-                attempts_remaining=0,
-                is_correct=False,
-                locked=False,
-                feedback="Question not found.",
-            )
-
-        answer = record.answers[payload.question_id]
-        if answer.locked:
-            attempts_remaining = max(0, MAX_ATTEMPTS_PER_QUESTION - answer.attempts_used)
-            return AnswerSubmissionResponse(
-                status="locked",
-                attempts_used=answer.attempts_used,
-                attempts_remaining=attempts_remaining,
-                is_correct=answer.is_correct,
-                locked=True,
-                feedback=answer.feedback or "Question is locked.",
-            )
+        located = record.index.lookup(payload.question_id)
+        if located is None:
+            return self._question_not_found()
+
+        position, key = located
+        question = key.question
+        answers = record.answers
+        attempts_used = answers.attempts[position]
+        selected_option_ids: list[str] | None = None
+        short_answer_value: str | None = None
+        if answers.is_locked(position):
+            return self._locked_response(record, position)
 
         if isinstance(question, MCQSingleQuestion):
             selected = payload.selected_option_ids or []
             if len(selected) != 1:
                 return AnswerSubmissionResponse(
                     status="invalid",
-                    attempts_used=answer.attempts_used,
-                    attempts_remaining=max(0, MAX_ATTEMPTS_PER_QUESTION - answer.attempts_used),
+                    attempts_used=attempts_used,
+                    attempts_remaining=max(0, MAX_ATTEMPTS_PER_QUESTION - attempts_used),
                     is_correct=False,
                     locked=False,
                     feedback="Select exactly one option.",
                 )
 
             chosen = selected[0]
-            is_correct = chosen in question.correct_option_ids
-            correct_option_texts = [
-                option.text
-                for option in question.options
-                if option.id in set(question.correct_option_ids)
-            ]
-            sensitive_tokens = question.correct_option_ids + correct_option_texts
+            is_correct = chosen in key.correct_ids
             feedback = (
                 "Correct answer."
                 if is_correct
@@ -219,56 +331,55 @@ class SessionStore:
                         chosen,
                         "That option is not correct for this question.",
                     ),
-                    sensitive_tokens=sensitive_tokens,
+                    leak_detector=key.leak_detector,
                 )
             )
-            answer.selected_option_ids = selected
+            selected_option_ids = selected
 
         elif isinstance(question, MCQMultiQuestion):
             selected = sorted(set(payload.selected_option_ids or []))
             if not selected:
                 return AnswerSubmissionResponse(
                     status="invalid",
-                    attempts_used=answer.attempts_used,
-                    attempts_remaining=max(0, MAX_ATTEMPTS_PER_QUESTION - answer.attempts_used),
+                    attempts_used=attempts_used,
+                    attempts_remaining=max(0, MAX_ATTEMPTS_PER_QUESTION - attempts_used),
                     is_correct=False,
                     locked=False,
                     feedback="Select one or more options.",
                 )
 
-            expected = sorted(set(question.correct_option_ids))
-            is_correct = selected == expected
-            correct_option_texts = [
-                option.text for option in question.options if option.id in set(expected)
-            ]
-            sensitive_tokens = expected + correct_option_texts
+            is_correct = key.correct_ids.issuperset(selected) and len(selected) == len(
+                key.correct_ids
+            )
             if is_correct:
                 feedback = "Correct answer set selected."
             else:
                 wrong_items = [
-                    question.distractor_feedback.get(item, "") for item in selected if item not in expected
+                    question.distractor_feedback.get(item, "")
+                    for item in selected
+                    if item not in key.correct_ids
                 ]
                 wrong_items = [item for item in wrong_items if item]
                 feedback = (
                     self._safe_incorrect_feedback(
                         wrong_items[0],
-                        sensitive_tokens=sensitive_tokens,
+                        leak_detector=key.leak_detector,
                     )
                     if wrong_items
                     else self._safe_incorrect_feedback(
                         "The selected set is not correct. Review and try again.",
-                        sensitive_tokens=sensitive_tokens,
+                        leak_detector=key.leak_detector,
                     )
                 )
-            answer.selected_option_ids = selected
+            selected_option_ids = selected
 
         elif isinstance(question, ShortTextQuestion):
             short_answer = (payload.short_answer or "").strip()
             if not short_answer:
                 return AnswerSubmissionResponse(
                     status="invalid",
-                    attempts_used=answer.attempts_used,
-                    attempts_remaining=max(0, MAX_ATTEMPTS_PER_QUESTION - answer.attempts_used),
+                    attempts_used=attempts_used,
+                    attempts_remaining=max(0, MAX_ATTEMPTS_PER_QUESTION - attempts_used),
                     is_correct=False,
                     locked=False,
                     feedback="Enter a short answer before checking.",
@@ -289,33 +400,46 @@ class SessionStore:
                 if is_correct
                 else self._safe_incorrect_feedback(
                     grade.reason,
-                    sensitive_tokens=question.expected_answers,
+                    leak_detector=key.leak_detector,
                 )
             )
-            answer.short_answer = short_answer
+            short_answer_value = short_answer
 
         else:
             return AnswerSubmissionResponse(
                 status="error",
-                attempts_used=answer.attempts_used,
-                attempts_remaining=max(0, MAX_ATTEMPTS_PER_QUESTION - answer.attempts_used),
+                attempts_used=attempts_used,
+                attempts_remaining=max(0, MAX_ATTEMPTS_PER_QUESTION - attempts_used),
                 is_correct=False,
                 locked=False,
                 feedback="Unsupported question type.",
             )
 
-        answer.attempts_used += 1
-        answer.is_correct = is_correct
-        if is_correct or answer.attempts_used >= MAX_ATTEMPTS_PER_QUESTION:
-            answer.locked = True
-        answer.feedback = feedback
-
-        attempts_remaining = max(0, MAX_ATTEMPTS_PER_QUESTION - answer.attempts_used)
+        # The record may have changed while this answer was graded (another attempt, or more
+        # questions streaming in); the attempt is applied to the latest saved version.
+        saved = self._record_attempt(
+            record,
+            question.id,
+            is_correct,
+            feedback,
+            selected_option_ids,
+            short_answer_value,
+        )
+        if saved is None:
+            # A quiz update removed the question while it was graded; nothing was saved.
+            return self._question_not_found()
+        latest, position, applied = saved
+        if not applied:
+            return self._locked_response(latest, position)
+        attempts_used = latest.answers.attempts[position]
+        locked = latest.answers.is_locked(position)
+
+        attempts_remaining = max(0, MAX_ATTEMPTS_PER_QUESTION - attempts_used)
         return AnswerSubmissionResponse(
             status="accepted",
-            attempts_used=answer.attempts_used,
+            attempts_used=attempts_used,
             attempts_remaining=attempts_remaining,
-            is_correct=answer.is_correct,
-            locked=answer.locked,
+            is_correct=is_correct,
+            locked=locked,
             feedback=feedback,
         )
@@ -5,6 +5,7 @@ import re
 from app.config import Settings
 from app.providers.base import LLMError
 from app.providers.manager import LLMManager
+from app.providers.schema_registry import schema_registry
 from app.schemas import TopicGuardrailResult
 
 
@@ -12,6 +13,7 @@ class TopicGuardrailService:
     def __init__(self, settings: Settings, llm_manager: LLMManager) -> None:
         self.settings = settings
         self.llm_manager = llm_manager
+        schema_registry.warm(TopicGuardrailResult)
 
     def _heuristic(self, topic: str) -> TopicGuardrailResult:
         blocked_patterns = [
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from urllib.parse import quote
 
-import requests
-
+from app.cache import SQLiteCacheTier, TTLCache
 from app.config import Settings
+from app.http import HttpSessionPool
+from app.timing import span
+
+
+class _TransientWikiError(Exception):
+    """Raised inside cache loaders so throttling and server errors are not cached."""
 
 
 @dataclass
@@ -29,20 +35,79 @@ class WikiArticle:
     image_url: Optional[str]
     image_caption: Optional[str]
     extract: str
+    revision_id: Optional[int] = None
 
 
 class WikipediaService:
-    def __init__(self, settings: Settings) -> None:
+    def __init__(self, settings: Settings, http: HttpSessionPool | None = None) -> None:
         self.settings = settings
+        self.http = http or HttpSessionPool.from_settings(settings)
         self.lang = settings.wiki_lang
         self.api_base = f"https://{self.lang}.wikipedia.org"
+        self.session = self.http.session_for(self.api_base)
         self.headers = {
             "User-Agent": settings.wiki_user_agent,
             "Accept": "application/json",
         }
+        self.cache: TTLCache | None = None
+        if settings.wiki_cache_enabled:
+            disk = (
+                SQLiteCacheTier(settings.wiki_cache_disk_path)
+                if settings.wiki_cache_disk_path
+                else None
+            )
+            self.cache = TTLCache(
+                max_entries=settings.wiki_cache_max_entries, disk=disk, name="wikipedia"
+            )
+        self._executor: ThreadPoolExecutor | None = None
+        if settings.wiki_fanout_workers > 1:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.wiki_fanout_workers,
+                thread_name_prefix="wiki-fanout",
+            )
+
+    def _cached(self, namespace: str, key: str, loader, ttl_seconds: int):
+        if self.cache is None:
+            return loader()
+        return self.cache.get_or_load(
+            f"{self.lang}:{namespace}",
+            key,
+            loader,
+            ttl_seconds=ttl_seconds,
+            negative_ttl_seconds=self.settings.wiki_cache_negative_ttl_seconds,
+        )
+
+    def cache_stats(self) -> dict | None:
+        return self.cache.stats() if self.cache is not None else None
 
     def _search(self, topic: str, limit: int = 5) -> list[dict]:
-        endpoint = f"{self.api_base}/w/api.php"
+        return self._cached(
+            "search",
+            f"{limit}:{' '.join(topic.lower().split())}",
+            lambda: self._fetch_search(topic, limit),
+            self.settings.wiki_cache_search_ttl_seconds,
+        )
+
+    def _summary_for_title(self, title: str) -> dict:
+        try:
+            return self._cached(
+                "summary",
+                title,
+                lambda: self._fetch_summary_for_title(title),
+                self.settings.wiki_cache_summary_ttl_seconds,
+            )
+        except _TransientWikiError:
+            return {}
+
+    def _page_bundle(self, page_id: int) -> dict:
+        return self._cached(
+            "page",
+            str(page_id),
+            lambda: self._fetch_page_bundle(page_id),
+            self.settings.wiki_cache_extract_ttl_seconds,
+        )
+
+    def _search_request(self, topic: str, limit: int) -> Tuple[str, dict]:
         params = {
             "action": "query",
             "list": "search",
@@ -50,41 +115,98 @@ class WikipediaService:
             "srlimit": limit,
             "format": "json",
         }
-        response = requests.get(endpoint, params=params, headers=self.headers, timeout=8)
-        response.raise_for_status()
-        return response.json().get("query", {}).get("search", [])
+        return f"{self.api_base}/w/api.php", params
 
-    def _summary_for_title(self, title: str) -> dict:
+    @staticmethod
+    def _parse_search(data: dict) -> list[dict]:
+        return data.get("query", {}).get("search", [])
+
+    def _summary_endpoint(self, title: str) -> str:
         safe_title = quote(title.replace(" ", "_"), safe="")
-        endpoint = f"{self.api_base}/api/rest_v1/page/summary/{safe_title}"
-        response = requests.get(endpoint, headers=self.headers, timeout=8)
-        if response.status_code >= 400:
-            return {}
-        return response.json()
+        return f"{self.api_base}/api/rest_v1/page/summary/{safe_title}"
+
+    @staticmethod
+    def _check_summary_status(status_code: int) -> bool:
+        """Return False for client errors; raise for throttling and server errors."""
+        if status_code == 429 or status_code >= 500:
+            raise _TransientWikiError(f"Wikipedia summary returned {status_code}")
+        # Client errors (e.g. 404 for a missing title) are negatively cached by _cached.
+        return status_code < 400
 
-    def _extract_for_page_id(self, page_id: int) -> str:
-        endpoint = f"{self.api_base}/w/api.php"
+    def _page_bundle_request(self, page_id: int) -> Tuple[str, dict]:
+        # One query returns what previously took prop=info, the REST summary and prop=extracts.
         params = {
             "action": "query",
-            "prop": "extracts",
-            "pageids": page_id,
+            "prop": "info|extracts|pageimages|description",
+            "inprop": "url",
             "explaintext": 1,
             "exsectionformat": "plain",
+            "piprop": "thumbnail",
+            "pithumbsize": 320,
+            "pageids": page_id,
             "format": "json",
         }
-        response = requests.get(endpoint, params=params, headers=self.headers, timeout=8)
+        return f"{self.api_base}/w/api.php", params
+
+    @staticmethod
+    def _parse_page_bundle(page_id: int, data: dict) -> dict:
+        pages = data.get("query", {}).get("pages", {})
+        page = pages.get(str(page_id), {})
+        if not page or "title" not in page or "missing" in page:
+            return {}
+        return {
+            "title": page["title"],
+            "fullurl": page.get("fullurl"),
+            "lastrevid": page.get("lastrevid"),
+            "extract": page.get("extract") or "",
+            "description": page.get("description"),
+            "thumbnail": page.get("thumbnail", {}).get("source"),
+        }
+
+    def _fetch_search(self, topic: str, limit: int) -> list[dict]:
+        endpoint, params = self._search_request(topic, limit)
+        response = self.session.get(endpoint, params=params, headers=self.headers, timeout=8)
+        response.raise_for_status()
+        return self._parse_search(response.json())
+
+    def _fetch_summary_for_title(self, title: str) -> dict:
+        response = self.session.get(self._summary_endpoint(title), headers=self.headers, timeout=8)
+        if not self._check_summary_status(response.status_code):
+            return {}
+        return response.json()
+
+    def _fetch_page_bundle(self, page_id: int) -> dict:
+        endpoint, params = self._page_bundle_request(page_id)
+        response = self.session.get(endpoint, params=params, headers=self.headers, timeout=8)
         response.raise_for_status()
-        pages = response.json().get("query", {}).get("pages", {})
-        extract = pages.get(str(page_id), {}).get("extract", "")
-        return extract or ""
+        return self._parse_page_bundle(page_id, response.json())
+
+    @staticmethod
+    def _lead_summary(extract: str, limit: int = 1200) -> str:
+        # Plain-text extracts separate paragraphs with newlines; the first block is the lead.
+        lead = extract.strip().split("\n", 1)[0].strip()
+        if len(lead) <= limit:
+            return lead
+        return lead[:limit].rsplit(" ", 1)[0].rstrip()
+
+    def _summaries_for_titles(self, titles: list[str]) -> list[dict]:
+        # Summaries are independent round trips; map() keeps results in search-rank order.
+        if self._executor is None or len(titles) <= 1:
+            return [self._summary_for_title(title) for title in titles]
+        return list(self._executor.map(self._summary_for_title, titles))
 
     def resolve_topic(self, topic: str) -> List[WikiCandidate]:
-        hits = self._search(topic=topic, limit=5)
+        with span("wiki"):
+            hits = self._search(topic=topic, limit=5)
+            titles = [hit.get("title", "") for hit in hits]
+            return self._candidates(hits, titles, self._summaries_for_titles(titles))
+
+    def _candidates(
+        self, hits: list[dict], titles: list[str], summaries: list[dict]
+    ) -> List[WikiCandidate]:
         candidates: list[WikiCandidate] = []
-        for hit in hits:
-            title = hit.get("title", "")
+        for hit, title, summary_data in zip(hits, titles, summaries):
             page_id = int(hit.get("pageid"))
-            summary_data = self._summary_for_title(title)
             url = (
                 summary_data.get("content_urls", {})
                 .get("desktop", {})
@@ -108,29 +230,32 @@ class WikipediaService:
         return candidates
 
     def get_article(self, page_id: int) -> WikiArticle:
-        endpoint = f"{self.api_base}/w/api.php"
-        params = {
-            "action": "query",
-            "prop": "info",
-            "inprop": "url",
-            "pageids": page_id,
-            "format": "json",
-        }
-        response = requests.get(endpoint, params=params, headers=self.headers, timeout=8)
-        response.raise_for_status()
-        pages = response.json().get("query", {}).get("pages", {})
-        page = pages.get(str(page_id), {})
-        if not page or "title" not in page:
-            raise ValueError("Could not locate Wikipedia page for selected page_id")
+        with span("wiki"):
+            page = self._page_bundle(page_id)
+            if not page:
+                raise ValueError("Could not locate Wikipedia page for selected page_id")
+            summary_data = None
+            if not self._lead_summary(page.get("extract") or ""):
+                # Fall back to the REST summary only when the page has no usable plaintext
+                # extract.
+                summary_data = self._summary_for_title(page["title"])
+            return self._article_from_page(page_id, page, summary_data)
 
+    def _article_from_page(
+        self, page_id: int, page: dict, summary_data: dict | None
+    ) -> WikiArticle:
         title = page["title"]
-        canonical_url = page.get("fullurl", f"{self.api_base}/wiki/{quote(title.replace(' ', '_'))}")
-        summary_data = self._summary_for_title(title)
-        summary = (summary_data.get("extract") or "").strip()
-        image_url = summary_data.get("thumbnail", {}).get("source")
-        image_caption = summary_data.get("description")
+        canonical_url = page.get("fullurl") or f"{self.api_base}/wiki/{quote(title.replace(' ', '_'))}"
+        extract = page.get("extract") or ""
+        summary = self._lead_summary(extract)
+        image_url = page.get("thumbnail")
+        image_caption = page.get("description")
+
+        if summary_data is not None:
+            summary = (summary_data.get("extract") or "").strip()
+            image_url = image_url or summary_data.get("thumbnail", {}).get("source")
+            image_caption = image_caption or summary_data.get("description")
 
-        extract = self._extract_for_page_id(page_id)
         if not extract:
             extract = summary
 
@@ -145,4 +270,5 @@ class WikipediaService:
             image_url=image_url,
             image_caption=image_caption,
             extract=extract,
+            revision_id=page.get("lastrevid"),
         )
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+
+
+class SQLiteConnections:
+    """
+    One autocommit connection per thread to a WAL-mode database file.
+    sqlite3 connections must not be shared across threads, and WAL lets readers in other
+    threads and worker processes proceed while one writer commits.
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000) -> None:
+        self.path = Path(path)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                str(self.path),
+                timeout=self.busy_timeout_ms / 1000,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.connection = connection
+        return connection
@@ -1,11 +1,40 @@
 from __future__ import annotations
 
+import atexit
+import copy
+import fcntl
 import json
+import math
+import os
+import re
+import socket
 import threading
-from datetime import datetime, timezone
+import uuid
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from time import perf_counter
-from typing import Any
+from typing import Any, Iterator
+
+from app.telemetry_log import (
+    SEGMENTS_DIR,
+    RotatingEventLog,
+    iter_jsonl,
+    iter_segment_events,
+    reseal_raw_segments,
+    seal_segment,
+)
+
+
+EVENTS_FILE = "llm_calls.jsonl"
+COUNTERS_FILE = "llm_counters.json"
+SHARDS_DIR = "shards"
+SHARD_EVENTS_PREFIX = "llm_calls."
+SHARD_COUNTERS_PREFIX = "llm_counters."
+HOURLY_ROLLUP_HOURS = 48
+DEFAULT_ROLLUP_DAYS = 90
+# Latency histogram buckets grow by 5%, so reported percentiles are within ~5% of the truth.
+LATENCY_BUCKET_GROWTH = 1.05
+_WINDOW_PATTERN = re.compile(r"^(\d+)([hd])$")
 
 
 def _utc_now() -> datetime:
@@ -39,43 +68,412 @@ def _empty_counter_snapshot() -> dict[str, Any]:
     now = _utc_now_iso()
     payload = _empty_period_snapshot()
     payload["meta"] = {
-        "version": 2,
+        "version": 3,
         "created_at": now,
         "updated_at": now,
     }
     payload["monthly"] = {}
+    payload["hourly"] = {}
+    payload["daily"] = {}
     return payload
 
 
+def _hour_key(timestamp: datetime) -> str:
+    return timestamp.strftime("%Y-%m-%dT%H")
+
+
+def _day_key(timestamp: datetime) -> str:
+    return timestamp.strftime("%Y-%m-%d")
+
+
+def _series_key(provider: str, model: str, task: str) -> str:
+    return f"{provider}|{model}|{task}"
+
+
+def latency_bucket(duration_ms: float) -> str:
+    if duration_ms <= 1:
+        return "0"
+    return str(math.ceil(math.log(duration_ms) / math.log(LATENCY_BUCKET_GROWTH)))
+
+
+def histogram_percentile(histogram: dict[str, int], quantile: float) -> float | None:
+    total = sum(histogram.values())
+    if not total:
+        return None
+    rank = max(1, math.ceil(quantile * total))
+    seen = 0
+    for bucket in sorted(histogram, key=int):
+        seen += histogram[bucket]
+        if seen >= rank:
+            return round(LATENCY_BUCKET_GROWTH ** int(bucket), 1)
+    return None
+
+
+def prune_rollups(
+    counters: dict[str, Any],
+    rollup_days: int = DEFAULT_ROLLUP_DAYS,
+    now: datetime | None = None,
+) -> None:
+    now = now or _utc_now()
+    for period, cutoff in (
+        ("hourly", _hour_key(now - timedelta(hours=HOURLY_ROLLUP_HOURS))),
+        ("daily", _day_key(now - timedelta(days=max(1, rollup_days)))),
+    ):
+        rollups = counters.get(period, {})
+        for key in [key for key in rollups if key <= cutoff]:
+            del rollups[key]
+
+
+def summarize_counters(
+    counters: dict[str, Any],
+    window: str,
+    provider: str | None = None,
+    model: str | None = None,
+    task: str | None = None,
+    now: datetime | None = None,
+) -> dict[str, Any]:
+    """
+    Attempts, error rate, cost and success-latency percentiles per provider/model/task over
+    the last `window` ("<n>h" up to 48 hours, or "<n>d"), read from the hourly/daily rollups.
+    """
+    match = _WINDOW_PATTERN.match(window)
+    if not match or int(match.group(1)) < 1:
+        raise ValueError("window must look like '24h' or '7d'.")
+    amount, unit = int(match.group(1)), match.group(2)
+    now = now or _utc_now()
+    if unit == "h":
+        if amount > HOURLY_ROLLUP_HOURS:
+            raise ValueError(f"Hourly windows are kept for {HOURLY_ROLLUP_HOURS} hours.")
+        periods = counters.get("hourly", {})
+        start = _hour_key(now - timedelta(hours=amount - 1))
+    else:
+        periods = counters.get("daily", {})
+        start = _day_key(now - timedelta(days=amount - 1))
+
+    merged: dict[str, Any] = {}
+    for period_key, series in periods.items():
+        if period_key >= start:
+            for key, bucket in series.items():
+                merge_counter_snapshots(merged.setdefault(key, {}), bucket)
+
+    rows: list[dict[str, Any]] = []
+    totals: dict[str, Any] = {}
+    for key, bucket in merged.items():
+        series_provider, rest = key.split("|", 1)
+        series_model, series_task = rest.rsplit("|", 1)
+        if (
+            (provider and provider != series_provider)
+            or (model and model != series_model)
+            or (task and task != series_task)
+        ):
+            continue
+        rows.append(
+            {"provider": series_provider, "model": series_model, "task": series_task}
+            | _summarize_bucket(bucket)
+        )
+        merge_counter_snapshots(totals, bucket)
+
+    rows.sort(key=lambda row: row["attempts"], reverse=True)
+    return {
+        "window": window,
+        "since": start,
+        "totals": _summarize_bucket(totals),
+        "series": rows,
+    }
+
+
+def _summarize_bucket(bucket: dict[str, Any]) -> dict[str, Any]:
+    attempts = int(bucket.get("attempts", 0))
+    histogram = bucket.get("latency_ms", {})
+    return {
+        "attempts": attempts,
+        "success": int(bucket.get("success", 0)),
+        "error": int(bucket.get("error", 0)),
+        "error_rate": round(int(bucket.get("error", 0)) / attempts, 4) if attempts else 0.0,
+        "cost_usd": round(float(bucket.get("cost_usd", 0.0)), 6),
+        "latency_ms": {
+            name: histogram_percentile(histogram, quantile)
+            for name, quantile in (("p50", 0.5), ("p90", 0.9), ("p95", 0.95), ("p99", 0.99))
+        },
+    }
+
+
+def merge_counter_snapshots(into: dict[str, Any], other: dict[str, Any]) -> dict[str, Any]:
+    """Adds every counter in `other` to `into` (in place) and returns `into`."""
+    for key, value in other.items():
+        if key == "meta":
+            meta = into.setdefault("meta", {})
+            for field, pick in (("created_at", min), ("updated_at", max)):
+                if field in value:
+                    meta[field] = pick(meta[field], value[field]) if field in meta else value[field]
+            meta["version"] = max(int(meta.get("version", 2)), int(value.get("version", 2)))
+        elif isinstance(value, dict):
+            merge_counter_snapshots(into.setdefault(key, {}), value)
+        elif isinstance(value, float):
+            into[key] = round(float(into.get(key, 0.0)) + value, 8)
+        elif isinstance(value, int):
+            into[key] = int(into.get(key, 0)) + value
+        else:
+            into[key] = value
+    return into
+
+
+def _load_json(path: Path) -> dict[str, Any] | None:
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_json_atomic(path: Path, payload: dict[str, Any]) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        json.dump(payload, handle, separators=(",", ":"), sort_keys=True)
+        handle.flush()
+        os.fsync(handle.fileno())
+    tmp_path.replace(path)
+
+
+def read_counters(base_dir: str | Path) -> dict[str, Any]:
+    """Compacted counters plus every worker shard that has not been compacted yet."""
+    base = Path(base_dir)
+    merged = _load_json(base / COUNTERS_FILE) or _empty_counter_snapshot()
+    for shard_path in sorted((base / SHARDS_DIR).glob(f"{SHARD_COUNTERS_PREFIX}*.json")):
+        shard = _load_json(shard_path)
+        if shard:
+            merge_counter_snapshots(merged, shard)
+    return merged
+
+
+def compact_shards(
+    base_dir: str | Path,
+    rollup_days: int = DEFAULT_ROLLUP_DAYS,
+    segment_retention_days: int = 0,
+) -> int:
+    """
+    Rolls shards of workers that have exited into `llm_counters.json`, and seals their event logs
+    as compressed segments. A live worker holds an exclusive lock on its shard, so its files are
+    left alone. Returns the number of shards compacted.
+    """
+    base = Path(base_dir)
+    shards_dir = base / SHARDS_DIR
+    if not shards_dir.is_dir():
+        return 0
+
+    compacted = 0
+    with (shards_dir / "compact.lock").open("a") as compact_lock:
+        fcntl.flock(compact_lock.fileno(), fcntl.LOCK_EX)
+        reseal_raw_segments(base / SEGMENTS_DIR, segment_retention_days)
+        counters = _load_json(base / COUNTERS_FILE) or _empty_counter_snapshot()
+        for lock_path in sorted(shards_dir.glob("*.lock")):
+            shard_id = lock_path.stem
+            if shard_id == "compact":
+                continue
+            with lock_path.open("a") as shard_lock:
+                try:
+                    fcntl.flock(shard_lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+
+                events_path = shards_dir / f"{SHARD_EVENTS_PREFIX}{shard_id}.jsonl"
+                counters_path = shards_dir / f"{SHARD_COUNTERS_PREFIX}{shard_id}.json"
+                if events_path.exists():
+                    seal_segment(events_path, base / SEGMENTS_DIR, segment_retention_days)
+                shard_counters = _load_json(counters_path)
+                if shard_counters:
+                    merge_counter_snapshots(counters, shard_counters)
+                    prune_rollups(counters, rollup_days)
+                # Totals are written before the shard is removed; a crash in between can only
+                # double-count that one shard, never lose it.
+                _write_json_atomic(base / COUNTERS_FILE, counters)
+                for path in (events_path, counters_path, lock_path):
+                    path.unlink(missing_ok=True)
+                compacted += 1
+    return compacted
+
+
+def read_events(
+    base_dir: str | Path,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Streams events with `since <= ts < until` from the compressed segments overlapping the
+    window, then from the active log files. Order is per file, not merged across workers.
+    """
+    base = Path(base_dir)
+    yield from iter_segment_events(base / SEGMENTS_DIR, since, until)
+    shard_logs = sorted((base / SHARDS_DIR).glob(f"{SHARD_EVENTS_PREFIX}*.jsonl"))
+    for path in [base / EVENTS_FILE, *shard_logs]:
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                yield from iter_jsonl(handle, since, until)
+        except FileNotFoundError:
+            continue
+
+
 class LLMTelemetryStore:
-    def __init__(self, enabled: bool, base_dir: str) -> None:
+    """
+    Records one event per LLM attempt. Events are appended to `llm_calls.jsonl` (rotated into
+    gzip segments, see `RotatingEventLog`) and rolled up into `llm_counters.json`. Recording
+    only touches memory under a short lock; a daemon flusher appends buffered events and writes
+    an atomic snapshot every `flush_interval_seconds` or once `flush_max_events` are pending,
+    so per-event cost stays constant.
+
+    With `sharded=True` each process writes its own files under `shards/` instead, so several
+    gunicorn workers never overwrite each other's counters. `read_counters` merges shards on
+    read and `compact_shards` folds finished ones back into the main files.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        base_dir: str,
+        flush_interval_seconds: float = 2.0,
+        flush_max_events: int = 200,
+        sharded: bool = False,
+        rollup_days: int = DEFAULT_ROLLUP_DAYS,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        segment_max_age_seconds: float = 24 * 3600,
+        segment_retention_days: int = 0,
+    ) -> None:
         self.enabled = enabled
+        self.sharded = sharded
+        self.rollup_days = max(1, rollup_days)
         self.base_dir = Path(base_dir)
-        self.events_path = self.base_dir / "llm_calls.jsonl"
-        self.counters_path = self.base_dir / "llm_counters.json"
+        self.events_path = self.base_dir / EVENTS_FILE
+        self.counters_path = self.base_dir / COUNTERS_FILE
+        self.flush_interval_seconds = max(0.05, flush_interval_seconds)
+        self.flush_max_events = max(1, flush_max_events)
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_age_seconds = segment_max_age_seconds
+        self.segment_retention_days = segment_retention_days
         self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending: list[dict[str, Any]] = []
+        # `_delta` collects counters recorded since the last flush and is the only counter state
+        # touched under `_lock`; the flusher folds it into `_counters` under `_flush_lock`.
+        self._delta: dict[str, Any] = {}
+        self._unsaved = False
+        self._counters: dict[str, Any] = {}
+        self._event_log: RotatingEventLog | None = None
+        self._flusher: threading.Thread | None = None
+        self._pid: int | None = None
+        self._shard_lock: Any = None
 
         if self.enabled:
-            self._ensure_files()
+            if self.sharded:
+                self._claim_shard()
+            else:
+                self._ensure_files()
+                self._counters = self._read_counters()
+
+    def _claim_shard(self) -> None:
+        # Runs again in a forked child (e.g. gunicorn --preload) so workers never share a shard.
+        shard_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        shards_dir = self.base_dir / SHARDS_DIR
+        shards_dir.mkdir(parents=True, exist_ok=True)
+        self.shard_id = shard_id
+        self.events_path = shards_dir / f"{SHARD_EVENTS_PREFIX}{shard_id}.jsonl"
+        self.counters_path = shards_dir / f"{SHARD_COUNTERS_PREFIX}{shard_id}.json"
+        self._shard_lock = (shards_dir / f"{shard_id}.lock").open("a")
+        fcntl.flock(self._shard_lock.fileno(), fcntl.LOCK_EX)
+        self._pid = os.getpid()
+        self._counters = _empty_counter_snapshot()
+        self._delta = {}
+        self._pending = []
+        self._unsaved = False
+        self._event_log = None
+        self._flusher = None
 
     def _ensure_files(self) -> None:
-        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.counters_path.parent.mkdir(parents=True, exist_ok=True)
         if not self.events_path.exists():
             self.events_path.touch()
         if not self.counters_path.exists():
             self._write_counters(_empty_counter_snapshot())
 
     def _read_counters(self) -> dict[str, Any]:
-        try:
-            return json.loads(self.counters_path.read_text())
-        except (FileNotFoundError, json.JSONDecodeError):
-            # Keep service running even if file is missing/corrupt.
-            return _empty_counter_snapshot()
+        # Keep service running even if file is missing/corrupt.
+        return _load_json(self.counters_path) or _empty_counter_snapshot()
 
     def _write_counters(self, payload: dict[str, Any]) -> None:
-        tmp_path = self.counters_path.with_suffix(".json.tmp")
-        tmp_path.write_text(json.dumps(payload, indent=2, sort_keys=True))
-        tmp_path.replace(self.counters_path)
+        _write_json_atomic(self.counters_path, payload)
+
+    def _start_flusher(self) -> None:
+        # Called with self._lock held.
+        if self._flusher is None:
+            self._flusher = threading.Thread(
+                target=self._flush_loop,
+                name="llm-telemetry-flush",
+                daemon=True,
+            )
+            self._flusher.start()
+            atexit.register(self.flush)
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except OSError:
+                # Disk problems must not kill the flusher; pending events are retried next round.
+                continue
+
+    def flush(self) -> None:
+        """Write pending events and, if anything changed, a counters snapshot."""
+        if not self.enabled:
+            return
+        with self._flush_lock:
+            with self._lock:
+                if self.sharded and self._pid != os.getpid():
+                    # Forked before recording anything; the parent flushes its own events.
+                    return
+                events, self._pending = self._pending, []
+                delta, self._delta = self._delta, {}
+            if delta:
+                merge_counter_snapshots(self._counters, delta)
+                prune_rollups(self._counters, self.rollup_days)
+                self._unsaved = True
+            try:
+                if events:
+                    if self._event_log is None:
+                        self._ensure_files()
+                        self._event_log = RotatingEventLog(
+                            self.events_path,
+                            self.base_dir / SEGMENTS_DIR,
+                            max_bytes=self.segment_max_bytes,
+                            max_age_seconds=self.segment_max_age_seconds,
+                            retention_days=self.segment_retention_days,
+                        )
+                    self._event_log.write(events)
+                if self._unsaved:
+                    self._write_counters(self._counters)
+                    self._unsaved = False
+            except OSError:
+                with self._lock:
+                    self._pending[:0] = events
+                raise
+
+    def read_counters(self) -> dict[str, Any]:
+        """Counters across all workers: this process's live view, or every shard when sharded."""
+        if not self.enabled:
+            return _empty_counter_snapshot()
+        if not self.sharded:
+            return self.snapshot()
+        self.flush()
+        return read_counters(self.base_dir)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Current counters of this store (this worker's shard when sharded), including events
+        that have not been flushed yet."""
+        with self._flush_lock:
+            counters = copy.deepcopy(self._counters)
+            with self._lock:
+                delta = copy.deepcopy(self._delta)
+            return merge_counter_snapshots(counters, delta)
 
     @staticmethod
     def _inc(bucket: dict[str, Any], key: str) -> None:
@@ -137,6 +535,31 @@ class LLMTelemetryStore:
         pair_bucket = self._metric_bucket(by_provider, task)
         self._bump_metric(pair_bucket, outcome, cost_usd)
 
+    def _bump_rollups(
+        self,
+        counters: dict[str, Any],
+        timestamp: datetime,
+        event: dict[str, Any],
+    ) -> None:
+        series_key = _series_key(event["provider"], event["model"], event["task"])
+        pruned = False
+        for period, period_key in (
+            ("hourly", _hour_key(timestamp)),
+            ("daily", _day_key(timestamp)),
+        ):
+            rollups = counters.setdefault(period, {})
+            if period_key not in rollups:
+                rollups[period_key] = {}
+                if not pruned:
+                    # New hour or day: drop periods that fell out of retention.
+                    prune_rollups(counters, self.rollup_days, timestamp)
+                    pruned = True
+            bucket = self._metric_bucket(rollups[period_key], series_key)
+            self._bump_metric(bucket, event["outcome"], event.get("cost_usd"))
+            if event["outcome"] == "success":
+                histogram = bucket.setdefault("latency_ms", {})
+                self._inc(histogram, latency_bucket(event["duration_ms"]))
+
     def record_attempt(
         self,
         *,
@@ -175,11 +598,9 @@ class LLMTelemetryStore:
         }
 
         with self._lock:
-            self._ensure_files()
-            with self.events_path.open("a", encoding="utf-8") as handle:
-                handle.write(json.dumps(event, sort_keys=True) + "\n")
-
-            counters = self._read_counters()
+            if self.sharded and self._pid != os.getpid():
+                self._claim_shard()
+            counters = self._delta
             self._bump_snapshot(counters, event)
 
             monthly = counters.setdefault("monthly", {})
@@ -190,9 +611,14 @@ class LLMTelemetryStore:
             if "created_at" not in meta:
                 meta["created_at"] = ts_iso
             meta["updated_at"] = ts_iso
-            meta["version"] = max(2, int(meta.get("version", 2)))
+            meta["version"] = max(3, int(meta.get("version", 2)))
+
+            self._bump_rollups(counters, timestamp, event)
 
-            self._write_counters(counters)
+            self._pending.append(event)
+            self._start_flusher()
+            if len(self._pending) >= self.flush_max_events:
+                self._wakeup.set()
 
     def measure_and_record(
         self,
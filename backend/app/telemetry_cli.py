@@ -0,0 +1,77 @@
+"""
+LLM telemetry maintenance and queries. Run from `backend/`:
+
+    python -m app.telemetry_cli compact
+    python -m app.telemetry_cli show
+    python -m app.telemetry_cli query --window 7d --provider gemini --task quiz_generation
+    python -m app.telemetry_cli events --since 2026-10-01T00:00:00+00:00
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+from app.config import backend_path
+from app.telemetry import (
+    DEFAULT_ROLLUP_DAYS,
+    compact_shards,
+    read_counters,
+    read_events,
+    summarize_counters,
+)
+
+
+def _timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=("compact", "show", "query", "events"))
+    parser.add_argument(
+        "--dir", default=backend_path(os.getenv("LLM_TELEMETRY_DIR", "runtime/llm_telemetry"))
+    )
+    parser.add_argument(
+        "--rollup-days",
+        type=int,
+        default=int(os.getenv("LLM_TELEMETRY_ROLLUP_DAYS", DEFAULT_ROLLUP_DAYS)),
+    )
+    parser.add_argument("--window", default="24h", help="'<n>h' (up to 48) or '<n>d'")
+    parser.add_argument("--provider")
+    parser.add_argument("--model")
+    parser.add_argument("--task")
+    parser.add_argument(
+        "--segment-retention-days",
+        type=int,
+        default=int(os.getenv("LLM_TELEMETRY_SEGMENT_RETENTION_DAYS", 90)),
+    )
+    parser.add_argument("--since", type=_timestamp, help="ISO timestamp (UTC if no offset)")
+    parser.add_argument("--until", type=_timestamp, help="ISO timestamp (UTC if no offset)")
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        compacted = compact_shards(args.dir, args.rollup_days, args.segment_retention_days)
+        print(f"compacted {compacted} shard(s)")
+    elif args.command == "events":
+        for event in read_events(args.dir, args.since, args.until):
+            sys.stdout.write(json.dumps(event, sort_keys=True) + "\n")
+    elif args.command == "show":
+        print(json.dumps(read_counters(args.dir), indent=2, sort_keys=True))
+    else:
+        summary = summarize_counters(
+            read_counters(args.dir),
+            args.window,
+            provider=args.provider,
+            model=args.model,
+            task=args.task,
+        )
+        print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import fcntl
+import gzip
+import json
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+
+SEGMENTS_DIR = "segments"
+INDEX_FILE = "index.json"
+
+
+def _parse_ts(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def _read_time_range(path: Path) -> tuple[str, str] | None:
+    # First and last event timestamps of a JSONL file, reading only its head and tail.
+    try:
+        with path.open("rb") as handle:
+            first = handle.readline()
+            if not first.strip():
+                return None
+            handle.seek(0, os.SEEK_END)
+            handle.seek(max(0, handle.tell() - 65536))
+            tail = handle.read().splitlines()
+    except FileNotFoundError:
+        return None
+    lines = [line for line in tail if line.strip()]
+    try:
+        return json.loads(first)["ts"], json.loads(lines[-1])["ts"]
+    except (json.JSONDecodeError, KeyError, IndexError):
+        return None
+
+
+class SegmentIndex:
+    """
+    `segments/index.json`: one entry per compressed segment with its file name, first/last event
+    time, event count and size. Several workers and the compaction command may seal segments,
+    so every read-modify-write happens under an flock.
+    """
+
+    def __init__(self, segments_dir: Path) -> None:
+        self.segments_dir = segments_dir
+        self.path = segments_dir / INDEX_FILE
+
+    def entries(self) -> list[dict[str, Any]]:
+        try:
+            return json.loads(self.path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def add(self, entry: dict[str, Any], retention_days: int = 0) -> None:
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        with (self.segments_dir / "index.lock").open("a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            entries = [item for item in self.entries() if item["file"] != entry["file"]]
+            entries.append(entry)
+            if retention_days > 0:
+                cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+                expired = [item for item in entries if _parse_ts(item["end"]) < cutoff]
+                for item in expired:
+                    (self.segments_dir / item["file"]).unlink(missing_ok=True)
+                entries = [item for item in entries if item not in expired]
+            entries.sort(key=lambda item: item["start"])
+            tmp_path = self.path.with_name(INDEX_FILE + ".tmp")
+            tmp_path.write_text(json.dumps(entries, separators=(",", ":")))
+            tmp_path.replace(self.path)
+
+
+def seal_segment(path: Path, segments_dir: Path, retention_days: int = 0) -> Path | None:
+    """
+    Moves a closed JSONL file into `segments/`, gzips it and records it in the index. Returns the
+    compressed segment, or None if the file held no events.
+    """
+    time_range = _read_time_range(path)
+    if time_range is None:
+        path.unlink(missing_ok=True)
+        return None
+
+    segments_dir.mkdir(parents=True, exist_ok=True)
+    start, end = time_range
+    stamp = _parse_ts(start).strftime("%Y%m%dT%H%M%S")
+    raw_path = segments_dir / f"{path.stem}.{stamp}.{uuid.uuid4().hex[:8]}.jsonl"
+    # Renaming first means a crash can only leave a raw file in segments/, which
+    # `reseal_raw_segments` picks up; the event log itself is never left half-moved.
+    path.replace(raw_path)
+    return _compress_and_index(raw_path, time_range, segments_dir, retention_days)
+
+
+def reseal_raw_segments(segments_dir: Path, retention_days: int = 0) -> int:
+    resealed = 0
+    for raw_path in sorted(segments_dir.glob("*.jsonl")):
+        time_range = _read_time_range(raw_path)
+        if time_range is None:
+            raw_path.unlink(missing_ok=True)
+            continue
+        _compress_and_index(raw_path, time_range, segments_dir, retention_days)
+        resealed += 1
+    return resealed
+
+
+def _compress_and_index(
+    raw_path: Path,
+    time_range: tuple[str, str],
+    segments_dir: Path,
+    retention_days: int,
+) -> Path:
+    gz_path = raw_path.with_name(raw_path.name + ".gz")
+    tmp_path = raw_path.with_name(raw_path.name + ".gz.tmp")
+    events = 0
+    with raw_path.open("rb") as source, gzip.open(tmp_path, "wb") as target:
+        for line in source:
+            if line.strip():
+                events += 1
+                target.write(line)
+    tmp_path.replace(gz_path)
+    raw_path.unlink()
+    SegmentIndex(segments_dir).add(
+        {
+            "file": gz_path.name,
+            "start": time_range[0],
+            "end": time_range[1],
+            "events": events,
+            "bytes": gz_path.stat().st_size,
+        },
+        retention_days=retention_days,
+    )
+    return gz_path
+
+
+class RotatingEventLog:
+    """
+    Append-only JSONL event log that rotates once the active file reaches `max_bytes` or its first
+    event is older than `max_age_seconds`. Closed files are gzipped into `segments_dir`.
+    Not thread-safe; the telemetry flusher is its only writer.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        segments_dir: Path,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_age_seconds: float = 24 * 3600,
+        retention_days: int = 0,
+    ) -> None:
+        self.path = path
+        self.segments_dir = segments_dir
+        self.max_bytes = max(1024, max_bytes)
+        self.max_age_seconds = max(1.0, max_age_seconds)
+        self.retention_days = max(0, retention_days)
+        self._handle: Any = None
+        self._size = 0
+        self._started_at: datetime | None = None
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = self.path.open("a", encoding="utf-8", buffering=1024 * 1024)
+        self._size = self.path.stat().st_size
+        time_range = _read_time_range(self.path)
+        self._started_at = _parse_ts(time_range[0]) if time_range else None
+
+    def _due(self, now: datetime) -> bool:
+        if not self._size:
+            return False
+        if self._size >= self.max_bytes:
+            return True
+        return (
+            self._started_at is not None
+            and (now - self._started_at).total_seconds() >= self.max_age_seconds
+        )
+
+    def rotate(self) -> Path | None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        self._size = 0
+        self._started_at = None
+        if not self.path.exists():
+            return None
+        return seal_segment(self.path, self.segments_dir, self.retention_days)
+
+    def write(self, events: list[dict[str, Any]]) -> None:
+        if not events:
+            return
+        if self._handle is None:
+            self._open()
+        if self._due(_parse_ts(events[0]["ts"])):
+            self.rotate()
+            self._open()
+        blob = "".join(json.dumps(event, sort_keys=True) + "\n" for event in events)
+        self._handle.write(blob)
+        self._handle.flush()
+        self._size += len(blob.encode("utf-8"))
+        if self._started_at is None:
+            self._started_at = _parse_ts(events[0]["ts"])
+
+
+def iter_jsonl(
+    handle: Any,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> Iterator[dict[str, Any]]:
+    for line in handle:
+        if not line.strip():
+            continue
+        try:
+            event = json.loads(line)
+            ts = _parse_ts(event["ts"])
+        except (json.JSONDecodeError, KeyError, ValueError):
+            continue
+        if (since is None or ts >= since) and (until is None or ts < until):
+            yield event
+
+
+def iter_segment_events(
+    segments_dir: Path,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Streams events with `since <= ts < until`, opening only segments whose range overlaps."""
+    for entry in SegmentIndex(segments_dir).entries():
+        if since is not None and _parse_ts(entry["end"]) < since:
+            continue
+        if until is not None and _parse_ts(entry["start"]) >= until:
+            continue
+        try:
+            with gzip.open(segments_dir / entry["file"], "rt", encoding="utf-8") as handle:
+                yield from iter_jsonl(handle, since, until)
+        except FileNotFoundError:
+            # Removed by retention after the index was read.
+            continue
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import threading
+from contextvars import ContextVar, Token
+from time import perf_counter
+
+
+class RequestTimings:
+    """Accumulated span durations for one request, keyed by span name."""
+
+    def __init__(self) -> None:
+        self.started_at = perf_counter()
+        self._lock = threading.Lock()
+        self._spans: dict[str, list[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        # Hedged LLM calls add spans from executor threads, hence the lock.
+        with self._lock:
+            entry = self._spans.get(name)
+            if entry is None:
+                self._spans[name] = [seconds, 1]
+            else:
+                entry[0] += seconds
+                entry[1] += 1
+
+    def spans(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {
+                name: {"ms": round(seconds * 1000, 1), "count": int(count)}
+                for name, (seconds, count) in self._spans.items()
+            }
+
+    def total_ms(self) -> float:
+        return round((perf_counter() - self.started_at) * 1000, 1)
+
+    def server_timing_header(self) -> str:
+        parts = []
+        for name, span_info in self.spans().items():
+            part = f"{name};dur={span_info['ms']}"
+            if span_info["count"] > 1:
+                part += f';desc="{span_info["count"]}x"'
+            parts.append(part)
+        parts.append(f"total;dur={self.total_ms()}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def start_request() -> Token:
+    return _current.set(RequestTimings())
+
+
+def current() -> RequestTimings | None:
+    return _current.get()
+
+
+def finish_request(token: Token) -> None:
+    _current.reset(token)
+
+
+class span:
+    """
+    `with span("wiki"): ...` adds the block's duration to the current request's timings.
+    Outside a timed request (timing disabled, background jobs) it only costs a ContextVar read.
+    """
+
+    __slots__ = ("name", "_timings", "_started_at")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._timings: RequestTimings | None = None
+        self._started_at = 0.0
+
+    def __enter__(self) -> "span":
+        self._timings = _current.get()
+        if self._timings is not None:
+            self._started_at = perf_counter()
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        if self._timings is not None:
+            self._timings.add(self.name, perf_counter() - self._started_at)
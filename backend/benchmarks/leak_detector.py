@@ -0,0 +1,76 @@
+"""
+Microbenchmark for incorrect-answer feedback sanitization.
+
+Compares the previous per-pattern re.search loop plus per-token substring scan with
+LeakDetector's single combined pattern. Run from backend/:
+
+    python -m benchmarks.leak_detector [--iterations 200000]
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import timeit
+
+from app.services.leak_detector import LeakDetector
+
+
+def legacy_answer_revealed(feedback: str, sensitive_tokens: list[str] | None = None) -> bool:
+    text = feedback.strip().lower()
+    if not text:
+        return True
+
+    reveal_patterns = [
+        r"\bcorrect answer\b",
+        r"\bexpected answer\b",
+        r"\bthe answer is\b",
+        r"\boption\s+[a-z0-9]+\s+is correct\b",
+        r"\bshould be\b",
+        r"\bmust be\b",
+        r"\bresponse does not match\b",
+        r"\bmatches the expected\b",
+    ]
+    for pattern in reveal_patterns:
+        if re.search(pattern, text):
+            return True
+
+    for token in sensitive_tokens or []:
+        cleaned = token.strip().lower()
+        if len(cleaned) < 2:
+            continue
+        if cleaned in text:
+            return True
+    return False
+
+
+SAFE_FEEDBACK = (
+    "That statement confuses the light-dependent reactions with the Calvin cycle; "
+    "re-read the section describing where carbon fixation takes place."
+)
+LEAKY_FEEDBACK = "Close, but the process happens in the chloroplast stroma during the Calvin cycle."
+TOKENS = ["a", "The chloroplast stroma", "Calvin cycle"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    detector = LeakDetector(
+        tuple(token.strip().lower() for token in TOKENS if len(token.strip()) >= 2)
+    )
+    for label, feedback in (("safe", SAFE_FEEDBACK), ("leaky", LEAKY_FEEDBACK)):
+        assert legacy_answer_revealed(feedback, TOKENS) == detector.revealed(feedback)
+        legacy = timeit.timeit(
+            lambda: legacy_answer_revealed(feedback, TOKENS), number=args.iterations
+        )
+        combined = timeit.timeit(lambda: detector.revealed(feedback), number=args.iterations)
+        print(
+            f"{label:>5}: legacy {legacy / args.iterations * 1e6:6.2f} us/call, "
+            f"LeakDetector {combined / args.iterations * 1e6:6.2f} us/call "
+            f"({legacy / combined:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
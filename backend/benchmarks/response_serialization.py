@@ -0,0 +1,94 @@
+"""
+Microbenchmark for JSON response serialization.
+
+Compares the previous `jsonify(model.model_dump())` path with `json_response(model)` for
+CreateQuizResponse and SessionStateResponse, plus the state endpoint's cached-quiz rendering.
+Run from backend/:
+
+    python -m benchmarks.response_serialization [--iterations 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import timeit
+from typing import Callable
+
+from flask import Flask, jsonify
+
+from app.config import Settings
+from app.providers.manager import LLMManager
+from app.responses import json_response, orjson
+from app.schemas import AnswerSubmissionRequest, CreateQuizResponse
+from app.services.quiz_builder import QuizBuilderService
+from app.services.session_backends import MemorySessionBackend
+from app.services.session_store import SessionStore
+from app.services.wikipedia import WikiArticle
+
+
+def _time(label: str, func: Callable[[], object], iterations: int) -> float:
+    seconds = min(timeit.repeat(func, number=iterations, repeat=5)) / iterations
+    print(f"  {label:<34} {seconds * 1e6:8.1f} us/request")
+    return seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    settings = Settings.from_env()
+    settings.llm_telemetry_enabled = False
+    quiz_builder = QuizBuilderService(settings=settings, llm_manager=LLMManager(settings))
+    store = SessionStore(
+        settings=settings, quiz_builder=quiz_builder, backend=MemorySessionBackend()
+    )
+    article = WikiArticle(
+        title="Photosynthesis",
+        page_id=24544,
+        url="https://en.wikipedia.org/wiki/Photosynthesis",
+        summary="Photosynthesis is a process used by plants to convert light energy.",
+        image_url=None,
+        image_caption=None,
+        extract="Photosynthesis is a process used by plants to convert light energy. " * 60,
+    )
+    quiz = quiz_builder._mock_quiz("Photosynthesis", article, reveal_answers=False)
+    session_id = store.create_session(topic="Photosynthesis", quiz=quiz)
+    for question_id in ("q01", "q02", "q03"):
+        store.submit_answer(
+            session_id,
+            AnswerSubmissionRequest(question_id=question_id, selected_option_ids=["b"]),
+        )
+    record = store.get_session(session_id)
+    state = store.get_state(session_id)
+    created = CreateQuizResponse(
+        session_id=session_id, quiz=quiz, source=quiz.source, provider="mock"
+    )
+
+    def legacy_create() -> object:
+        payload = created.model_dump(exclude={"provider"})
+        payload["provider"] = "mock"
+        return jsonify(payload)
+
+    print(f"orjson for dict payloads: {'yes' if orjson is not None else 'no'}")
+    app = Flask(__name__)
+    with app.app_context():
+        print("CreateQuizResponse")
+        legacy = _time("jsonify(model_dump())", legacy_create, args.iterations)
+        fast = _time("json_response(model)", lambda: json_response(created), args.iterations)
+        print(f"  speedup: {legacy / fast:.1f}x")
+
+        print("SessionStateResponse")
+        legacy = _time(
+            "jsonify(model_dump())", lambda: jsonify(state.model_dump()), args.iterations
+        )
+        fast = _time("json_response(model)", lambda: json_response(state), args.iterations)
+        cached = _time(
+            "render_state (cached quiz bytes)",
+            lambda: store.render_state(record),
+            args.iterations,
+        )
+        print(f"  speedup: {legacy / fast:.1f}x (json_response), {legacy / cached:.1f}x (cached)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Memory benchmark for per-session answer state.
+
+Compares the previous layout (one dataclass with a __dict__ per question, keyed by question id)
+with the AnswerTable layout over synthetic sessions that share one quiz. Run from backend/:
+
+    python -m benchmarks.session_memory [--sessions 100000]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from app.config import Settings
+from app.providers.manager import LLMManager
+from app.services.quiz_builder import QuizBuilderService
+from app.services.session_backends import SessionRecord
+from app.services.wikipedia import WikiArticle
+
+
+@dataclass
+class LegacySessionAnswer:
+    question_id: str
+    attempts_used: int = 0
+    is_correct: bool = False
+    locked: bool = False
+    selected_option_ids: Optional[List[str]] = None
+    short_answer: Optional[str] = None
+    feedback: Optional[str] = None
+
+
+@dataclass
+class LegacySessionRecord:
+    session_id: str
+    topic: str
+    quiz: object
+    answers: Dict[str, LegacySessionAnswer]
+
+
+def _legacy_session(quiz) -> LegacySessionRecord:
+    record = LegacySessionRecord(
+        session_id=uuid.uuid4().hex, topic=quiz.topic, quiz=quiz, answers={}
+    )
+    for question in quiz.questions:
+        record.answers[question.id] = LegacySessionAnswer(question_id=question.id)
+    # A few answered questions so optional fields are not all empty.
+    first = record.answers[quiz.questions[0].id]
+    first.attempts_used = 1
+    first.selected_option_ids = ["b"]
+    first.feedback = "That statement is not supported by the selected article context."
+    return record
+
+
+def _compact_session(quiz) -> SessionRecord:
+    record = SessionRecord(session_id=uuid.uuid4().hex, topic=quiz.topic, quiz=quiz)
+    record.answers.record_attempt(
+        0,
+        is_correct=False,
+        locked=False,
+        feedback="That statement is not supported by the selected article context.",
+    )
+    record.answers.selected_option_ids[0] = ["b"]
+    return record
+
+
+def _measure(factory: Callable[[], object], sessions: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    baseline, _peak = tracemalloc.get_traced_memory()
+    records = [factory() for _ in range(sessions)]
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    gc.collect()
+    return current - baseline
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    args = parser.parse_args()
+
+    settings = Settings.from_env()
+    settings.llm_telemetry_enabled = False
+    quiz_builder = QuizBuilderService(settings=settings, llm_manager=LLMManager(settings))
+    article = WikiArticle(
+        title="Photosynthesis",
+        page_id=24544,
+        url="https://en.wikipedia.org/wiki/Photosynthesis",
+        summary="Photosynthesis is a process used by plants to convert light energy.",
+        image_url=None,
+        image_caption=None,
+        extract="Photosynthesis is a process used by plants to convert light energy.",
+    )
+    quiz = quiz_builder._mock_quiz("Photosynthesis", article, reveal_answers=False)
+
+    legacy = _measure(lambda: _legacy_session(quiz), args.sessions)
+    compact = _measure(lambda: _compact_session(quiz), args.sessions)
+
+    print(f"sessions: {args.sessions}")
+    print(f"legacy dataclass+dict: {legacy / 1e6:8.1f} MB ({legacy / args.sessions:6.0f} B/session)")
+    print(f"compact AnswerTable:   {compact / 1e6:8.1f} MB ({compact / args.sessions:6.0f} B/session)")
+    print(f"reduction: {legacy / max(1, compact):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""Gunicorn server hooks. Gunicorn loads this file automatically from its working directory."""
+
+import os
+import shutil
+
+
+def on_starting(server):
+    # Samples left by a previous run would otherwise be merged into /metrics.
+    directory = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Drops the exited worker's live gauges (in-flight LLM calls) from the merged view.
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,188 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from pydantic import BaseModel
+
+from app import metrics
+from app.config import Settings
+from app.providers.async_clients import AsyncHttpProvider
+from app.providers.async_manager import AsyncLLMManager
+from app.providers.base import LLMCallInput
+from app.providers.clients import GeminiProvider, HttpLLMProvider
+from app.providers.manager import LLMManager
+from app.services.async_wikipedia import AsyncWikipediaService
+from app.services.wikipedia import WikipediaService
+
+
+class _Answer(BaseModel):
+    value: int
+
+
+def _settings() -> Settings:
+    settings = Settings.from_env()
+    settings.llm_telemetry_enabled = False
+    settings.wiki_cache_disk_path = ""
+    return settings
+
+
+def test_async_gemini_provider_streams_sse():
+    seen = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen["url"] = str(request.url)
+        events = [
+            {"candidates": [{"content": {"parts": [{"text": '{"value": '}]}}]},
+            {
+                "candidates": [{"content": {"parts": [{"text": "7}"}]}}],
+                "usageMetadata": {"totalTokenCount": 3},
+            },
+        ]
+        body = "".join(f"data: {json.dumps(event)}\r\n\r\n" for event in events)
+        return httpx.Response(200, text=body, headers={"Content-Type": "text/event-stream"})
+
+    provider = GeminiProvider(
+        name="gemini", api_key="key", base_url="https://gemini.test/v1", timeout_ms=1000
+    )
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            chunks = []
+            output = await AsyncHttpProvider(provider, client).generate_text(
+                LLMCallInput(task="t", model="m", system_prompt="s", user_prompt="u"),
+                on_text=chunks.append,
+            )
+            return chunks, output
+
+    chunks, output = asyncio.run(run())
+    assert seen["url"].endswith("/models/m:streamGenerateContent?alt=sse")
+    assert chunks == ['{"value": ', "7}"]
+    assert output.text == '{"value": 7}'
+    assert output.usage == {"totalTokenCount": 3}
+
+
+def test_async_manager_fails_over_to_next_provider():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "openai.test":
+            return httpx.Response(503, text="unavailable")
+        return httpx.Response(
+            200,
+            json={"candidates": [{"content": {"parts": [{"text": '{"value": 3}'}]}}]},
+        )
+
+    settings = _settings()
+    settings.llm_provider_order = ["openai", "gemini"]
+    settings.openai_api_key = "key"
+    settings.openai_base_url = "https://openai.test/v1"
+    settings.gemini_api_key = "key"
+    settings.gemini_base_url = "https://gemini.test/v1"
+    manager = LLMManager(settings)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await AsyncLLMManager(manager, client).complete_json_model(
+                "quiz_generation", "s", "u", _Answer
+            )
+
+    parsed, provider = asyncio.run(run())
+    assert provider == "gemini"
+    assert parsed.value == 3
+
+
+def test_failover_metric_counts_the_hand_over_not_each_retry(monkeypatch):
+    class _Recorder(metrics._NullMetrics):
+        def __init__(self):
+            self.failovers = []
+
+        def llm_failover(self, provider, category):
+            self.failovers.append((provider, category))
+
+    recorder = _Recorder()
+    monkeypatch.setattr(metrics, "_active", recorder)
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.host)
+        if request.url.host == "openai.test":
+            return httpx.Response(503, text="unavailable")
+        return httpx.Response(
+            200,
+            json={"candidates": [{"content": {"parts": [{"text": '{"value": 3}'}]}}]},
+        )
+
+    settings = _settings()
+    settings.llm_provider_order = ["openai", "gemini"]
+    settings.llm_max_retries_per_provider = 2
+    settings.openai_api_key = "key"
+    settings.openai_base_url = "https://openai.test/v1"
+    settings.gemini_api_key = "key"
+    settings.gemini_base_url = "https://gemini.test/v1"
+    manager = LLMManager(settings)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await AsyncLLMManager(manager, client).complete_json_model(
+                "quiz_generation", "s", "u", _Answer
+            )
+
+    _parsed, provider = asyncio.run(run())
+    assert provider == "gemini"
+    assert requests.count("openai.test") == 3
+    assert [name for name, _category in recorder.failovers] == ["openai"]
+
+
+def test_async_wikipedia_shares_cache_with_sync_service():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        return httpx.Response(
+            200,
+            json={
+                "query": {
+                    "pages": {
+                        "42": {
+                            "pageid": 42,
+                            "title": "Python",
+                            "fullurl": "https://en.wikipedia.org/wiki/Python",
+                            "lastrevid": 9,
+                            "extract": "Python is a language.\nMore text.",
+                        }
+                    }
+                }
+            },
+        )
+
+    wikipedia = WikipediaService(_settings())
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = AsyncWikipediaService(wikipedia, client)
+            await service.aget_article(42)
+            return await service.aget_article(42)
+
+    article = asyncio.run(run())
+    assert article.title == "Python"
+    assert article.summary == "Python is a language."
+    assert article.revision_id == 9
+    assert len(calls) == 1
+    assert wikipedia.get_article(42).title == "Python"
+
+
+def test_provider_missing_a_wire_format_hook_cannot_be_instantiated():
+    class _NoStreaming(HttpLLMProvider):
+        def endpoint(self, request, streaming):
+            return self.base_url
+
+        def headers(self):
+            return {}
+
+        def build_payload(self, request, streaming):
+            return {}
+
+        def output_from_data(self, data):
+            raise AssertionError("unused")
+
+    with pytest.raises(TypeError, match="collect_stream_event"):
+        _NoStreaming(name="x", api_key="k", base_url="https://example.com", timeout_ms=1000)
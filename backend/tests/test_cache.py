@@ -0,0 +1,28 @@
+from app.cache import MISSING, SQLiteCacheTier, TTLCache
+
+
+def test_ttl_cache_lru_bound_and_negative_entries():
+    cache = TTLCache(max_entries=2)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {}
+
+    assert cache.get_or_load("summary", "Missing", loader, 60, negative_ttl_seconds=30) == {}
+    assert cache.get_or_load("summary", "Missing", loader, 60, negative_ttl_seconds=30) == {}
+    assert len(calls) == 1
+
+    cache.set("search", "a", ["a"], 60)
+    cache.set("search", "b", ["b"], 60)
+    assert cache.get("summary", "Missing") is MISSING
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_survives_new_cache_instance(tmp_path):
+    path = str(tmp_path / "wiki_cache.sqlite3")
+    TTLCache(max_entries=8, disk=SQLiteCacheTier(path)).set("extract", "42", "text", 60)
+
+    restarted = TTLCache(max_entries=8, disk=SQLiteCacheTier(path))
+    assert restarted.get("extract", "42") == "text"
+    assert restarted.stats()["disk_hits"] == 1
@@ -0,0 +1,19 @@
+from app.http import HttpSessionPool
+
+
+def test_session_pool_reuses_one_session_per_host():
+    pool = HttpSessionPool(pool_size=4, retries=1)
+
+    first = pool.session_for("https://api.openai.com/v1/chat/completions")
+    second = pool.session_for("https://api.openai.com/v1/models")
+    other = pool.session_for("https://en.wikipedia.org/w/api.php")
+
+    assert first is second
+    assert first is not other
+    adapter = first.get_adapter("https://api.openai.com/")
+    assert adapter.max_retries.connect == 1
+    assert "POST" not in adapter.max_retries.allowed_methods
+
+    stats = pool.stats()
+    assert set(stats["hosts"]) == {"api.openai.com", "en.wikipedia.org"}
+    assert stats["hosts"]["api.openai.com"]["requests"] == 0
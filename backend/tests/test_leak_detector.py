@@ -0,0 +1,18 @@
+from app.services.leak_detector import LeakDetector
+
+
+def test_leak_detector_flags_reveal_phrases_and_sensitive_tokens():
+    detector = LeakDetector(("calvin cycle", "the chloroplast stroma"))
+
+    assert detector.revealed("The correct answer involves light.") is True
+    assert detector.revealed("Option C is correct here.") is True
+    assert detector.revealed("It happens during the Calvin Cycle.") is True
+    assert detector.revealed("   ") is True
+    assert detector.revealed("Re-read the section on carbon fixation.") is False
+
+
+def test_leak_detector_without_tokens_only_checks_phrases():
+    detector = LeakDetector()
+
+    assert detector.revealed("That should be obvious from the text.") is True
+    assert detector.revealed("Calvin cycle is mentioned in the article.") is False
@@ -0,0 +1,81 @@
+import time
+
+from pydantic import BaseModel
+
+from app.config import Settings
+from app.providers.base import LLMCallOutput
+from app.providers.hedging import LatencyWindow
+from app.providers.manager import LLMManager
+
+
+class _Answer(BaseModel):
+    value: int
+
+
+class _FakeProvider:
+    def __init__(self, name: str, delay: float, value: int, cost: float | None = None) -> None:
+        self.name = name
+        self.delay = delay
+        self.value = value
+        self.cost = cost
+        self.calls = 0
+
+    def is_configured(self) -> bool:
+        return True
+
+    def generate_text(self, request, on_text=None) -> LLMCallOutput:
+        self.calls += 1
+        time.sleep(self.delay)
+        return LLMCallOutput(text=f'{{"value": {self.value}}}', cost_usd=self.cost)
+
+
+def _manager(hedge: bool, slow: _FakeProvider, fast: _FakeProvider) -> LLMManager:
+    settings = Settings.from_env()
+    settings.llm_telemetry_enabled = False
+    settings.llm_provider_order = ["openai", "gemini"]
+    settings.llm_hedge_enabled = hedge
+    settings.llm_hedge_delay_ms = 50
+    settings.llm_hedge_percentile = 0
+    manager = LLMManager(settings)
+    manager.providers = {"openai": slow, "gemini": fast}
+    return manager
+
+
+def test_hedged_request_returns_first_valid_result():
+    slow = _FakeProvider("openai", delay=1.0, value=1, cost=0.02)
+    fast = _FakeProvider("gemini", delay=0.0, value=2)
+    manager = _manager(True, slow, fast)
+
+    started = time.perf_counter()
+    parsed, provider = manager.complete_json_model("quiz_generation", "s", "u", _Answer)
+
+    assert provider == "gemini"
+    assert parsed.value == 2
+    assert time.perf_counter() - started < 0.5
+    stats = manager.hedging.stats()
+    assert stats["hedges_launched"] == 1
+    assert stats["hedges_won"] == 1
+
+    time.sleep(1.1)
+    assert manager.hedging.stats()["wasted_usd_today"] == 0.02
+
+
+def test_without_hedging_providers_run_in_order():
+    slow = _FakeProvider("openai", delay=0.1, value=1)
+    fast = _FakeProvider("gemini", delay=0.0, value=2)
+    manager = _manager(False, slow, fast)
+
+    parsed, provider = manager.complete_json_model("quiz_generation", "s", "u", _Answer)
+
+    assert provider == "openai"
+    assert parsed.value == 1
+    assert fast.calls == 0
+
+
+def test_latency_window_percentile_requires_min_samples():
+    window = LatencyWindow()
+    for seconds in range(1, 11):
+        window.observe("openai", "quiz_generation", float(seconds))
+
+    assert window.percentile("openai", "quiz_generation", 0.9, min_samples=20) is None
+    assert window.percentile("openai", "quiz_generation", 0.9, min_samples=5) == 9.0
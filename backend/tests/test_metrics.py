@@ -0,0 +1,66 @@
+from app import metrics
+from app.app import create_app
+from app.cache import TTLCache
+from app.services.session_backends import SessionRecord
+from app.services.wikipedia import WikiArticle
+
+
+def _quiz(app):
+    article = WikiArticle(
+        title="Python",
+        page_id=1,
+        url="https://example.com",
+        summary="Python summary",
+        image_url=None,
+        image_caption=None,
+        extract="Python extract",
+    )
+    quiz, _provider = app.extensions["services"]["quiz_builder"].build_quiz(
+        topic="Python", article=article
+    )
+    return quiz
+
+
+def test_metrics_endpoint_reports_requests_sessions_and_cache_lookups(monkeypatch):
+    monkeypatch.setenv("METRICS_ENABLED", "true")
+    monkeypatch.setenv("LLM_FORCE_MOCK_MODE", "true")
+    monkeypatch.setenv("LLM_TELEMETRY_ENABLED", "false")
+    monkeypatch.setenv("SESSION_BACKEND", "memory")
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    app = create_app()
+    try:
+        client = app.test_client()
+        assert client.get("/api/health").status_code == 200
+
+        cache = TTLCache(max_entries=4, name="test_cache")
+        cache.get("ns", "key")
+        cache.set("ns", "key", "value", ttl_seconds=60)
+        cache.get("ns", "key")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.content_type.startswith("text/plain")
+        body = response.get_data(as_text=True)
+        assert (
+            'quiz_me_http_requests_total{endpoint="api.health",method="GET",status="200"}'
+            in body
+        )
+        assert "quiz_me_sessions_active 0.0" in body
+
+        # Memory sessions are per worker: the count is published after each request.
+        app.extensions["services"]["session_store"].backend.save(
+            SessionRecord(session_id="s1", topic="Python", quiz=_quiz(app))
+        )
+        assert client.get("/api/health").status_code == 200
+        assert "quiz_me_sessions_active 1.0" in client.get("/metrics").get_data(as_text=True)
+        assert 'quiz_me_cache_lookups_total{cache="test_cache",result="hit"} 1.0' in body
+        assert 'quiz_me_cache_lookups_total{cache="test_cache",result="miss"} 1.0' in body
+    finally:
+        metrics.configure(False)
+
+
+def test_metrics_endpoint_is_absent_when_disabled(monkeypatch):
+    monkeypatch.setenv("METRICS_ENABLED", "false")
+    monkeypatch.setenv("LLM_TELEMETRY_ENABLED", "false")
+    app = create_app()
+    assert app.test_client().get("/metrics").status_code == 404
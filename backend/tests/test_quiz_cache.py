@@ -0,0 +1,71 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import Settings
+from app.providers.manager import LLMManager
+from app.services.quiz_builder import QuizBuilderService
+from app.services.quiz_cache import QuizCache
+from app.services.wikipedia import WikiArticle
+
+
+def _mock_quiz():
+    settings = Settings.from_env()
+    quiz_builder = QuizBuilderService(settings=settings, llm_manager=LLMManager(settings))
+    article = WikiArticle(
+        title="Python",
+        page_id=1,
+        url="https://example.com",
+        summary="Python summary",
+        image_url=None,
+        image_caption=None,
+        extract="Python extract",
+        revision_id=100,
+    )
+    return quiz_builder._mock_quiz("Python", article, reveal_answers=False)
+
+
+def test_quiz_cache_key_changes_with_revision_and_prompt_version():
+    base = QuizCache.cache_key(1, 100, "extract", "openai:gpt-5-mini", "v1")
+
+    assert base == QuizCache.cache_key(1, 100, "extract", "openai:gpt-5-mini", "v1")
+    assert base != QuizCache.cache_key(1, 101, "extract", "openai:gpt-5-mini", "v1")
+    assert base != QuizCache.cache_key(1, 100, "extract", "openai:gpt-5-mini", "v2")
+
+
+def test_quiz_cache_serves_fresh_copy_until_reuse_limit():
+    settings = Settings.from_env()
+    settings.quiz_cache_max_reuses = 2
+    cache = QuizCache(settings)
+    quiz = _mock_quiz()
+    cache.put("key", quiz, "openai")
+
+    first, provider = cache.get("key", topic="Snakes")
+    second, _provider = cache.get("key", topic="Snakes")
+
+    assert provider == "cache:openai"
+    assert first.quiz_id != quiz.quiz_id
+    assert first.quiz_id != second.quiz_id
+    assert first.topic == "Snakes"
+    assert sorted(o.id for o in first.questions[0].options) == ["a", "b", "c", "d"]
+    assert first.questions[0].correct_option_ids == quiz.questions[0].correct_option_ids
+    assert cache.get("key", topic="Snakes") is None
+
+
+def test_concurrent_reuses_never_exceed_the_limit_across_workers(tmp_path):
+    settings = Settings.from_env()
+    settings.quiz_cache_max_reuses = 5
+    settings.quiz_cache_disk_path = str(tmp_path / "quiz-cache.sqlite3")
+    workers = [QuizCache(settings) for _ in range(2)]
+    workers[0].put("key", _mock_quiz(), "openai")
+
+    barrier = threading.Barrier(8)
+
+    def claim(cache: QuizCache) -> bool:
+        barrier.wait()
+        return cache.get("key", topic="Python") is not None
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        served = list(pool.map(claim, [workers[i % 2] for i in range(8)]))
+
+    assert served.count(True) == 5
+    assert workers[1].get("key", topic="Python") is None
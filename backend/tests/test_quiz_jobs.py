@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+
+from app.app import create_app
+from app.config import Settings
+from app.providers.manager import LLMManager
+from app.services.quiz_builder import QuizBuilderService
+from app.services.quiz_jobs import MemoryJobStore, QuizJobService
+from app.services.session_store import SessionStore
+from app.services.wikipedia import WikiArticle
+
+
+class _StubWikipedia:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+
+    def get_article(self, page_id: int) -> WikiArticle:
+        if self.fail:
+            raise ValueError("Could not locate Wikipedia page for selected page_id")
+        return WikiArticle(
+            title="Python",
+            page_id=page_id,
+            url="https://example.com",
+            summary="Python summary",
+            image_url=None,
+            image_caption=None,
+            extract="Python extract",
+        )
+
+
+def _job_service(
+    wikipedia: _StubWikipedia, store: MemoryJobStore | None = None, run_async: bool = False
+) -> QuizJobService:
+    settings = Settings.from_env()
+    settings.llm_force_mock_mode = True
+    settings.session_backend = "memory"
+    settings.quiz_job_async = run_async
+    quiz_builder = QuizBuilderService(settings=settings, llm_manager=LLMManager(settings))
+    session_store = SessionStore(settings=settings, quiz_builder=quiz_builder)
+    return QuizJobService(
+        settings=settings,
+        wikipedia=wikipedia,
+        quiz_builder=quiz_builder,
+        session_store=session_store,
+        store=store or MemoryJobStore(ttl_seconds=60),
+    )
+
+
+def _wait_for_terminal(service: QuizJobService, job_id: str) -> dict:
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job = service.get(job_id)
+        if job["status"] in {"ready", "failed"}:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_quiz_job_runs_in_background_and_creates_session():
+    service = _job_service(_StubWikipedia())
+
+    job = service.submit(topic="Python", page_id=1)
+    assert job["status"] == "queued"
+
+    finished = _wait_for_terminal(service, job["job_id"])
+    assert finished["status"] == "ready"
+    assert finished["provider"] == "mock-forced"
+    state = service.session_store.get_state(finished["session_id"])
+    assert state.total_questions == len(state.quiz.questions)
+
+
+def test_quiz_job_records_failure_message():
+    service = _job_service(_StubWikipedia(fail=True))
+
+    job = service.submit(topic="Python", page_id=1)
+    finished = _wait_for_terminal(service, job["job_id"])
+
+    assert finished["status"] == "failed"
+    assert finished["session_id"] is None
+    assert finished["message"]
+
+
+class _ThreadRecordingJobStore(MemoryJobStore):
+    def __init__(self) -> None:
+        super().__init__(ttl_seconds=60)
+        self.save_threads: list[str] = []
+
+    def save(self, job: dict) -> None:
+        self.save_threads.append(threading.current_thread().name)
+        super().save(job)
+
+
+class _AsyncStubWikipedia(_StubWikipedia):
+    async def aget_article(self, page_id: int) -> WikiArticle:
+        return self.get_article(page_id)
+
+
+def test_async_jobs_write_the_job_store_off_the_event_loop(monkeypatch):
+    store = _ThreadRecordingJobStore()
+    service = _job_service(_StubWikipedia(), store=store, run_async=True)
+    monkeypatch.setattr(
+        service,
+        "_get_async_services",
+        lambda: (_AsyncStubWikipedia(), None, asyncio.Semaphore(1)),
+    )
+
+    job = service.submit(topic="Python", page_id=1)
+    finished = _wait_for_terminal(service, job["job_id"])
+
+    assert finished["status"] == "ready"
+    assert service.session_store.get_state(finished["session_id"]).complete
+    # The first save is `submit` on the caller's thread; the job loop never writes itself.
+    assert len(store.save_threads) > 1
+    assert "quiz-job-loop" not in store.save_threads
+
+
+def test_job_events_stream_closes_at_its_cap_so_clients_reconnect(monkeypatch):
+    monkeypatch.setenv("LLM_FORCE_MOCK_MODE", "true")
+    monkeypatch.setenv("LLM_TELEMETRY_ENABLED", "false")
+    monkeypatch.setenv("QUIZ_JOB_EVENTS_MAX_SECONDS", "1")
+    app = create_app()
+    generating = {
+        "job_id": "j1",
+        "status": "generating",
+        "topic": "Python",
+        "created_at": 0.0,
+        "updated_at": 0.0,
+    }
+    monkeypatch.setattr(app.extensions["services"]["quiz_jobs"], "get", lambda job_id: generating)
+
+    started = time.monotonic()
+    body = app.test_client().get("/api/quiz/jobs/j1/events").get_data(as_text=True)
+
+    assert time.monotonic() - started < 3
+    assert body.startswith("retry: 1000\n\n")
+    assert body.count("event: status") == 1
@@ -0,0 +1,168 @@
+import json
+
+from app.config import Settings
+from app.http import HttpSessionPool
+from app.providers.base import LLMCallInput
+from app.providers.clients import OpenAICompatibleProvider
+from app.providers.manager import LLMManager
+from app.schemas import AnswerSubmissionRequest
+from app.services.quiz_builder import QuizBuilderService
+from app.services.quiz_stream import QuestionStream
+from app.services.session_backends import SQLiteSessionBackend, SessionLimits
+from app.services.session_store import SessionStore
+from app.services.wikipedia import WikiArticle
+
+
+ARTICLE = WikiArticle(
+    title="Python",
+    page_id=1,
+    url="https://example.com",
+    summary="Python summary",
+    image_url=None,
+    image_caption=None,
+    extract="Python extract",
+)
+
+
+def _builder() -> QuizBuilderService:
+    settings = Settings.from_env()
+    settings.llm_force_mock_mode = True
+    return QuizBuilderService(settings=settings, llm_manager=LLMManager(settings))
+
+
+def test_question_stream_emits_each_question_as_it_closes():
+    quiz = _builder()._mock_quiz("Python", ARTICLE, reveal_answers=False)
+    text = "```json\n" + quiz.model_dump_json() + "\n```"
+    received = []
+    stream = QuestionStream(received.append)
+
+    first_seen_at = None
+    for offset in range(0, len(text), 7):
+        stream.feed(text[offset : offset + 7])
+        if received and first_seen_at is None:
+            first_seen_at = offset
+    assert [question.id for question in received] == [question.id for question in quiz.questions]
+    assert received == quiz.questions
+    assert first_seen_at < len(text) // 4
+
+
+class _FakeStreamResponse:
+    status_code = 200
+    text = ""
+    encoding = None
+
+    def __init__(self, events):
+        self._lines = [f"data: {json.dumps(event)}" for event in events] + ["data: [DONE]"]
+
+    def iter_lines(self, decode_unicode=False):
+        for line in self._lines:
+            yield line
+            yield ""
+
+    def close(self):
+        pass
+
+
+def test_openai_provider_streams_deltas(monkeypatch):
+    events = [
+        {"choices": [{"delta": {"content": '{"a": '}}]},
+        {"choices": [{"delta": {"content": "1}"}}]},
+        {"choices": [], "usage": {"total_tokens": 5, "cost": {"total_cost": 0.01}}},
+    ]
+    captured = {}
+
+    def fake_post(session, url, **kwargs):
+        captured.update(kwargs)
+        return _FakeStreamResponse(events)
+
+    monkeypatch.setattr("requests.Session.post", fake_post)
+    provider = OpenAICompatibleProvider(
+        name="openai",
+        api_key="key",
+        base_url="https://api.example.com/v1",
+        timeout_ms=1000,
+        http=HttpSessionPool(),
+    )
+    chunks = []
+    output = provider.generate_text(
+        LLMCallInput(task="t", model="m", system_prompt="s", user_prompt="u"),
+        on_text=chunks.append,
+    )
+
+    assert captured["stream"] is True
+    assert json.loads(captured["data"])["stream"] is True
+    assert chunks == ['{"a": ', "1}"]
+    assert output.text == '{"a": 1}'
+    assert output.cost_usd == 0.01
+
+
+class _IncrementalStreamResponse(_FakeStreamResponse):
+    """Tracks how far the body was consumed; reading `.text` drains it all at once."""
+
+    def __init__(self, events):
+        super().__init__(events)
+        self.lines_read = 0
+
+    @property
+    def text(self):
+        self.lines_read = len(self._lines)
+        return "\n".join(self._lines)
+
+    def iter_lines(self, decode_unicode=False):
+        for line in self._lines[self.lines_read :]:
+            self.lines_read += 1
+            yield line
+            yield ""
+
+
+def test_openai_provider_calls_back_before_the_stream_ends(monkeypatch):
+    events = [{"choices": [{"delta": {"content": str(index)}}]} for index in range(5)]
+    response = _IncrementalStreamResponse(events)
+    monkeypatch.setattr("requests.Session.post", lambda session, url, **kwargs: response)
+    provider = OpenAICompatibleProvider(
+        name="openai",
+        api_key="key",
+        base_url="https://api.example.com/v1",
+        timeout_ms=1000,
+        http=HttpSessionPool(),
+    )
+    read_at_callback = []
+    provider.generate_text(
+        LLMCallInput(task="t", model="m", system_prompt="s", user_prompt="u"),
+        on_text=lambda _chunk: read_at_callback.append(response.lines_read),
+    )
+
+    assert len(read_at_callback) == 5
+    assert read_at_callback[0] == 1
+    assert read_at_callback[0] < len(response._lines)
+
+
+def test_partial_session_keeps_answers_when_completed(tmp_path):
+    builder = _builder()
+    quiz = builder._mock_quiz("Python", ARTICLE, reveal_answers=False)
+    settings = Settings.from_env()
+    backend = SQLiteSessionBackend(str(tmp_path / "sessions.sqlite3"), limits=SessionLimits())
+    store = SessionStore(settings=settings, quiz_builder=builder, backend=backend)
+
+    first = quiz.questions[0]
+    session_id = store.create_session(
+        "Python", builder.partial_quiz("Python", ARTICLE, [first]), complete=False
+    )
+    wrong = next(option.id for option in first.options if option.id not in first.correct_option_ids)
+    store.submit_answer(
+        session_id, AnswerSubmissionRequest(question_id=first.id, selected_option_ids=[wrong])
+    )
+    store.update_quiz(
+        session_id, builder.partial_quiz("Python", ARTICLE, quiz.questions[:2]), complete=False
+    )
+
+    partial_state = store.get_state(session_id)
+    assert partial_state.complete is False
+    assert partial_state.total_questions == 2
+    assert partial_state.answers[first.id].attempts_used == 1
+
+    store.update_quiz(session_id, quiz, complete=True)
+    state = store.get_state(session_id)
+    assert state.complete is True
+    assert state.total_questions == 15
+    assert state.answers[first.id].attempts_used == 1
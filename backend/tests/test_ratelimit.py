@@ -0,0 +1,65 @@
+from limits.storage import storage_from_string
+
+from app.app import create_app
+from app.config import BACKEND_ROOT, Settings
+from app.ratelimit import SQLiteLimiterStorage
+
+
+def test_sqlite_storage_shares_fixed_window_counters_between_instances(tmp_path, monkeypatch):
+    uri = f"sqlite:///{tmp_path / 'ratelimit.sqlite3'}"
+    worker_a = storage_from_string(uri)
+    worker_b = storage_from_string(uri)
+    assert isinstance(worker_a, SQLiteLimiterStorage)
+
+    assert worker_a.incr("ip/quiz", 60) == 1
+    assert worker_b.incr("ip/quiz", 60) == 2
+    assert worker_a.get("ip/quiz") == 2
+    assert worker_b.get_expiry("ip/quiz") > 0
+
+    # An expired window restarts at the new hit's amount.
+    clock = [1_000_000.0]
+    monkeypatch.setattr("app.ratelimit.time.time", lambda: clock[0])
+    worker_a.incr("ip/day", 10)
+    worker_a.incr("ip/day", 10)
+    clock[0] += 11
+    assert worker_b.get("ip/day") == 0
+    assert worker_b.incr("ip/day", 10) == 1
+
+    worker_b.clear("ip/quiz")
+    assert worker_a.get("ip/quiz") == 0
+    assert worker_a.check() is True
+
+
+def test_quiz_state_limit_is_enforced_from_shared_sqlite_storage(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_FORCE_MOCK_MODE", "true")
+    monkeypatch.setenv("LLM_TELEMETRY_ENABLED", "false")
+    monkeypatch.setenv("MAX_REQ_PER_10MIN", "2")
+    monkeypatch.setenv("RATELIMIT_STORAGE_URI", f"sqlite:///{tmp_path / 'ratelimit.sqlite3'}")
+
+    statuses = []
+    for _worker in range(2):
+        client = create_app().test_client()
+        statuses.append(client.get("/api/quiz/missing/state").status_code)
+    statuses.append(create_app().test_client().get("/api/quiz/missing/state").status_code)
+
+    assert statuses == [404, 404, 429]
+
+
+def test_default_sqlite_storage_path_does_not_depend_on_the_working_directory(
+    tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SESSION_BACKEND", "sqlite")
+    monkeypatch.delenv("RATELIMIT_STORAGE_URI", raising=False)
+    monkeypatch.delenv("LLM_TELEMETRY_DIR", raising=False)
+    settings = Settings.from_env()
+    runtime = BACKEND_ROOT / "runtime"
+    assert settings.ratelimit_storage_uri == f"sqlite:///{runtime}/ratelimit/ratelimit.sqlite3"
+    assert settings.llm_telemetry_dir == str(runtime / "llm_telemetry")
+
+    monkeypatch.setenv("WIKI_CACHE_DISK_PATH", "runtime/cache/wikipedia.sqlite3")
+    monkeypatch.setenv("QUIZ_CACHE_DISK_PATH", "")
+    settings = Settings.from_env()
+    assert settings.wiki_cache_disk_path == str(runtime / "cache" / "wikipedia.sqlite3")
+    assert settings.quiz_cache_disk_path == ""
+
@@ -0,0 +1,22 @@
+import json
+
+from app.responses import json_response
+from app.schemas import AnswerSubmissionResponse
+
+
+def test_json_response_serializes_models_and_dicts_to_the_same_json_as_model_dump():
+    result = AnswerSubmissionResponse(
+        status="accepted",
+        attempts_used=1,
+        attempts_remaining=2,
+        is_correct=False,
+        locked=False,
+        feedback="Naïve guess.",
+    )
+
+    response = json_response(result)
+    assert response.mimetype == "application/json"
+    assert json.loads(response.get_data()) == result.model_dump()
+
+    payload = {"status": "ok", "sessions": {"active_sessions": 3}, "ratio": 0.5}
+    assert json.loads(json_response(payload).get_data()) == payload
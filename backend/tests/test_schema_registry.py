@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from app.providers.base import LLMCallInput
+from app.providers.clients import (
+    GeminiProvider,
+    OpenAICompatibleProvider,
+    _to_gemini_schema,
+    _to_openai_strict_schema,
+    dumps_payload,
+)
+from app.providers.schema_registry import SchemaRegistry
+from app.schemas import QuizModel
+
+
+def test_registry_builds_each_model_once_and_freezes_it():
+    registry = SchemaRegistry()
+    schemas = registry.get(QuizModel)
+
+    assert registry.get(QuizModel) is schemas
+    assert json.loads(schemas.pydantic_json) == QuizModel.model_json_schema()
+    with pytest.raises(TypeError):
+        schemas.pydantic["type"] = "array"
+
+
+def test_precomputed_schemas_produce_the_same_request_bodies():
+    schemas = SchemaRegistry().get(QuizModel)
+    schema = QuizModel.model_json_schema()
+    openai = OpenAICompatibleProvider(
+        name="openai",
+        api_key="k",
+        base_url="https://example.com",
+        timeout_ms=1000,
+        supports_json_schema_response=True,
+    )
+    gemini = GeminiProvider(
+        name="gemini", api_key="k", base_url="https://example.com", timeout_ms=1000
+    )
+
+    for provider, convert in ((openai, _to_openai_strict_schema), (gemini, _to_gemini_schema)):
+        precomputed = LLMCallInput(
+            task="quiz_generation",
+            model="m",
+            system_prompt="s",
+            user_prompt="é",
+            json_schema=schemas.pydantic,
+            schemas=schemas,
+        )
+        on_the_fly = LLMCallInput(
+            task="quiz_generation",
+            model="m",
+            system_prompt="s",
+            user_prompt="é",
+            json_schema=schema,
+        )
+        body = json.loads(dumps_payload(provider.build_payload(precomputed, streaming=False)))
+        expected = provider.build_payload(on_the_fly, streaming=False)
+        assert body == json.loads(json.dumps(expected))
+        assert convert(schema) in (
+            body.get("response_format", {}).get("json_schema", {}).get("schema"),
+            body.get("generationConfig", {}).get("responseSchema"),
+        )
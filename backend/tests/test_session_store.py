@@ -1,27 +1,54 @@
+import json
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.app import create_app
 from app.config import Settings
-from app.schemas import AnswerSubmissionRequest
+from app.schemas import AnswerSubmissionRequest, QuizModel, SessionStateDeltaResponse
 from app.services.quiz_builder import QuizBuilderService
+from app.services import session_backends
+from app.services.session_backends import (
+    MemorySessionBackend,
+    SessionLimits,
+    SQLiteSessionBackend,
+)
 from app.services.session_store import SessionStore
 from app.services.wikipedia import WikiArticle
 from app.providers.manager import LLMManager
 
 
-def test_lock_after_three_attempts_mcq_single():
-    settings = Settings.from_env()
-    llm_manager = LLMManager(settings)
-    quiz_builder = QuizBuilderService(settings=settings, llm_manager=llm_manager)
-    store = SessionStore(settings=settings, quiz_builder=quiz_builder)
+ARTICLE = WikiArticle(
+    title="Python",
+    page_id=1,
+    url="https://example.com",
+    summary="Python summary",
+    image_url=None,
+    image_caption=None,
+    extract="Python extract",
+)
 
-    article = WikiArticle(
-        title="Python",
-        page_id=1,
-        url="https://example.com",
-        summary="Python summary",
-        image_url=None,
-        image_caption=None,
-        extract="Python extract",
-    )
-    quiz, _provider = quiz_builder.build_quiz(topic="Python", article=article)
+
+@pytest.fixture
+def settings() -> Settings:
+    return Settings.from_env()
+
+
+@pytest.fixture
+def quiz_builder(settings: Settings) -> QuizBuilderService:
+    return QuizBuilderService(settings=settings, llm_manager=LLMManager(settings))
+
+
+@pytest.fixture
+def quiz(quiz_builder: QuizBuilderService) -> QuizModel:
+    quiz, _provider = quiz_builder.build_quiz(topic="Python", article=ARTICLE)
+    return quiz
+
+
+def test_lock_after_three_attempts_mcq_single(settings, quiz_builder, quiz):
+    store = SessionStore(settings=settings, quiz_builder=quiz_builder)
     session_id = store.create_session(topic="Python", quiz=quiz)
 
     question_id = "q01"
@@ -33,3 +60,333 @@ def test_lock_after_three_attempts_mcq_single():
 
     assert result.locked is True
     assert result.attempts_used == 3
+
+
+def test_sqlite_backend_shares_sessions_across_store_instances(
+    settings, quiz_builder, quiz, tmp_path
+):
+    db_path = str(tmp_path / "sessions.sqlite3")
+    worker_a = SessionStore(
+        settings=settings, quiz_builder=quiz_builder, backend=SQLiteSessionBackend(db_path)
+    )
+    worker_b = SessionStore(
+        settings=settings, quiz_builder=quiz_builder, backend=SQLiteSessionBackend(db_path)
+    )
+
+    session_id = worker_a.create_session(topic="Python", quiz=quiz)
+
+    result = worker_b.submit_answer(
+        session_id,
+        AnswerSubmissionRequest(question_id="q01", selected_option_ids=["z"]),
+    )
+    assert result.attempts_used == 1
+
+    state = worker_a.get_state(session_id)
+    assert state.answers["q01"].attempts_used == 1
+
+    worker_b.reset_session(session_id)
+    with pytest.raises(KeyError):
+        worker_a.get_state(session_id)
+
+
+def test_memory_backend_evicts_idle_and_least_recently_used_sessions(
+    settings, quiz_builder, quiz
+):
+    backend = MemorySessionBackend(limits=SessionLimits(idle_ttl_seconds=60, max_sessions=2))
+    store = SessionStore(settings=settings, quiz_builder=quiz_builder, backend=backend)
+
+    first = store.create_session(topic="Python", quiz=quiz)
+    second = store.create_session(topic="Python", quiz=quiz)
+    store.get_session(first)
+    third = store.create_session(topic="Python", quiz=quiz)
+
+    # The second session was least recently used when the cap was exceeded.
+    with pytest.raises(KeyError):
+        store.get_session(second)
+
+    backend.load(third).last_access_at -= 120
+    backend.sweep()
+    with pytest.raises(KeyError):
+        store.get_session(third)
+
+    stats = store.stats()
+    assert stats["active_sessions"] == 1
+    assert stats["evicted_lru"] == 1
+    assert stats["evicted_idle"] == 1
+
+
+def test_mcq_multi_grading_uses_precomputed_quiz_index(settings, quiz_builder, quiz):
+    store = SessionStore(settings=settings, quiz_builder=quiz_builder)
+    session_id = store.create_session(topic="Python", quiz=quiz)
+
+    position, key = store.get_session(session_id).index.lookup("q11")
+    assert position == 10
+    assert key.correct_ids == frozenset({"a", "c"})
+
+    partial = store.submit_answer(
+        session_id,
+        AnswerSubmissionRequest(question_id="q11", selected_option_ids=["a"]),
+    )
+    assert partial.is_correct is False
+
+    result = store.submit_answer(
+        session_id,
+        AnswerSubmissionRequest(question_id="q11", selected_option_ids=["c", "a", "c"]),
+    )
+    assert result.is_correct is True
+    assert result.locked is True
+
+
+def test_state_endpoint_serves_cached_quiz_bytes_and_honours_etags(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_FORCE_MOCK_MODE", "true")
+    monkeypatch.setenv("LLM_TELEMETRY_ENABLED", "false")
+    monkeypatch.setenv("SESSION_BACKEND", "sqlite")
+    monkeypatch.setenv("SESSION_SQLITE_PATH", str(tmp_path / "sessions.sqlite3"))
+    monkeypatch.setenv("RATELIMIT_STORAGE_URI", "memory://")
+    app = create_app()
+    services = app.extensions["services"]
+    store = services["session_store"]
+    quiz, _provider = services["quiz_builder"].build_quiz(topic="Python", article=ARTICLE)
+    session_id = store.create_session(topic="Python", quiz=quiz)
+    client = app.test_client()
+
+    first = client.get(f"/api/quiz/{session_id}/state")
+    assert first.status_code == 200
+    assert first.get_json() == json.loads(store.get_state(session_id).model_dump_json())
+    etag = first.headers["ETag"]
+
+    db_path = str(tmp_path / "sessions.sqlite3")
+    with sqlite3.connect(db_path) as connection:
+        connection.execute("UPDATE sessions SET accessed_at = accessed_at - 100")
+    connection.close()
+    loads = []
+    load = store.backend.load
+    monkeypatch.setattr(store.backend, "load", lambda sid: loads.append(sid) or load(sid))
+    unchanged = client.get(f"/api/quiz/{session_id}/state", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.get_data() == b""
+    assert unchanged.headers["ETag"] == etag
+    # Revalidation reads only the version column and refreshes the access time.
+    assert loads == []
+    with sqlite3.connect(db_path) as connection:
+        (accessed_at,) = connection.execute("SELECT accessed_at FROM sessions").fetchone()
+    connection.close()
+    assert accessed_at > time.time() - 5
+    assert client.get("/api/quiz/missing/state", headers={"If-None-Match": etag}).status_code == 404
+
+    store.submit_answer(
+        session_id,
+        AnswerSubmissionRequest(question_id="q01", selected_option_ids=["z"]),
+    )
+    changed = client.get(f"/api/quiz/{session_id}/state", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.get_json()["answers"]["q01"]["attempts_used"] == 1
+
+    delta = client.get(f"/api/quiz/{session_id}/state?since={first.get_json()['version']}")
+    assert list(delta.get_json()["answers"]) == ["q01"]
+    assert client.get(f"/api/quiz/{session_id}/state?since=-1").status_code == 400
+
+
+def test_state_since_returns_only_changed_answers_until_the_ring_runs_out(
+    settings, quiz_builder, quiz, tmp_path
+):
+    store = SessionStore(
+        settings=settings,
+        quiz_builder=quiz_builder,
+        backend=SQLiteSessionBackend(str(tmp_path / "sessions.sqlite3")),
+    )
+
+    session_id = store.create_session(topic="Python", quiz=quiz)
+    start = store.get_state(session_id).version
+
+    for question_id in ("q01", "q02", "q01"):
+        store.submit_answer(
+            session_id,
+            AnswerSubmissionRequest(question_id=question_id, selected_option_ids=["z"]),
+        )
+
+    record = store.get_session(session_id)
+    body = store.render_state_delta(record, start)
+    assert SessionStateDeltaResponse.model_validate_json(body).since == start
+    delta = json.loads(body)
+    assert delta["version"] == start + 3
+    assert sorted(delta["answers"]) == ["q01", "q02"]
+    assert delta["answers"]["q01"]["attempts_used"] == 2
+    assert "quiz" not in delta
+    assert json.loads(store.render_state_delta(record, start + 2))["answers"].keys() == {"q01"}
+    assert json.loads(store.render_state_delta(record, start + 3))["answers"] == {}
+
+    record.changes.popleft()
+    assert store.render_state_delta(record, start) is None
+    assert store.render_state_delta(record, start + 99) is None
+
+    store.update_quiz(session_id, quiz)
+    assert store.render_state_delta(store.get_session(session_id), start + 3) is None
+
+
+@pytest.mark.parametrize("backend_name", ["memory", "sqlite"])
+def test_stale_attempts_are_reapplied_to_the_latest_version_and_respect_the_lock(
+    settings, quiz_builder, quiz, backend_name, tmp_path
+):
+    if backend_name == "sqlite":
+        db_path = str(tmp_path / "sessions.sqlite3")
+        backends = [SQLiteSessionBackend(db_path), SQLiteSessionBackend(db_path)]
+    else:
+        shared = MemorySessionBackend()
+        backends = [shared, shared]
+    worker_a, worker_b = (
+        SessionStore(settings=settings, quiz_builder=quiz_builder, backend=backend)
+        for backend in backends
+    )
+
+    session_id = worker_a.create_session(topic="Python", quiz=quiz)
+
+    # Worker A read the session before worker B saved two attempts.
+    stale = worker_a.get_session(session_id)
+    for _ in range(2):
+        worker_b.submit_answer(
+            session_id,
+            AnswerSubmissionRequest(question_id="q01", selected_option_ids=["z"]),
+        )
+
+    latest, position, applied = worker_a._record_attempt(stale, "q01", False, "No.", ["z"], None)
+    assert applied is True
+    assert latest.answers.attempts[position] == 3
+    assert latest.answers.is_locked(position)
+
+    _latest, _position, applied = worker_a._record_attempt(stale, "q01", False, "No.", ["z"], None)
+    assert applied is False
+    assert worker_b.get_state(session_id).answers["q01"].attempts_used == 3
+
+
+@pytest.mark.parametrize("backend_name", ["memory", "sqlite"])
+def test_version_peek_honours_expiry_without_touching_the_session(
+    settings, quiz_builder, quiz, backend_name, tmp_path
+):
+    limits = SessionLimits(idle_ttl_seconds=60)
+    if backend_name == "sqlite":
+        backend = SQLiteSessionBackend(str(tmp_path / "sessions.sqlite3"), limits=limits)
+    else:
+        backend = MemorySessionBackend(limits=limits)
+    store = SessionStore(settings=settings, quiz_builder=quiz_builder, backend=backend)
+    session_id = store.create_session(topic="Python", quiz=quiz)
+
+    record = store.get_session(session_id)
+    assert store.current_version(session_id) == record.version
+    assert store.current_version("missing") is None
+
+    record.last_access_at -= 120
+    backend.save(record)
+    assert store.current_version(session_id) is None
+    with pytest.raises(KeyError):
+        store.get_session(session_id)
+
+
+def test_sqlite_backend_reads_records_saved_with_the_legacy_answer_layout(
+    settings, quiz_builder, quiz, tmp_path
+):
+    db_path = str(tmp_path / "sessions.sqlite3")
+    now = time.time()
+    legacy = {
+        "session_id": "legacy",
+        "topic": "Python",
+        "created_at": now,
+        "last_access_at": now,
+        "quiz": quiz.model_dump(mode="json"),
+        "answers": [
+            {
+                "question_id": "q01",
+                "attempts_used": 2,
+                "is_correct": False,
+                "locked": False,
+                "selected_option_ids": ["z"],
+                "short_answer": None,
+                "feedback": "Not quite.",
+            },
+            {
+                "question_id": "q02",
+                "attempts_used": 1,
+                "is_correct": True,
+                "locked": True,
+                "selected_option_ids": ["a"],
+                "short_answer": None,
+                "feedback": "Correct.",
+            },
+            {"question_id": "q99", "attempts_used": 1, "is_correct": True, "locked": True},
+        ],
+    }
+    with sqlite3.connect(db_path) as connection:
+        connection.execute(
+            "CREATE TABLE sessions (session_id TEXT PRIMARY KEY, payload BLOB NOT NULL)"
+        )
+        connection.execute(
+            "INSERT INTO sessions VALUES (?, ?)", ("legacy", json.dumps(legacy).encode("utf-8"))
+        )
+    connection.close()
+
+    store = SessionStore(
+        settings=settings, quiz_builder=quiz_builder, backend=SQLiteSessionBackend(db_path)
+    )
+    answers = store.get_state("legacy").answers
+    assert [qid for qid, answer in answers.items() if answer.attempts_used] == ["q01", "q02"]
+    assert answers["q01"].attempts_used == 2
+    assert answers["q01"].selected_option_ids == ["z"]
+    assert answers["q02"].is_correct and answers["q02"].locked
+
+    # The next save writes the current layout, and the converted answers carry over.
+    result = store.submit_answer(
+        "legacy", AnswerSubmissionRequest(question_id="q01", selected_option_ids=["z"])
+    )
+    assert result.attempts_used == 3 and result.locked
+    reloaded = SessionStore(
+        settings=settings, quiz_builder=quiz_builder, backend=SQLiteSessionBackend(db_path)
+    ).get_state("legacy")
+    assert reloaded.answers["q01"].attempts_used == 3
+    assert reloaded.answers["q02"].feedback == "Correct."
+
+
+@pytest.mark.parametrize("backend_name", ["memory", "sqlite"])
+def test_reads_alone_keep_a_session_from_idling_out(
+    settings, quiz_builder, quiz, backend_name, tmp_path, monkeypatch
+):
+    clock = [time.time()]
+    monkeypatch.setattr(session_backends, "time", SimpleNamespace(time=lambda: clock[0]))
+    limits = SessionLimits(idle_ttl_seconds=60)
+    if backend_name == "sqlite":
+        backend = SQLiteSessionBackend(str(tmp_path / "sessions.sqlite3"), limits=limits)
+    else:
+        backend = MemorySessionBackend(limits=limits)
+    store = SessionStore(settings=settings, quiz_builder=quiz_builder, backend=backend)
+    session_id = store.create_session(topic="Python", quiz=quiz)
+
+    # Never written after creation, only read more often than the idle limit.
+    for _ in range(4):
+        clock[0] += 40
+        assert store.get_state(session_id).session_id == session_id
+
+    clock[0] += 61
+    with pytest.raises(KeyError):
+        store.get_state(session_id)
+
+
+def test_answer_to_a_question_removed_while_grading_is_not_reported_as_accepted(
+    settings, quiz_builder, quiz, monkeypatch
+):
+    store = SessionStore(settings=settings, quiz_builder=quiz_builder)
+    session_id = store.create_session(topic="Python", quiz=quiz)
+    grade = quiz_builder.grade_short_answer
+
+    def grade_while_the_quiz_changes(**kwargs):
+        trimmed = quiz.model_copy(update={"questions": quiz.questions[:-1]})
+        store.update_quiz(session_id, trimmed, complete=False)
+        return grade(**kwargs)
+
+    monkeypatch.setattr(quiz_builder, "grade_short_answer", grade_while_the_quiz_changes)
+    result = store.submit_answer(
+        session_id, AnswerSubmissionRequest(question_id="q15", short_answer="An answer")
+    )
+
+    assert result.status == "invalid"
+    assert result.attempts_used == 0
+    assert result.feedback == "Question not found."
@@ -0,0 +1,185 @@
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.telemetry import (
+    LLMTelemetryStore,
+    compact_shards,
+    histogram_percentile,
+    latency_bucket,
+    read_counters,
+    read_events,
+    summarize_counters,
+)
+from app.telemetry_log import RotatingEventLog, SegmentIndex
+
+
+def _record(store: LLMTelemetryStore, outcome: str = "success", cost_usd: float | None = None) -> None:
+    store.record_attempt(
+        operation="generate",
+        task="quiz_generation",
+        provider="openai",
+        model="gpt-5-mini",
+        attempt=1,
+        outcome=outcome,
+        category="ok" if outcome == "success" else "timeout",
+        duration_ms=120,
+        cost_usd=cost_usd,
+    )
+
+
+def test_records_are_buffered_until_flush(tmp_path):
+    store = LLMTelemetryStore(
+        enabled=True,
+        base_dir=str(tmp_path),
+        flush_interval_seconds=60,
+        flush_max_events=1000,
+    )
+    _record(store, cost_usd=0.01)
+    _record(store, outcome="error")
+
+    assert store.events_path.read_text() == ""
+    assert store.snapshot()["totals"]["attempts"] == 2
+
+    store.flush()
+
+    lines = store.events_path.read_text().splitlines()
+    assert [json.loads(line)["outcome"] for line in lines] == ["success", "error"]
+    counters = json.loads(store.counters_path.read_text())
+    assert counters["totals"] == {"attempts": 2, "success": 1, "error": 1, "cost_usd": 0.01}
+    assert counters["provider_task"]["openai"]["quiz_generation"]["attempts"] == 2
+
+
+def test_counters_continue_from_existing_snapshot(tmp_path):
+    first = LLMTelemetryStore(enabled=True, base_dir=str(tmp_path), flush_interval_seconds=60)
+    _record(first)
+    first.flush()
+
+    second = LLMTelemetryStore(enabled=True, base_dir=str(tmp_path), flush_interval_seconds=60)
+    _record(second)
+    second.flush()
+
+    counters = json.loads(second.counters_path.read_text())
+    assert counters["totals"]["attempts"] == 2
+    assert len(second.events_path.read_text().splitlines()) == 2
+
+
+def test_snapshot_merges_unflushed_delta_into_flushed_counters(tmp_path):
+    store = LLMTelemetryStore(enabled=True, base_dir=str(tmp_path), flush_interval_seconds=60)
+    _record(store, cost_usd=0.01)
+    store.flush()
+    _record(store, outcome="error", cost_usd=0.01)
+
+    assert json.loads(store.counters_path.read_text())["totals"]["attempts"] == 1
+    live = store.snapshot()
+    assert live["totals"] == {"attempts": 2, "success": 1, "error": 1, "cost_usd": 0.02}
+    live["totals"]["attempts"] = 99
+    assert store.snapshot()["totals"]["attempts"] == 2
+
+    store.flush()
+    assert json.loads(store.counters_path.read_text())["totals"]["attempts"] == 2
+
+
+def test_event_threshold_wakes_flusher(tmp_path):
+    store = LLMTelemetryStore(
+        enabled=True,
+        base_dir=str(tmp_path),
+        flush_interval_seconds=60,
+        flush_max_events=3,
+    )
+    for _ in range(3):
+        _record(store)
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and not store.events_path.read_text():
+        time.sleep(0.01)
+    assert len(store.events_path.read_text().splitlines()) == 3
+
+
+def test_sharded_workers_merge_on_read_and_compact(tmp_path):
+    live = LLMTelemetryStore(enabled=True, base_dir=str(tmp_path), sharded=True)
+    exited = LLMTelemetryStore(enabled=True, base_dir=str(tmp_path), sharded=True)
+    _record(live, cost_usd=0.5)
+    _record(exited, outcome="error", cost_usd=0.25)
+    live.flush()
+    exited.flush()
+    exited._shard_lock.close()  # releases the lock as a worker exit would
+
+    merged = read_counters(tmp_path)
+    assert merged["totals"] == {"attempts": 2, "success": 1, "error": 1, "cost_usd": 0.75}
+
+    assert compact_shards(tmp_path) == 1
+    assert not exited.counters_path.exists()
+    assert live.counters_path.exists()
+
+    compacted = json.loads((tmp_path / "llm_counters.json").read_text())
+    assert compacted["totals"]["attempts"] == 1
+    month = next(iter(compacted["monthly"]))
+    assert compacted["monthly"][month]["providers"]["openai"]["error"] == 1
+    assert [event["outcome"] for event in read_events(tmp_path)] == ["error", "success"]
+    assert read_counters(tmp_path)["totals"]["attempts"] == 2
+
+
+def test_latency_rollups_answer_window_queries(tmp_path):
+    store = LLMTelemetryStore(enabled=True, base_dir=str(tmp_path), flush_interval_seconds=60)
+    for duration_ms in range(100, 1100, 10):
+        store.record_attempt(
+            operation="generate",
+            task="quiz_generation",
+            provider="gemini",
+            model="gemini-2.5-flash",
+            attempt=1,
+            outcome="success",
+            category="ok",
+            duration_ms=duration_ms,
+            cost_usd=0.001,
+        )
+    _record(store, outcome="error")
+
+    week = summarize_counters(store.read_counters(), "7d", task="quiz_generation")
+    assert week["totals"]["attempts"] == 101
+    gemini = next(row for row in week["series"] if row["provider"] == "gemini")
+    assert gemini["error_rate"] == 0.0
+    assert gemini["cost_usd"] == 0.1
+    assert abs(gemini["latency_ms"]["p50"] - 590) / 590 < 0.05
+    assert abs(gemini["latency_ms"]["p95"] - 1040) / 1040 < 0.05
+
+    last_hour = summarize_counters(store.read_counters(), "1h", provider="openai")
+    assert [row["error_rate"] for row in last_hour["series"]] == [1.0]
+    assert last_hour["series"][0]["latency_ms"]["p95"] is None
+
+
+def test_histogram_percentile_and_window_validation():
+    histogram: dict[str, int] = {}
+    for duration_ms in (10, 20, 30, 40):
+        bucket = latency_bucket(duration_ms)
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+    assert abs(histogram_percentile(histogram, 0.5) - 20) <= 1
+    assert histogram_percentile({}, 0.5) is None
+
+    for window in ("72h", "week", "0d"):
+        with pytest.raises(ValueError):
+            summarize_counters({}, window)
+
+
+def test_event_log_rotates_into_indexed_segments(tmp_path):
+    segments_dir = tmp_path / "segments"
+    log = RotatingEventLog(tmp_path / "llm_calls.jsonl", segments_dir, max_age_seconds=3600)
+    start = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    for hour in range(5):
+        ts = start + timedelta(hours=hour * 2)
+        log.write([{"ts": ts.isoformat(), "hour": hour * 2, "pad": "x" * 50}])
+
+    entries = SegmentIndex(segments_dir).entries()
+    assert len(entries) == 4
+    assert all(entry["file"].endswith(".jsonl.gz") for entry in entries)
+    assert len((tmp_path / "llm_calls.jsonl").read_text().splitlines()) == 1
+
+    window = read_events(
+        tmp_path,
+        since=start + timedelta(hours=3),
+        until=start + timedelta(hours=7),
+    )
+    assert [event["hour"] for event in window] == [4, 6]
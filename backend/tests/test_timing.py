@@ -0,0 +1,49 @@
+import threading
+import time
+
+from app import timing
+from app.timing import span
+
+
+def test_spans_are_summed_per_request_and_rendered_as_server_timing():
+    token = timing.start_request()
+    try:
+        with span("llm"):
+            time.sleep(0.01)
+        with span("llm"):
+            pass
+        with span("wiki"):
+            pass
+        timings = timing.current()
+        assert timings is not None
+        spans = timings.spans()
+        assert spans["llm"]["count"] == 2
+        assert spans["llm"]["ms"] >= 10
+
+        header = timings.server_timing_header()
+        assert header.startswith("llm;dur=")
+        assert ';desc="2x"' in header
+        assert ", wiki;dur=" in header
+        assert header.split(", ")[-1].startswith("total;dur=")
+    finally:
+        timing.finish_request(token)
+    assert timing.current() is None
+
+
+def test_spans_outside_a_request_are_ignored():
+    seen = []
+
+    def worker() -> None:
+        # New threads do not inherit the request context.
+        with span("llm"):
+            seen.append(timing.current())
+
+    token = timing.start_request()
+    try:
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        assert seen == [None]
+        assert timing.current().spans() == {}
+    finally:
+        timing.finish_request(token)
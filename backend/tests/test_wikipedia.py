@@ -0,0 +1,92 @@
+import threading
+
+from app.config import Settings
+from app.services.wikipedia import WikipediaService
+
+
+def test_wikipedia_search_is_served_from_cache(monkeypatch):
+    settings = Settings.from_env()
+    service = WikipediaService(settings=settings)
+    calls = []
+
+    def fake_search(topic, limit):
+        calls.append(topic)
+        return [{"title": "Photosynthesis", "pageid": 24544}]
+
+    monkeypatch.setattr(service, "_fetch_search", fake_search)
+
+    assert service._search("Photosynthesis") == service._search("  photosynthesis ")
+    assert calls == ["Photosynthesis"]
+
+
+def test_resolve_topic_fetches_summaries_concurrently_in_rank_order(monkeypatch):
+    settings = Settings.from_env()
+    settings.wiki_cache_enabled = False
+    service = WikipediaService(settings=settings)
+    titles = ["Alpha", "Beta", "Gamma"]
+    barrier = threading.Barrier(len(titles), timeout=5)
+
+    monkeypatch.setattr(
+        service,
+        "_fetch_search",
+        lambda topic, limit: [{"title": title, "pageid": i} for i, title in enumerate(titles)],
+    )
+
+    def fake_summary(title):
+        # Every fetch must be in flight at once for the barrier to release.
+        barrier.wait()
+        return {"extract": f"{title} summary"}
+
+    monkeypatch.setattr(service, "_fetch_summary_for_title", fake_summary)
+
+    candidates = service.resolve_topic("greek letters")
+    assert [item.summary for item in candidates] == [f"{t} summary" for t in titles]
+
+
+class _FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return self._payload
+
+
+def test_get_article_uses_one_combined_query(monkeypatch):
+    settings = Settings.from_env()
+    settings.wiki_cache_enabled = False
+    service = WikipediaService(settings=settings)
+    calls = []
+
+    def fake_get(session, url, params=None, **kwargs):
+        calls.append((url, params))
+        return _FakeResponse(
+            {
+                "query": {
+                    "pages": {
+                        "24544": {
+                            "pageid": 24544,
+                            "title": "Photosynthesis",
+                            "fullurl": "https://en.wikipedia.org/wiki/Photosynthesis",
+                            "description": "Biological process",
+                            "thumbnail": {"source": "https://upload.example/leaf.jpg"},
+                            "extract": "Photosynthesis converts light.\nIt happens in plants.",
+                        }
+                    }
+                }
+            }
+        )
+
+    monkeypatch.setattr("requests.Session.get", fake_get)
+
+    article = service.get_article(24544)
+
+    assert len(calls) == 1
+    assert article.summary == "Photosynthesis converts light."
+    assert article.image_caption == "Biological process"
+    assert article.image_url == "https://upload.example/leaf.jpg"
+    assert article.extract.endswith("It happens in plants.")
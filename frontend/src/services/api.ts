@@ -4,6 +4,7 @@ import type {
   CreateQuizResponse,
   HealthResponse,
   ResolveTopicResponse,
+  SessionStateDeltaResponse,
   SessionStateResponse
 } from "../types";
 
@@ -48,6 +49,19 @@ export async function fetchState(sessionId: string): Promise<SessionStateRespons
   return data;
 }
 
+// Returns only the answers changed after `since`, or the full state if the server can no longer
+// tell what changed (the response then carries `quiz`).
+export async function fetchStateSince(
+  sessionId: string,
+  since: number
+): Promise<SessionStateResponse | SessionStateDeltaResponse> {
+  const { data } = await client.get<SessionStateResponse | SessionStateDeltaResponse>(
+    `/quiz/${sessionId}/state`,
+    { params: { since } }
+  );
+  return data;
+}
+
 export async function resetSession(sessionId: string): Promise<void> {
   await client.post(`/quiz/${sessionId}/reset`);
 }
@@ -4,6 +4,7 @@ import {
   createQuiz,
   fetchHealth,
   fetchState,
+  fetchStateSince,
   resolveTopic,
   resetSession,
   submitAnswer
@@ -11,11 +12,27 @@ import {
 import type {
   AnswerSubmissionResponse,
   QuestionModel,
+  SessionStateDeltaResponse,
   SessionStateResponse,
   TopicCandidate
 } from "../types";
 
 type AppStep = "topic" | "confirm" | "quiz" | "score";
+
+function mergeStateDelta(
+  state: SessionStateResponse,
+  delta: SessionStateDeltaResponse
+): SessionStateResponse {
+  return {
+    ...state,
+    score: delta.score,
+    total_questions: delta.total_questions,
+    current_index: delta.current_index,
+    complete: delta.complete,
+    version: delta.version,
+    answers: { ...state.answers, ...delta.answers }
+  };
+}
 const SESSION_STORAGE_KEY = "quiz-me-session-v1";
 
 interface PopupState {
@@ -352,7 +369,14 @@ export const useQuizStore = defineStore("quiz", {
       if (!this.sessionId) {
         return;
       }
-      const state = await fetchState(this.sessionId);
+      const previous = this.state;
+      let state: SessionStateResponse;
+      if (previous && previous.session_id === this.sessionId && previous.version !== undefined) {
+        const update = await fetchStateSince(this.sessionId, previous.version);
+        state = "quiz" in update ? update : mergeStateDelta(previous, update);
+      } else {
+        state = await fetchState(this.sessionId);
+      }
       this.state = state;
       const total = state.total_questions || 15;
       if (options?.preserveIndex) {
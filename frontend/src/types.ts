@@ -100,6 +100,19 @@ export interface SessionStateResponse {
   current_index: number;
   answers: Record<string, AnswerState>;
   quiz: QuizModel;
+  complete?: boolean;
+  version?: number;
+}
+
+export interface SessionStateDeltaResponse {
+  session_id: string;
+  since: number;
+  version: number;
+  score: number;
+  total_questions: number;
+  current_index: number;
+  answers: Record<string, AnswerState>;
+  complete?: boolean;
 }
 
 export interface HealthResponse {